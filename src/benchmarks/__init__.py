@@ -0,0 +1,6 @@
+"""
+Performance benchmarks, run as scripts from src/:
+
+    python -m benchmarks.micro     physics kernels, search space, solver overhead
+    python -m benchmarks.compare   anytime solver comparison on the standard Base1 setup
+"""
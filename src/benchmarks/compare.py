@@ -0,0 +1,304 @@
+"""
+Anytime solver comparison on the standard Base1 configuration
+
+Every registered solver is run for several seeds on the same problem
+(data.json materials, the five documented SOIs, 200 point log Q grid, the
+documented bounds), maximizing TSF. For every run the best-so-far is kept
+per evaluation (from the run history) and per batch against wall time.
+
+Targets are fractions of the best TSF any run found. The outputs are:
+
+    evaluations to target   per solver and target: median evals / seconds over
+                            the seeds (inf if never reached) and success rate
+    performance profiles    Dolan-Moré: per solver the fraction of (seed, target)
+                            instances solved within tau times the evals of the
+                            fastest solver on that instance
+
+Usage (from src/):
+
+    python -m benchmarks.compare --evals 2000 --seeds 5 --out compare.json --plot compare.png
+    python -m benchmarks.compare --solvers de cma bayesian --evals 300 --max-time 120
+
+The Bayesian solver is registered but not in the default set, its GP gets
+slow at the budgets the others need.
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+PROJECT_SRC = Path(__file__).resolve().parents[1]
+if str(PROJECT_SRC) not in sys.path:
+    sys.path.insert(0, str(PROJECT_SRC))
+
+from data.materials_loader import load_base1_materials
+from problems.base1 import Base1OptimizationProblem, Bounds, SOISpec
+from solvers.base import Solver
+from solvers.callback import Callback, EarlyStoppingCallback
+from solvers.grid_search import GridSearchSolver
+from solvers.mixed_discrete import CapRacingSolver
+from solvers.random_search import RandomSearchSolver
+from solvers.search_space import CategoricalParam
+from solvers.single_obj import BayesianSolver, CMASolver, DifferentialEvolutionSolver
+
+# TECHNICAL_DOCUMENTATION.md, "Samples of Interest": (name, rho_n [1e-6 Å^-2], thickness [Å], sigma [Å])
+STANDARD_SOIS = [
+    ("Film_LowDensity", 1.0, 400.0, 2.0),
+    ("Film_HighDensity", 4.0, 600.0, 5.0),
+    ("Film_Thick", 2.0, 150.0, 3.0),
+    ("Film_Thin", 3.0, 200.0, 2.0),
+    ("build_like", 2.0, 500.0, 15.0),
+]
+
+
+def standard_problem() -> Base1OptimizationProblem:
+    materials = load_base1_materials("data.json")
+    return Base1OptimizationProblem(
+        materials,
+        [SOISpec(*soi) for soi in STANDARD_SOIS],
+        np.geomspace(0.009, 0.3, 200),
+        Bounds(0.0, 1.0),
+        Bounds(1.0, 1200.0),
+        Bounds(1.0, 100.0),
+    )
+
+
+def _grid(problem: Base1OptimizationProblem, seed: int, evals: int) -> Solver:
+    # about `evals` grid points: n per continuous axis, all choices of the categoricals
+    space = problem.search_space
+    n_cont = sum(1 for p in space.params if not isinstance(p, CategoricalParam))
+    n_cat = int(np.prod([len(p.choices) for p in space.params if isinstance(p, CategoricalParam)]))
+    n = max(2, int((evals / n_cat) ** (1.0 / max(n_cont, 1))))
+    return GridSearchSolver(problem, n_points=n, seed=seed)
+
+
+# name -> (problem, seed, evals) -> Solver, maximizing
+SOLVERS: Dict[str, Callable[[Base1OptimizationProblem, int, int], Solver]] = {
+    "random": lambda problem, seed, evals: RandomSearchSolver(problem, batch_size=32, seed=seed),
+    "grid": _grid,
+    "de": lambda problem, seed, evals: DifferentialEvolutionSolver(problem, seed=seed, tol=0.0),
+    "cma": lambda problem, seed, evals: CMASolver(problem, seed=seed),
+    "race": lambda problem, seed, evals: CapRacingSolver(problem, seed=seed),
+    "bayesian": lambda problem, seed, evals: BayesianSolver(problem, batch_size=4, seed=seed),
+}
+DEFAULT_SOLVERS = ["random", "grid", "de", "cma", "race"]
+
+
+class _Trace(Callback):
+    """ (evals, seconds since start) after every batch """
+    def on_start(self, solver: Any, history: Any, n_evals: int) -> None:
+        self.evals: List[int] = []
+        self.seconds: List[float] = []
+        self._t0 = time.perf_counter()
+
+    def on_step(self, solver: Any, history: Any, n_evals: int) -> None:
+        self.evals.append(n_evals)
+        self.seconds.append(time.perf_counter() - self._t0)
+
+
+def run_one(name: str, problem: Base1OptimizationProblem, seed: int, evals: int, max_time: Optional[float] = None) -> Dict[str, Any]:
+    """ one run, returns its best-so-far per evaluation and per batch (with wall time) """
+    solver = SOLVERS[name](problem, seed, evals)
+    trace = _Trace()
+    callbacks: List[Callback] = [trace]
+    if max_time is not None:
+        callbacks.append(EarlyStoppingCallback(max_time=max_time))
+    result = solver.run(evals, callbacks=callbacks)
+
+    y = np.nan_to_num(np.asarray(result.history.y, dtype=float), nan=-np.inf)
+    best = np.maximum.accumulate(y) if y.size else y
+    steps = np.asarray(trace.evals, dtype=int)
+    return {
+        "solver": name,
+        "seed": seed,
+        "n_evals": int(result.n_evals),
+        "seconds": trace.seconds[-1] if trace.seconds else 0.0,
+        "y_best": float(best[-1]) if best.size else None,
+        "x_best": result.x_best,
+        "best_per_eval": best,
+        "step_evals": steps,
+        "step_seconds": np.asarray(trace.seconds),
+        "step_best": best[steps - 1] if steps.size else np.empty(0),
+    }
+
+
+def _to_target(run: Dict[str, Any], target: float) -> tuple[float, float]:
+    """ (evals, seconds) until the best-so-far reached target, inf if it never did """
+    hit = np.flatnonzero(run["best_per_eval"] >= target)
+    if hit.size == 0:
+        return np.inf, np.inf
+    n = int(hit[0]) + 1
+    step = int(np.searchsorted(run["step_evals"], n))
+    return float(n), float(run["step_seconds"][step])
+
+
+def targets_table(runs: Sequence[Dict[str, Any]], targets: Sequence[float]) -> Dict[str, Dict[str, Dict[str, float]]]:
+    """ solver -> target -> {"median_evals", "median_seconds", "success"} over its seeds """
+    table: Dict[str, Dict[str, Dict[str, float]]] = {}
+    for name in dict.fromkeys(r["solver"] for r in runs):
+        mine = [r for r in runs if r["solver"] == name]
+        table[name] = {}
+        for target in targets:
+            hits = np.array([_to_target(r, target) for r in mine])
+            table[name][f"{target:.6g}"] = {
+                "median_evals": float(np.median(hits[:, 0])),
+                "median_seconds": float(np.median(hits[:, 1])),
+                "success": float(np.mean(np.isfinite(hits[:, 0]))),
+            }
+    return table
+
+
+def performance_profiles(
+        runs: Sequence[Dict[str, Any]],
+        targets: Sequence[float],
+        taus: Optional[np.ndarray] = None,
+        measure: str = "evals",
+        ) -> Dict[str, Any]:
+    """
+    Dolan-Moré profiles over the (seed, target) instances, cost = evals or
+    seconds to target. Solvers are compared on the same seeds only.
+    returns {"tau": (t,), solver: (t,) fraction of instances within tau * best cost}
+    """
+    col = 0 if measure == "evals" else 1
+    taus = np.geomspace(1.0, 100.0, 61) if taus is None else np.asarray(taus, dtype=float)
+    names = list(dict.fromkeys(r["solver"] for r in runs))
+    seeds = sorted(set.intersection(*(set(r["seed"] for r in runs if r["solver"] == n) for n in names)))
+    by_key = {(r["solver"], r["seed"]): r for r in runs}
+
+    cost = np.array([
+        [_to_target(by_key[(n, s)], t)[col] for s in seeds for t in targets]
+        for n in names
+    ])                                                          # (solvers, instances)
+    best = cost.min(axis=0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        ratio = np.where(np.isfinite(best), cost / best, np.inf)
+    out: Dict[str, Any] = {"tau": taus, "measure": measure}
+    for n, r in zip(names, ratio):
+        out[n] = (r[None, :] <= taus[:, None]).mean(axis=1) if r.size else np.zeros_like(taus)
+    return out
+
+
+def compare(
+        solvers: Sequence[str] = DEFAULT_SOLVERS,
+        seeds: Sequence[int] = range(5),
+        evals: int = 2000,
+        max_time: Optional[float] = None,
+        target_fractions: Sequence[float] = (0.9, 0.95, 0.99, 0.999),
+        problem: Optional[Base1OptimizationProblem] = None,
+        verbose: bool = True,
+        ) -> Dict[str, Any]:
+    unknown = set(solvers) - set(SOLVERS)
+    if unknown:
+        raise ValueError(f"unknown solvers {sorted(unknown)}, registered: {list(SOLVERS)}")
+    standard = problem is None
+    problem = problem or standard_problem()
+    runs = []
+    for name in solvers:
+        for seed in seeds:
+            run = run_one(name, problem, seed, evals, max_time)
+            runs.append(run)
+            if verbose:
+                print(f"{name:10s} seed {seed:3d}: TSF {run['y_best']:.6g} after {run['n_evals']} evals, {run['seconds']:.1f} s")
+
+    reference = max(r["y_best"] for r in runs if r["y_best"] is not None)
+    targets = [f * reference for f in target_fractions]
+    return {
+        "config": {"solvers": list(solvers), "seeds": list(seeds), "evals": evals, "max_time": max_time,
+                   "problem": problem.name, "standard": standard},
+        "reference": reference,
+        "target_fractions": list(target_fractions),
+        "targets": targets,
+        "runs": runs,
+        "table": targets_table(runs, targets),
+        "profiles": {m: performance_profiles(runs, targets, measure=m) for m in ("evals", "seconds")},
+    }
+
+
+def format_table(results: Dict[str, Any]) -> str:
+    fractions = results["target_fractions"]
+    head = f"{'solver':10s}" + "".join(f" {f'{f:g} x best':>24s}" for f in fractions)
+    lines = [f"evaluations / seconds to target (median, success rate), best TSF {results['reference']:.6g}", head]
+    for name, row in results["table"].items():
+        cells = []
+        for cell in row.values():
+            if np.isfinite(cell["median_evals"]):
+                cells.append(f"{cell['median_evals']:>8.0f} {cell['median_seconds']:7.2f}s {100 * cell['success']:4.0f}%")
+            else:
+                cells.append(f"{'-':>8s} {'-':>8s} {100 * cell['success']:4.0f}%")
+        lines.append(f"{name:10s}" + "".join(f" {c:>24s}" for c in cells))
+    return "\n".join(lines)
+
+
+def plot(results: Dict[str, Any], path: str) -> None:
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    fig, axes = plt.subplots(2, 2, figsize=(12, 9))
+    for name in results["table"]:
+        runs = [r for r in results["runs"] if r["solver"] == name]
+        n = min(len(r["best_per_eval"]) for r in runs)
+        curves = np.array([r["best_per_eval"][:n] for r in runs])
+        line, = axes[0, 0].plot(np.arange(1, n + 1), np.median(curves, axis=0), label=name)
+        axes[0, 0].fill_between(np.arange(1, n + 1), curves.min(axis=0), curves.max(axis=0), color=line.get_color(), alpha=0.15)
+        for r in runs:
+            axes[0, 1].step(r["step_seconds"], r["step_best"], where="post", color=line.get_color(), alpha=0.6)
+        for ax, measure in ((axes[1, 0], "evals"), (axes[1, 1], "seconds")):
+            profile = results["profiles"][measure]
+            ax.step(profile["tau"], profile[name], where="post", color=line.get_color(), label=name)
+
+    axes[0, 0].set(xscale="log", xlabel="evaluations", ylabel="best TSF", title="best-so-far (median, min-max over seeds)")
+    axes[0, 1].set(xscale="log", xlabel="wall time [s]", ylabel="best TSF", title="best-so-far vs wall time")
+    axes[1, 0].set(xscale="log", xlabel="tau", ylabel="fraction of instances", title="performance profile, evaluations")
+    axes[1, 1].set(xscale="log", xlabel="tau", ylabel="fraction of instances", title="performance profile, wall time")
+    for ax in axes.ravel():
+        ax.grid(True, which="both", alpha=0.3)
+    axes[0, 0].legend()
+    fig.tight_layout()
+    fig.savefig(path, dpi=120)
+    plt.close(fig)
+
+
+def _jsonable(obj: Any) -> Any:
+    if isinstance(obj, dict):
+        return {k: _jsonable(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_jsonable(v) for v in obj]
+    if isinstance(obj, np.ndarray):
+        return _jsonable(obj.tolist())
+    if isinstance(obj, (np.floating, float)):
+        return float(obj) if np.isfinite(obj) else None
+    if isinstance(obj, np.integer):
+        return int(obj)
+    return obj
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--solvers", nargs="+", default=DEFAULT_SOLVERS, choices=list(SOLVERS))
+    parser.add_argument("--seeds", type=int, default=5, help="number of seeds (0 .. n-1)")
+    parser.add_argument("--evals", type=int, default=2000, help="evaluations per run")
+    parser.add_argument("--max-time", type=float, help="wall-clock seconds per run")
+    parser.add_argument("--targets", type=float, nargs="+", default=[0.9, 0.95, 0.99, 0.999],
+                        help="targets as fractions of the best TSF found")
+    parser.add_argument("--out", help="write runs, table and profiles as JSON")
+    parser.add_argument("--plot", help="write best-so-far curves and profiles to this image")
+    args = parser.parse_args(argv)
+
+    results = compare(args.solvers, range(args.seeds), args.evals, args.max_time, args.targets)
+    print(format_table(results))
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(_jsonable(results), f)
+    if args.plot:
+        plot(results, args.plot)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
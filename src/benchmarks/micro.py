@@ -0,0 +1,317 @@
+"""
+Microbenchmarks for the hot path
+
+asv style: every benchmark is a class with `params` / `param_names`, a
+`setup(*params)` and `time_*(*params)` methods that are timed for every
+combination of params. `per_call` maps a time_* method to the number of
+evaluations (or points) one call handles, the results then also carry the
+time per evaluation.
+
+    ParrattAmplitude    parratt_amplitude vs layer count and Q grid size
+    EvaluateObjective   Base1 evaluate_objective / evaluate_batch vs SOI count
+    SearchSpaceOps      pack / unpack / clip / sample at population sizes
+    SolverOverhead      ask + tell cost per evaluation (cheap analytic objective)
+
+Usage (from src/):
+
+    python -m benchmarks.micro --out bench.json
+    python -m benchmarks.micro --filter Parratt --quick
+    python -m benchmarks.micro --out new.json --compare bench.json --threshold 1.25
+
+Results are JSON: {"meta": {...}, "results": [{"name", "params", "min_s",
+"median_s", "per_eval_s", "number", "repeat"}, ...]}. With --compare the
+median of every benchmark is compared to the baseline file, the exit status
+is 1 when one got slower by more than --threshold, so it can gate CI.
+"""
+
+import argparse
+import itertools
+import json
+import platform
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+PROJECT_SRC = Path(__file__).resolve().parents[1]
+if str(PROJECT_SRC) not in sys.path:
+    sys.path.insert(0, str(PROJECT_SRC))
+
+from data.materials_loader import load_base1_materials
+from physics.reflectometry import parratt_amplitude
+from physics.stack import LayerStack
+from problems.base1 import Base1OptimizationProblem, Bounds, SOISpec
+from solvers.search_space import SearchSpace
+from solvers.single_obj import BayesianSolver, CMASolver, DifferentialEvolutionSolver
+from solvers.multi_obj import NSGA2Solver
+from solvers.random_search import RandomSearchSolver
+
+
+def _base1(n_soi: int = 2, n_q: int = 200) -> Base1OptimizationProblem:
+    """ Base1 with the materials of data.json and n_soi synthetic SOIs """
+    materials = load_base1_materials("data.json")
+    sois = [SOISpec(f"soi{i}", 1.0 + 0.75 * i, 20.0 + 10.0 * i, 3.0) for i in range(n_soi)]
+    return Base1OptimizationProblem(
+        materials, sois, np.linspace(0.01, 0.2, n_q), Bounds(0.0, 1.0), Bounds(10.0, 300.0), Bounds(0.0, 100.0),
+    )
+
+
+# ---------- benchmarks ----------
+class ParrattAmplitude:
+    params = ([3, 6, 12, 24], [200, 1000, 5000])
+    param_names = ["n_layers", "n_q"]
+
+    def setup(self, n_layers: int, n_q: int) -> None:
+        rng = np.random.default_rng(0)
+        rho = rng.uniform(-1e-6, 8e-6, n_layers)
+        rho[0] = 0.0
+        self.Q = np.linspace(0.005, 0.25, n_q)
+        self.stack = LayerStack(rho, rng.uniform(10.0, 200.0, n_layers), rng.uniform(2.0, 6.0, n_layers))
+
+    def time_amplitude(self, n_layers: int, n_q: int) -> None:
+        parratt_amplitude(self.Q, self.stack)
+
+    def time_amplitude_grad(self, n_layers: int, n_q: int) -> None:
+        parratt_amplitude(self.Q, self.stack, return_grad=True)
+
+
+class EvaluateObjective:
+    params = ([1, 2, 4, 8],)
+    param_names = ["n_soi"]
+    per_call = {"time_evaluate_batch": 64}
+
+    def setup(self, n_soi: int) -> None:
+        self.problem = _base1(n_soi)
+        space = self.problem.search_space
+        self.x = space.unpack(space.sample(1, np.random.default_rng(0))[0])
+        self.thetas = space.sample(self.per_call["time_evaluate_batch"], np.random.default_rng(1))
+
+    def time_evaluate_objective(self, n_soi: int) -> None:
+        self.problem.evaluate_objective(**self.x)
+
+    def time_evaluate_batch(self, n_soi: int) -> None:
+        self.problem.evaluate_batch(self.thetas)
+
+
+class SearchSpaceOps:
+    params = ([16, 256, 4096],)
+    param_names = ["popsize"]
+
+    def setup(self, popsize: int) -> None:
+        self.space: SearchSpace = _base1().search_space
+        self.rng = np.random.default_rng(0)
+        self.thetas = self.space.sample(popsize, self.rng)
+        self.columns = self.space.unpack_columns(self.thetas)
+        self.dicts = self.space.unpack_batch(self.thetas)
+        lo, hi = self.space.relaxed_bounds()
+        self.wide = lo + (hi - lo) * self.rng.uniform(-0.2, 1.2, self.thetas.shape)
+        self.per_call = {name: popsize for name in dir(self) if name.startswith("time_")}
+
+    def time_pack_batch_dicts(self, popsize: int) -> None:
+        self.space.pack_batch(self.dicts)
+
+    def time_pack_batch_columns(self, popsize: int) -> None:
+        self.space.pack_batch(self.columns)
+
+    def time_unpack_batch(self, popsize: int) -> None:
+        self.space.unpack_batch(self.thetas)
+
+    def time_unpack_columns(self, popsize: int) -> None:
+        self.space.unpack_columns(self.thetas)
+
+    def time_clip_batch(self, popsize: int) -> None:
+        self.space.clip_batch(self.wide)
+
+    def time_sample(self, popsize: int) -> None:
+        self.space.sample(popsize, self.rng)
+
+
+class _Analytic:
+    """
+    Base1's search space with a closed form objective (sphere on the unit box
+    plus a per cap offset), so only solver overhead is timed.
+    """
+    name = "analytic"
+
+    def __init__(self, space: SearchSpace) -> None:
+        self._space = space
+        self.lo, self.hi = space.relaxed_bounds()
+
+    @property
+    def search_space(self) -> SearchSpace:
+        return self._space
+
+    def _unit(self, thetas: np.ndarray) -> np.ndarray:
+        return (np.atleast_2d(thetas) - self.lo) / (self.hi - self.lo)
+
+    def evaluate_batch(self, thetas: np.ndarray) -> np.ndarray:
+        return -np.sum((self._unit(thetas) - 0.3) ** 2, axis=1)
+
+    def evaluate_multi(self, thetas: np.ndarray, objectives: Sequence[str]) -> np.ndarray:
+        u = self._unit(thetas)
+        f = {"f1": -np.sum((u - 0.3) ** 2, axis=1), "f2": -np.sum((u - 0.7) ** 2, axis=1)}
+        return np.stack([f[name] for name in objectives], axis=1)
+
+    def evaluate_objective(self, *, objective: str = "TSF", return_breakdown: bool = False, **kwargs: Any) -> float:
+        return float(self.evaluate_batch(self._space.pack(kwargs)[None])[0])
+
+
+_SOLVERS: Dict[str, Callable[[_Analytic], Any]] = {
+    "random": lambda p: RandomSearchSolver(p, batch_size=32, seed=0),
+    "cma": lambda p: CMASolver(p, seed=0),
+    "de": lambda p: DifferentialEvolutionSolver(p, seed=0),
+    "nsga2": lambda p: NSGA2Solver(p, objectives=["f1", "f2"], seed=0, popsize=32),
+    "bayesian": lambda p: BayesianSolver(p, batch_size=4, seed=0, n_candidates=500),
+}
+
+
+class SolverOverhead:
+    params = (list(_SOLVERS),)
+    param_names = ["solver"]
+
+    def setup(self, solver: str) -> None:
+        self.problem = _Analytic(_base1().search_space)
+        self.solver = _SOLVERS[solver](self.problem)
+        # the GP's cost grows with the data, keep its runs short
+        self.n_evals = 40 if solver == "bayesian" else 512
+        self.per_call = {"time_ask_tell": self.n_evals}
+
+    def time_ask_tell(self, solver: str) -> None:
+        s = self.solver
+        s.rng = np.random.default_rng(s.seed)
+        s.reset()
+        n = 0
+        while n < self.n_evals:
+            thetas = s.ask(min(s._next_batch_size(), self.n_evals - n))
+            if len(thetas) == 0:
+                break
+            batch = s.space.clip_batch(np.asarray(thetas, dtype=float))
+            s.tell(list(batch), self.problem.evaluate_batch(batch))
+            n += len(batch)
+
+
+BENCHMARKS = [ParrattAmplitude, EvaluateObjective, SearchSpaceOps, SolverOverhead]
+
+
+# ---------- runner ----------
+def _time(fn: Callable[[], None], repeat: int, min_time: float) -> Dict[str, Any]:
+    """ timeit style: calls per sample grow until a sample takes min_time """
+    fn()  # warm up
+    number = 1
+    while True:
+        t0 = time.perf_counter()
+        for _ in range(number):
+            fn()
+        dt = time.perf_counter() - t0
+        if dt >= min_time or number >= 1 << 20:
+            break
+        number *= 2 if dt <= 0 else max(2, min(10, int(np.ceil(1.2 * min_time / dt))))
+    samples = [dt / number]
+    for _ in range(repeat - 1):
+        t0 = time.perf_counter()
+        for _ in range(number):
+            fn()
+        samples.append((time.perf_counter() - t0) / number)
+    return {"min_s": float(np.min(samples)), "median_s": float(np.median(samples)), "number": number, "repeat": repeat}
+
+
+def run_benchmarks(
+        benchmarks: Sequence[type] = BENCHMARKS,
+        pattern: Optional[str] = None,
+        repeat: int = 5,
+        min_time: float = 0.05,
+        verbose: bool = True,
+        ) -> List[Dict[str, Any]]:
+    results: List[Dict[str, Any]] = []
+    for cls in benchmarks:
+        methods = sorted(name for name in vars(cls) if name.startswith("time_"))
+        for combo in itertools.product(*cls.params):
+            names = [f"{cls.__name__}.{m}" for m in methods]
+            if pattern is not None and not any(pattern in n for n in names):
+                continue
+            bench = cls()
+            bench.setup(*combo)
+            for method, name in zip(methods, names):
+                if pattern is not None and pattern not in name:
+                    continue
+                fn = getattr(bench, method)
+                r = {"name": name, "params": dict(zip(cls.param_names, combo))}
+                r.update(_time(lambda: fn(*combo), repeat, min_time))
+                r["per_eval_s"] = r["median_s"] / getattr(bench, "per_call", {}).get(method, 1)
+                results.append(r)
+                if verbose:
+                    params = ", ".join(f"{k}={v}" for k, v in r["params"].items())
+                    print(f"{name:42s} {params:24s} {1e6 * r['median_s']:12.1f} us  ({1e6 * r['per_eval_s']:.2f} us/eval)")
+    return results
+
+
+def _key(r: Dict[str, Any]) -> str:
+    return r["name"] + json.dumps(r["params"], sort_keys=True)
+
+
+def compare(results: List[Dict[str, Any]], baseline: List[Dict[str, Any]], threshold: float = 1.25) -> List[Dict[str, Any]]:
+    """ entries of results whose median is more than threshold times the baseline's, with their ratio """
+    base = {_key(r): r for r in baseline}
+    slower = []
+    for r in results:
+        b = base.get(_key(r))
+        if b is None:
+            continue
+        ratio = r["median_s"] / b["median_s"]
+        if ratio > threshold:
+            slower.append({"name": r["name"], "params": r["params"], "ratio": ratio})
+    return slower
+
+
+def _meta() -> Dict[str, Any]:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=PROJECT_SRC, capture_output=True, text=True, timeout=10,
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "node": platform.node(),
+    }
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--out", help="write the results as JSON to this file")
+    parser.add_argument("--filter", help="only benchmarks whose name contains this")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--min-time", type=float, default=0.05, help="seconds per timing sample")
+    parser.add_argument("--quick", action="store_true", help="--repeat 3 --min-time 0.01")
+    parser.add_argument("--compare", help="baseline JSON to check the results against")
+    parser.add_argument("--threshold", type=float, default=1.25, help="slowdown ratio that counts as regression")
+    args = parser.parse_args(argv)
+    if args.quick:
+        args.repeat, args.min_time = 3, 0.01
+
+    results = run_benchmarks(pattern=args.filter, repeat=args.repeat, min_time=args.min_time)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump({"meta": _meta(), "results": results}, f, indent=2)
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+        slower = compare(results, baseline, args.threshold)
+        for s in slower:
+            params = ", ".join(f"{k}={v}" for k, v in s["params"].items())
+            print(f"REGRESSION {s['name']} [{params}]: {s['ratio']:.2f}x slower")
+        return 1 if slower else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -14,6 +14,7 @@ if str(PROJECT_SRC) not in sys.path:
     sys.path.insert(0, str(PROJECT_SRC))
 
 from problems.base1 import SubstrateSpec, CapSpec, MRL, Materials
+from physics.magnetic_sld import BinaryAlloyModel
 DATA_DIR = Path(__file__).resolve().parent
 
 
@@ -39,12 +40,15 @@ def _resolve_data_path(filename: str) -> Path:
 
 def load_base1_materials(
         filename: str, 
-        m_sld_from_x: Callable[[float], float] | None, 
+        m_sld_from_x: Callable[[float], float] | None = None, 
         ) -> Materials: 
     """
     Here we load base1 mateirals instance from a json file in the data folder 
 
     filename: str 
+    m_sld_from_x: magnetic SLD model of the MRL. If None it is built from the
+        "alloy" entry of the "mrl" section as a (picklable) BinaryAlloyModel,
+        Co-Ti when the entry is missing.
     """  
     path = _resolve_data_path(filename)
     with path.open("r", encoding="utf-8") as f: 
@@ -69,6 +73,10 @@ def load_base1_materials(
 
     # ----- MRL -----
     mrl_data = data["mrl"]
+    if m_sld_from_x is None:
+        m_sld_from_x = BinaryAlloyModel.from_dict(
+            mrl_data.get("alloy", {"element_A": "Co", "element_B": "Ti"})
+        )
     mrl = MRL(
         rho_n_Co=float(mrl_data["rho_n_Co"]),
         rho_n_Ti=float(mrl_data["rho_n_Ti"]),
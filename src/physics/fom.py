@@ -15,3 +15,43 @@ def tsf(foms_over_types):
     # foms_over_types: iterable of (SFM_up, SFM_down, MCF) per SOI type
     # from matlab but we may change them 0.5 * |Area_up - Area_down| + 0.5 * MCF
     return sum(0.5 * abs(Su - Sd) + 0.5 * Mcf for (Su, Sd, Mcf) in foms_over_types)
+
+# ---------------- derivatives (for the adjoint gradients) ----------------
+# abs is not differentiable at 0: eps = 0 uses the sub-gradient sign(z) (0 at 0),
+# eps > 0 the derivative of the smoothed sqrt(z^2 + eps^2)
+
+def abs_grad(z, eps=0.0):
+    if eps > 0.0:
+        return z / np.sqrt(z * z + eps * eps)
+    return np.sign(z)
+
+def trapezoid_weights(Q):
+    # np.trapezoid(y, Q) == sum(trapezoid_weights(Q) * y)
+    dQ = np.diff(Q)
+    c = np.zeros_like(Q, dtype=float)
+    c[:-1] += 0.5 * dQ
+    c[1:] += 0.5 * dQ
+    return c
+
+def sensitivity_grad(Q, R_sub, R_full):
+    # (dS/dR_sub, dS/dR_full)
+    den = (R_sub + R_full)**2
+    return 2.0 * R_full / den, -2.0 * R_sub / den
+
+def sfm_grad(Q, S, w=None, eps=0.0):
+    # dSFM/dS(Q), same shape as S
+    g = trapezoid_weights(Q) * abs_grad(S, eps)
+    return g if w is None else g * w
+
+def mcf_grad(Q, S_up, S_down, w=None, eps=0.0):
+    # (dMCF/dS_up, dMCF/dS_down)
+    g = sfm_grad(Q, S_up - S_down, w=w, eps=eps)
+    return g, -g
+
+def tsf_grad(foms_over_types, eps=0.0):
+    # per SOI type (dTSF/dSFM_up, dTSF/dSFM_down, dTSF/dMCF)
+    out = []
+    for (Su, Sd, Mcf) in foms_over_types:
+        g = 0.5 * abs_grad(Su - Sd, eps)
+        out.append((g, -g, 0.5))
+    return out
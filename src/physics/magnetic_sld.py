@@ -11,6 +11,7 @@ Default parameters are provided for common magnetic alloys.
 """
 
 import numpy as np
+from dataclasses import dataclass
 from typing import Optional
 
 
@@ -127,6 +128,87 @@ def coti_magnetic_sld(x_co: float, mu_co: float = 1.72) -> float:
     )
 
 
+@dataclass(frozen=True)
+class BinaryAlloyModel:
+    """
+    Declarative magnetic SLD model for a binary alloy A_x B_(1-x).
+
+    Unlike a closure this is picklable (problems can be sent to worker
+    processes), hashable and comparable (usable in cache keys), and it is
+    vectorized over x.
+    
+    Parameters:
+        element_A: Symbol of element A (e.g., 'Co', 'Fe', 'Ni')
+        element_B: Symbol of element B (e.g., 'Ti', 'Pt', 'Ta')
+        mu_A: Optional override for magnetic moment of A (default: use ELEMENT_DATA)
+        mu_B: Optional override for magnetic moment of B (default: use ELEMENT_DATA)
+    
+    Example:
+        >>> co_ti = BinaryAlloyModel('Co', 'Ti')
+        >>> sld = co_ti(0.73)                        # same as coti_magnetic_sld(0.73)
+        >>> slds = co_ti(np.linspace(0, 1, 100))     # array in, array out
+    """
+    element_A: str
+    element_B: str
+    mu_A: Optional[float] = None
+    mu_B: Optional[float] = None
+
+    def __post_init__(self):
+        if self.element_A not in ELEMENT_DATA:
+            raise ValueError(f"Element '{self.element_A}' not found in ELEMENT_DATA. Available: {list(ELEMENT_DATA.keys())}")
+        if self.element_B not in ELEMENT_DATA:
+            raise ValueError(f"Element '{self.element_B}' not found in ELEMENT_DATA. Available: {list(ELEMENT_DATA.keys())}")
+
+    @property
+    def mu_A_value(self) -> float:
+        return self.mu_A if self.mu_A is not None else ELEMENT_DATA[self.element_A]['mu']
+
+    @property
+    def mu_B_value(self) -> float:
+        return self.mu_B if self.mu_B is not None else ELEMENT_DATA[self.element_B]['mu']
+
+    def __call__(self, x_A, mu_A_override: Optional[float] = None):
+        """Magnetic SLD (10⁻⁶ Ų⁻²) for a fraction or an array of fractions of A."""
+        data_A = ELEMENT_DATA[self.element_A]
+        data_B = ELEMENT_DATA[self.element_B]
+        return calculate_binary_alloy_magnetic_sld(
+            x_element_A=np.asarray(x_A, dtype=float) if np.ndim(x_A) else float(x_A),
+            mu_A=mu_A_override if mu_A_override is not None else self.mu_A_value,
+            mu_B=self.mu_B_value,
+            MM_A=data_A['MM'],
+            Rho_A=data_A['rho'],
+            MM_B=data_B['MM'],
+            Rho_B=data_B['rho'],
+        )
+
+    def derivative(self, x_A, mu_A_override: Optional[float] = None):
+        """d(magnetic SLD)/d(x_A) in 10⁻⁶ Ų⁻², analytic (used by the adjoint gradients)."""
+        data_A = ELEMENT_DATA[self.element_A]
+        data_B = ELEMENT_DATA[self.element_B]
+        mu_A = mu_A_override if mu_A_override is not None else self.mu_A_value
+        mu_B = self.mu_B_value
+        x = np.asarray(x_A, dtype=float) if np.ndim(x_A) else float(x_A)
+
+        vol_A = data_A['MM'] / data_A['rho']
+        vol_B = data_B['MM'] / data_B['rho']
+        vol = x * vol_A + (1 - x) * vol_B
+        mu = x * mu_A + (1 - x) * mu_B
+        # rho_mag = C * 0.6022 * mu / vol * 1e6
+        return C_MAG * 0.6022 * 1e6 * ((mu_A - mu_B) * vol - mu * (vol_A - vol_B)) / vol**2
+
+    def to_dict(self) -> dict:
+        return {"element_A": self.element_A, "element_B": self.element_B, "mu_A": self.mu_A, "mu_B": self.mu_B}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "BinaryAlloyModel":
+        return cls(
+            element_A=str(data["element_A"]),
+            element_B=str(data["element_B"]),
+            mu_A=None if data.get("mu_A") is None else float(data["mu_A"]),
+            mu_B=None if data.get("mu_B") is None else float(data["mu_B"]),
+        )
+
+
 def create_alloy_sld_function(element_A: str, element_B: str, mu_A: Optional[float] = None, mu_B: Optional[float] = None):
     """
     Create a magnetic SLD function for a specific alloy using element names.
@@ -141,7 +223,7 @@ def create_alloy_sld_function(element_A: str, element_B: str, mu_A: Optional[flo
         mu_B: Optional override for magnetic moment of B (default: use ELEMENT_DATA)
     
     Returns:
-        function: A callable f(x_A, mu_A_override=None) that returns magnetic SLD
+        BinaryAlloyModel: A callable f(x_A, mu_A_override=None) that returns magnetic SLD
     
     Example:
         >>> # Create a Fe-Pt SLD function
@@ -152,31 +234,7 @@ def create_alloy_sld_function(element_A: str, element_B: str, mu_A: Optional[flo
         >>> co_ti_sld = create_alloy_sld_function('Co', 'Ti', mu_A=1.6)
         >>> sld = co_ti_sld(0.73)
     """
-    if element_A not in ELEMENT_DATA:
-        raise ValueError(f"Element '{element_A}' not found in ELEMENT_DATA. Available: {list(ELEMENT_DATA.keys())}")
-    if element_B not in ELEMENT_DATA:
-        raise ValueError(f"Element '{element_B}' not found in ELEMENT_DATA. Available: {list(ELEMENT_DATA.keys())}")
-    
-    data_A = ELEMENT_DATA[element_A]
-    data_B = ELEMENT_DATA[element_B]
-    
-    # Use provided mu values or defaults from element data
-    mu_A_default = mu_A if mu_A is not None else data_A['mu']
-    mu_B_default = mu_B if mu_B is not None else data_B['mu']
-    
-    def alloy_sld(x_A: float, mu_A_override: Optional[float] = None) -> float:
-        """Calculate magnetic SLD for this specific alloy."""
-        return calculate_binary_alloy_magnetic_sld(
-            x_element_A=x_A,
-            mu_A=mu_A_override if mu_A_override is not None else mu_A_default,
-            mu_B=mu_B_default,
-            MM_A=data_A['MM'],
-            Rho_A=data_A['rho'],
-            MM_B=data_B['MM'],
-            Rho_B=data_B['rho'],
-        )
-    
-    return alloy_sld
+    return BinaryAlloyModel(element_A, element_B, mu_A=mu_A, mu_B=mu_B)
 
 
 def vectorized_magnetic_sld(
@@ -217,6 +275,7 @@ __all__ = [
     'calculate_binary_alloy_magnetic_sld',
     'coti_magnetic_sld',
     'create_alloy_sld_function',
+    'BinaryAlloyModel',
     'vectorized_magnetic_sld',
     'ELEMENT_DATA',
     'C_MAG',
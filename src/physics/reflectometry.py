@@ -1,36 +1,290 @@
 import numpy as np
+from physics.stack import LayerStack, as_layer_stack
 
 def _kz(Q, rho):
     # Q in Å^-1, rho in Å^-2
     return np.sqrt((Q**2)/4.0 - 4.0*np.pi*rho + 0j)
 
-def parratt_amplitude(Q, layers):
-    k = [_kz(Q, float(L["rho"])) for L in layers]
+def _fresnel(k_i, k_j, sigma=0.0):
+    # rough Fresnel coefficient of interface (i | j), sigma attached to the upper layer i
+    r = (k_i - k_j) / (k_i + k_j)
+    if np.any(sigma):
+        # Nevot–Croce roughness
+        expo = -2.0 * (sigma**2) * np.real(k_i * k_j)
+        expo = np.minimum(expo, 0.0)  # avoid overflow
+        r = r * np.exp(expo)
+    return r
+
+def _fresnel_grad(k_i, k_j, sigma=0.0):
+    """
+    _fresnel and its derivatives w.r.t. the real parameters:
+    returns r, dr/drho_i, dr/drho_j, dr/dsigma. The Nevot–Croce clamp
+    (exponent capped at 0) uses the zero sub-gradient.
+    """
+    inv = 1.0 / (k_i + k_j)
+    f = (k_i - k_j) * inv
+    kk = np.real(k_i * k_j)
+    expo = -2.0 * (sigma**2) * kk
+    active = expo < 0.0
+    nc = np.exp(np.minimum(expo, 0.0))
+    dk_i = -2.0 * np.pi / k_i  # dk/drho
+    dk_j = -2.0 * np.pi / k_j
+    inv2 = nc * inv * inv
+    dnc = np.where(active, -2.0 * (sigma**2) * nc, 0.0)  # d nc / d Re(k_i k_j), real
+    dr_drho_i = (2.0 * inv2) * k_j * dk_i + f * (dnc * np.real(k_j * dk_i))
+    dr_drho_j = (-2.0 * inv2) * k_i * dk_j + f * (dnc * np.real(k_i * dk_j))
+    dr_dsigma = f * np.where(active, nc * (-4.0 * sigma * kk), 0.0)
+    return f * nc, dr_drho_i, dr_drho_j, dr_dsigma
+
+def _parratt_step(Gamma, r, phase):
+    # one interface of the recursion: Gamma below -> Gamma above
+    return (r + Gamma * phase) / (1.0 + r * Gamma * phase)
+
+def _parratt_step_grad(u, du, r, dr):
+    """
+    _parratt_step with tangents (forward mode): u = Gamma_below * phase,
+    du / dr their derivatives w.r.t. some parameters (leading axis).
+    returns Gamma, dGamma
+    """
+    q = 1.0 / (1.0 + r * u)
+    return (r + u) * q, ((1.0 - u * u) * dr + (1.0 - r * r) * du) * (q * q)
+
+def parratt_amplitude(Q, layers, return_grad=False):
+    # layers: LayerStack (or the old list of {"rho", "thickness", "sigma"} dicts)
+    # return_grad: also return (dGamma/drho, dGamma/dd, dGamma/dsigma), each (n_layers, nQ)
+    stack = as_layer_stack(layers)
+    if return_grad:
+        Gamma, grads = parratt_amplitude_grad_batch(Q, stack.rho[None], stack.thickness[None], stack.sigma[None])
+        return Gamma[0], tuple(g[0] for g in grads)
+    rho, thickness, sigma = stack.rho.tolist(), stack.thickness.tolist(), stack.sigma.tolist()
+    k = [_kz(Q, r) for r in rho]
 
     Gamma = np.zeros_like(Q, dtype=np.complex128)  # start at substrate
-    N = len(layers) - 1
+    N = len(stack) - 1
 
     for j in range(N-1, -1, -1):
         k_i, k_j = k[j], k[j+1]
-        rj = (k_i - k_j) / (k_i + k_j)
 
         # Nevot–Croce roughness: sigma attached to layer j
-        sigma_j = float(layers[j].get("sigma", 0.0))
-        if sigma_j:
-            expo = -2.0 * (sigma_j**2) * np.real(k_i * k_j)
-            expo = np.minimum(expo, 0.0)  # avoid overflow
-            rj *= np.exp(expo)
+        rj = _fresnel(k_i, k_j, sigma[j])
 
         # phase from thickness of layer j+1
-        d_lower = float(layers[j+1].get("thickness", 0.0))
-        phase = np.exp(2j * k_j * d_lower)
+        phase = np.exp(2j * k_j * thickness[j+1])
+
+        Gamma = _parratt_step(Gamma, rj, phase)
+
+    return Gamma
+
+def parratt_amplitude_batch(Q, rho, thickness, sigma):
+    """
+    Parratt amplitude for many stacks at once.
+
+    rho, thickness, sigma: (n_stacks, n_layers) arrays, layer 0 is the ambient
+    and the last column the substrate (same convention as parratt_amplitude).
+    Stacks of different depth are padded with pad_stacks.
+
+    returns (n_stacks, nQ) complex amplitudes
+    """
+    Q = np.asarray(Q, dtype=float)
+    rho = np.atleast_2d(np.asarray(rho, dtype=float))
+    thickness = np.atleast_2d(np.asarray(thickness, dtype=float))
+    sigma = np.atleast_2d(np.asarray(sigma, dtype=float))
+    n_stacks, n_layers = rho.shape
+
+    k_lower = _kz(Q, rho[:, -1, None])  # (n_stacks, nQ), substrate
+    Gamma = np.zeros((n_stacks, Q.size), dtype=np.complex128)
 
-        Gamma = (rj + Gamma * phase) / (1.0 + rj * Gamma * phase)
+    for j in range(n_layers-2, -1, -1):
+        k_upper = _kz(Q, rho[:, j, None])
+        rj = _fresnel(k_upper, k_lower, sigma[:, j, None])
+        phase = np.exp(2j * k_lower * thickness[:, j+1, None])
+        Gamma = _parratt_step(Gamma, rj, phase)
+        k_lower = k_upper
 
     return Gamma
 
+# n_stacks * n_layers * Q points per block of parratt_amplitude_grad_batch, keeps its
+# work arrays in cache (found by timing 6-24 layers, 200-5000 Q points)
+GRAD_BLOCK_SIZE = 24 * 512
+
+def parratt_amplitude_grad_batch(Q, rho, thickness, sigma):
+    """
+    Parratt amplitude and its derivatives with respect to every layer
+    parameter, by one forward and one reverse (adjoint) sweep.
+
+    rho, thickness, sigma: (n_stacks, n_layers) like parratt_amplitude_batch
+
+    returns Gamma (n_stacks, nQ) and (dGamma/drho, dGamma/dd, dGamma/dsigma),
+    each (n_stacks, n_layers, nQ) complex. rho in Å^-2, d and sigma in Å.
+    The Nevot–Croce clamp (exponent capped at 0) uses the zero sub-gradient.
+
+    Every Q point is independent, long Q grids are done in blocks of about
+    GRAD_BLOCK_SIZE / (n_stacks * n_layers) points so the work arrays stay in
+    cache. Measured cost relative to parratt_amplitude (one stack): 1.5-2x up
+    to 12 layers and 1000 Q points, 2.5-4x at 24 layers or 5000 Q points
+    (5x without blocking). The reverse sweep takes about 25 NumPy operations
+    per interface against the forward sweep's ~10, so the ~2x target is only
+    met for small stacks.
+    """
+    Q = np.asarray(Q, dtype=float)
+    rho = np.atleast_2d(np.asarray(rho, dtype=float))
+    thickness = np.atleast_2d(np.asarray(thickness, dtype=float))
+    sigma = np.atleast_2d(np.asarray(sigma, dtype=float))
+    n_stacks, n_layers = rho.shape
+    q_block = max(256, GRAD_BLOCK_SIZE // (n_stacks * n_layers))
+    if Q.size <= q_block:
+        return _parratt_grad_block(Q, rho, thickness, sigma)
+
+    Gamma = np.empty((n_stacks, Q.size), dtype=np.complex128)
+    grads = tuple(np.empty((n_stacks, n_layers, Q.size), dtype=np.complex128) for _ in range(3))
+    for start in range(0, Q.size, q_block):
+        block = slice(start, start + q_block)
+        Gamma[:, block], block_grads = _parratt_grad_block(Q[block], rho, thickness, sigma)
+        for g, bg in zip(grads, block_grads):
+            g[:, :, block] = bg
+    return Gamma, grads
+
+def _parratt_grad_block(Q, rho, thickness, sigma):
+    n_stacks, n_layers = rho.shape
+    N = n_layers - 1
+
+    # local quantities of all interfaces j|j+1 at once, (n_stacks, N, nQ)
+    k = _kz(Q, rho[:, :, None])
+    k_lo = k[:, 1:]
+    r, dr_drho_up, dr_drho_lo, dr_dsigma = _fresnel_grad(k[:, :-1], k_lo, sigma[:, :-1, None])
+    phase = np.exp(2j * k_lo * thickness[:, 1:, None])
+
+    # forward sweep, keep Gamma, u = Gamma_below * phase and 1/(1 + r u) for the reverse sweep
+    Gammas = np.zeros((n_stacks, n_layers, Q.size), dtype=np.complex128)
+    u = np.empty_like(r)
+    q = np.empty_like(r)
+    for j in range(N-1, -1, -1):
+        u[:, j] = Gammas[:, j+1] * phase[:, j]
+        q[:, j] = 1.0 / (1.0 + r[:, j] * u[:, j])
+        Gammas[:, j] = (r[:, j] + u[:, j]) * q[:, j]
+
+    # reverse sweep: adj = dGamma_0/dGamma_j
+    g_r = np.empty_like(r)      # dGamma_0/dr_j
+    g_p = np.empty_like(phase)  # dGamma_0/dphase_j
+    adj = np.ones((n_stacks, Q.size), dtype=np.complex128)
+    for j in range(N):
+        a2 = adj * q[:, j]**2
+        g_r[:, j] = a2 * (1.0 - u[:, j]**2)
+        dG_du = a2 * (1.0 - r[:, j]**2)
+        g_p[:, j] = dG_du * Gammas[:, j+1]
+        adj = dG_du * phase[:, j]
+
+    # phase_j = exp(2i k_{j+1} d_{j+1})
+    g_pp = g_p * phase
+    dp_dd = 2j * k_lo
+    dp_drho = 2j * thickness[:, 1:, None] * (-2.0 * np.pi / k_lo)
+
+    dG_drho = np.zeros_like(Gammas)
+    dG_dd = np.zeros_like(Gammas)
+    dG_dsigma = np.zeros_like(Gammas)
+    dG_drho[:, :-1] = g_r * dr_drho_up
+    dG_drho[:, 1:] += g_r * dr_drho_lo + g_pp * dp_drho
+    dG_dd[:, 1:] = g_pp * dp_dd
+    dG_dsigma[:, :-1] = g_r * dr_dsigma
+
+    return Gammas[:, 0], (dG_drho, dG_dd, dG_dsigma)
+
+class ParrattState:
+    """
+    Resumable Parratt recursion.
+
+    Gamma is the amplitude just below the current top layer of a partial
+    stack (recursion already done from the substrate up to that layer),
+    k_top / d_top are the wavevector and thickness of that top layer, which
+    the next interface above needs. Works for (nQ,) and (n_stacks, nQ) shapes.
+    """
+    __slots__ = ("Q", "Gamma", "k_top", "d_top")
+
+    def __init__(self, Q, Gamma, k_top, d_top):
+        self.Q = Q
+        self.Gamma = Gamma
+        self.k_top = k_top
+        self.d_top = d_top
+
+def parratt_partial(Q, layers, top=1):
+    """
+    Run the recursion for layers[top:] only (by default everything below the
+    ambient) and return the state at the top of that part.
+    """
+    stack = as_layer_stack(layers)
+    rho, thickness, sigma = stack.rho.tolist(), stack.thickness.tolist(), stack.sigma.tolist()
+
+    k_top = _kz(Q, rho[-1])
+    state = ParrattState(Q, np.zeros_like(k_top), k_top, thickness[-1])
+    for j in range(len(stack)-2, top-1, -1):
+        state = parratt_extend(state, rho[j], thickness[j], sigma[j])
+    return state
+
+def parratt_extend(state, rho, thickness=0.0, sigma=0.0, *, k=None, r=None, phase=None):
+    """
+    Put one more layer (rho, thickness, sigma) on top of a partial stack,
+    sigma being the roughness of the new interface (new layer | old top).
+
+    k (wavevector of the new layer), r (rough Fresnel coefficient of the new
+    interface) and phase (exp(2i k_top d_top) of the old top layer) can be
+    passed in when they are precomputed for fixed materials.
+    """
+    k_new = _kz(state.Q, rho) if k is None else k
+    rj = _fresnel(k_new, state.k_top, sigma) if r is None else r
+    if phase is None:
+        phase = np.exp(2j * state.k_top * state.d_top)
+    Gamma = _parratt_step(state.Gamma, rj, phase)
+    return ParrattState(state.Q, Gamma, k_new, thickness)
+
+def parratt_finish(state, rho_ambient=0.0, **precomputed):
+    """ Close a partial stack with the ambient (no roughness) and return the amplitude """
+    return parratt_extend(state, rho_ambient, **precomputed).Gamma
+
+def pad_stacks(stacks):
+    """
+    Turn a list of stacks (LayerStack or list-of-dict layers) into padded
+    (n_stacks, n_layers) rho/thickness/sigma arrays for parratt_amplitude_batch.
+
+    Shallow stacks are padded below the substrate with copies of the substrate
+    (zero thickness and sigma). Those interfaces have r = 0 and keep Gamma = 0,
+    so the padding does not change the result.
+    """
+    stacks = [as_layer_stack(s) for s in stacks]
+    n_layers = max(len(s) for s in stacks)
+    rho = np.empty((len(stacks), n_layers))
+    thickness = np.zeros((len(stacks), n_layers))
+    sigma = np.zeros((len(stacks), n_layers))
+
+    for i, stack in enumerate(stacks):
+        n = len(stack)
+        rho[i, :n] = stack.rho
+        thickness[i, :n] = stack.thickness
+        sigma[i, :n] = stack.sigma
+        rho[i, n:] = stack.rho[-1]
+
+    return rho, thickness, sigma
+
 def reflectivity(Q, layers, bkg=1e-3):
     return np.abs(parratt_amplitude(Q, layers))**2 + float(bkg)
 
+def reflectivity_batch(Q, rho, thickness, sigma, bkg=1e-3):
+    return np.abs(parratt_amplitude_batch(Q, rho, thickness, sigma))**2 + float(bkg)
+
+def reflectivity_grad(Q, layers, bkg=1e-3):
+    """
+    R(Q) and its derivatives per layer (adjoint pass)
+
+    returns R (nQ,) and dR/drho, dR/dd, dR/dsigma, each (n_layers, nQ)
+    """
+    Gamma, grads = parratt_amplitude(Q, layers, return_grad=True)
+    # R = |Gamma|^2 => dR = 2 Re(conj(Gamma) dGamma)
+    return (np.abs(Gamma)**2 + float(bkg), *(2.0 * np.real(np.conj(Gamma) * g) for g in grads))
+
+def reflectivity_grad_batch(Q, rho, thickness, sigma, bkg=1e-3):
+    """ batch version of reflectivity_grad, derivatives are (n_stacks, n_layers, nQ) """
+    Gamma, grads = parratt_amplitude_grad_batch(Q, rho, thickness, sigma)
+    conj = np.conj(Gamma)[:, None, :]
+    return (np.abs(Gamma)**2 + float(bkg), *(2.0 * np.real(conj * g) for g in grads))
+
 def spin_sld(rho_n, rho_m, spin='up'):
     return rho_n + (rho_m if spin == 'up' else -rho_m)
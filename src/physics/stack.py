@@ -0,0 +1,71 @@
+"""
+Array-backed layer stack used by the stack builders and the Parratt engine.
+
+Layer 0 is the ambient (air) and the last layer the semi-infinite substrate.
+sigma[j] is the roughness of the interface (j | j+1), the same convention
+as the old list-of-dict stacks {"rho", "thickness", "sigma"}.
+"""
+
+import numpy as np
+from typing import Any, Dict, List, Sequence
+
+
+class LayerStack:
+    """
+    rho: SLD per layer in Å^-2
+    thickness: thickness per layer in Å
+    sigma: roughness below each layer in Å
+
+    All three are contiguous float64 arrays of equal length.
+    """
+    __slots__ = ("rho", "thickness", "sigma")
+
+    def __init__(self, rho, thickness=None, sigma=None):
+        self.rho = np.ascontiguousarray(rho, dtype=np.float64)
+        n = self.rho.shape[0]
+        self.thickness = np.zeros(n) if thickness is None else np.ascontiguousarray(thickness, dtype=np.float64)
+        self.sigma = np.zeros(n) if sigma is None else np.ascontiguousarray(sigma, dtype=np.float64)
+        if self.rho.ndim != 1 or self.thickness.shape != (n,) or self.sigma.shape != (n,):
+            raise ValueError("rho, thickness and sigma must be 1D arrays of the same length")
+
+    def __len__(self) -> int:
+        return self.rho.shape[0]
+
+    def __repr__(self) -> str:
+        return f"LayerStack(n_layers={len(self)}, rho={self.rho}, thickness={self.thickness}, sigma={self.sigma})"
+
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, LayerStack):
+            return NotImplemented
+        return (
+            np.array_equal(self.rho, other.rho)
+            and np.array_equal(self.thickness, other.thickness)
+            and np.array_equal(self.sigma, other.sigma)
+        )
+
+    __hash__ = None
+
+    # --------- conversion to / from the old dict format ---------
+    @classmethod
+    def from_dicts(cls, layers: Sequence[Dict[str, float]]) -> "LayerStack":
+        return cls(
+            [float(L["rho"]) for L in layers],
+            [float(L.get("thickness", 0.0)) for L in layers],
+            [float(L.get("sigma", 0.0)) for L in layers],
+        )
+
+    def to_dicts(self) -> List[Dict[str, float]]:
+        return [
+            {"rho": float(r), "thickness": float(d), "sigma": float(s)}
+            for r, d, s in zip(self.rho, self.thickness, self.sigma)
+        ]
+
+
+def as_layer_stack(layers) -> LayerStack:
+    """ Accept a LayerStack or an old list-of-dict stack """
+    if isinstance(layers, LayerStack):
+        return layers
+    return LayerStack.from_dicts(layers)
+
+
+__all__ = ["LayerStack", "as_layer_stack"]
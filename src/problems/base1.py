@@ -1,9 +1,19 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, asdict
+import hashlib
+import json
+import os
 import numpy as np
-from physics.reflectometry import reflectivity, spin_sld
-from physics.fom import sensitivity, sfm, mcf, tsf
-from typing import Optional, Callable, List, Tuple, Dict, Any
+from physics.reflectometry import (
+    reflectivity, spin_sld, ParrattState, parratt_extend, parratt_finish, _kz, _fresnel,
+    _fresnel_grad, _parratt_step_grad,
+)
+from physics.stack import LayerStack
+from physics.fom import (
+    sensitivity, sfm, mcf, tsf, sensitivity_grad, sfm_grad, mcf_grad, tsf_grad,
+)
+from typing import Optional, Callable, List, Sequence, Tuple, Dict, Any
 from solvers.search_space import SearchSpace, ContinuousParam, CategoricalParam, IntegerParam
+from solvers.timing import TIMINGS
 
 
 
@@ -58,6 +68,27 @@ class Materials:
     caps: dict[str: CapSpec]
     mrl: MRL
 
+@dataclass
+class FixedTables:
+    """
+    Per-problem cache on the fixed Q grid for everything that does not depend
+    on the design vector (air, substrate, caps, SOIs). Only the MRL terms are
+    left for each candidate.
+
+    k_*: wavevectors, r_*: rough Fresnel coefficients (Nevot-Croce included)
+    of interfaces with fixed materials on both sides, phase_soi: exp(2i k d)
+    through each SOI.
+    """
+    k_air: np.ndarray
+    k_sub: np.ndarray
+    k_cap: Dict[str, np.ndarray]
+    k_soi: List[np.ndarray]
+    r_air_cap: Dict[str, np.ndarray]            # (air | cap), bare stack
+    r_air_soi: List[np.ndarray]                 # (air | SOI)
+    r_soi_cap: Dict[Tuple[int, str], np.ndarray]  # (SOI | cap)
+    phase_soi: List[np.ndarray]
+    w: Optional[np.ndarray] = None              # weight_fn(Q)
+
 from problems.interfaces import OptimizationProblemProtocol
 
 class Base1OptimizationProblem(OptimizationProblemProtocol):
@@ -112,6 +143,7 @@ class Base1OptimizationProblem(OptimizationProblemProtocol):
         self.validate()
         self.weight_fn = weight_fn
         self.sld_scale = float(SLD_SCALE) # convert 10^-6 Å^-2 -> Å
+        self.rebuild_tables()
 
     @property
     def cap_choices(self) -> list[str]: 
@@ -140,6 +172,43 @@ class Base1OptimizationProblem(OptimizationProblemProtocol):
             ]
             )
     
+    def fingerprint(self) -> str:
+        """
+        Hash of everything that determines the objective value of a packed
+        point: materials (incl. the cap order behind the cap index), MRL
+        magnetic model, SOIs, Q grid and the weights on that grid. Used to key
+        persistent evaluation stores. Weight and magnetic SLD callables are
+        identified by their values (on Q and on a fixed x grid).
+        """
+        mrl = self.materials.mrl
+        m_model = mrl.m_sld_from_x
+        if hasattr(m_model, "to_dict"):
+            m_desc: Any = m_model.to_dict()
+        else:
+            # arbitrary callable (lambda, closure): identify it by its values
+            m_desc = self._m_sld(np.linspace(0.0, 1.0, 101)).tolist()
+
+        desc = {
+            "problem": self.name,
+            "sld_scale": self.SLD_SCALE,
+            "substrate": asdict(self.materials.substrate),
+            "caps": [asdict(self.materials.caps[c]) for c in self.cap_choices],
+            "cap_choices": self.cap_choices,
+            "mrl": {
+                "rho_n_Co": mrl.rho_n_Co,
+                "rho_n_Ti": mrl.rho_n_Ti,
+                "sigma_sub_mrl": mrl.sigma_sub_mrl,
+                "sigma_mrl_cap": mrl.sigma_mrl_cap,
+                "m_sld_from_x": m_desc,
+            },
+            "soi": [asdict(soi) for soi in self.soi_list],
+        }
+        h = hashlib.sha256(json.dumps(desc, sort_keys=True).encode("utf-8"))
+        h.update(np.ascontiguousarray(self.Q, dtype=np.float64).tobytes())
+        if self._tables.w is not None:
+            h.update(np.ascontiguousarray(self._tables.w, dtype=np.float64).tobytes())
+        return h.hexdigest()
+
     def validate(self) -> None: 
         """ 
         Assert all constraints
@@ -160,53 +229,307 @@ class Base1OptimizationProblem(OptimizationProblemProtocol):
                            objective: str = "TSF", 
                            return_breakdown: bool = False
                            ) -> float: 
-        """ Returns TSF val as default """
+        """ Returns TSF val as default, any name in objective_names otherwise """
 
         #in case cap dont exist: 
         if cap not in self.materials.caps: 
             raise ValueError(f"unknown cap mateiral")
         
-        w = None if self.weight_fn is None else self.weight_fn(self.Q)
+        theta = np.array([[x_coti, d_mrl, d_cap, self.cap_choices.index(cap)]], dtype=float)
+        foms = self.evaluate_foms(theta)
+        value = float(foms[self._objective_name(objective)][0])
 
-        triplets: List[Tuple[float, float, float]] = []  # (SFM_up, SFM_down, MCF)
-        parts: List[Dict[str, Any]] = []                 # optional breakdown
+        if return_breakdown:
+            parts = [
+                {
+                    "soi": soi.name,
+                    "SFM_up": float(foms[f"SFM_up:{soi.name}"][0]),
+                    "SFM_down": float(foms[f"SFM_dn:{soi.name}"][0]),
+                    "MCF": float(foms[f"MCF:{soi.name}"][0]),
+                }
+                for soi in self.soi_list
+            ]
+            return {"value": value, "per_soi": parts}
+        return value
 
+    def evaluate_batch(self, thetas: np.ndarray) -> np.ndarray:
+        """
+        TSF for many packed design vectors at once.
+
+        thetas: (n, 4) array in search_space order (x_coti, d_mrl, d_cap, cap index)
+        returns (n,) TSF values
+        """
+        return self.evaluate_foms(thetas)["TSF"]
+
+    # ------------- all figures of merit in one pass ---------------
+    @property
+    def objective_names(self) -> List[str]:
+        """
+        Names accepted by evaluate_objective / evaluate_multi (case insensitive):
+
+        - TSF
+        - SFM_up, SFM_dn, MCF: summed over the SOIs
+        - SFM_diff: sum over the SOIs of |SFM_up - SFM_dn|
+        - thickness: d_mrl + d_cap of the built stack (cost, 0 cap for "none")
+        - SFM_up:<soi>, SFM_dn:<soi>, MCF:<soi>, TSF:<soi>: per SOI terms
+        """
+        names = ["TSF", "SFM_up", "SFM_dn", "MCF", "SFM_diff", "thickness"]
         for soi in self.soi_list:
-            # build stacks without and with SOI (spin up and down)
-            layers_sub_up, layers_sub_down = self._layers(
-                        x_coti=x_coti, d_mrl=d_mrl, d_cap=d_cap, cap=cap, soi=None
-                        )
-            layers_full_up, layers_full_down = self._layers(
-                        x_coti=x_coti, d_mrl=d_mrl, d_cap=d_cap, cap=cap, soi=soi
-                        )
-
-               # reflectivities
-            Rsub_up = self._reflect(self.Q, layers_sub_up)
-            Rsub_dn = self._reflect(self.Q, layers_sub_down)
-            Rfull_up = self._reflect(self.Q, layers_full_up)
-            Rfull_dn = self._reflect(self.Q, layers_full_down)
-
-            # sensitivities S(Q) and FOMs
-            S_up = sensitivity(self.Q, Rsub_up, Rfull_up)
-            S_dn = sensitivity(self.Q, Rsub_dn, Rfull_dn)
-            SFM_up = sfm(self.Q, S_up, w=w)
-            SFM_dn = sfm(self.Q, S_dn, w=w)
-            MCF = mcf(self.Q, S_up, S_dn, w=w)
-
-            triplets.append((SFM_up, SFM_dn, MCF))
-            if return_breakdown:
-                parts.append({
-                    "soi": soi.name,
-                    "SFM_up": float(SFM_up),
-                    "SFM_down": float(SFM_dn),
-                    "MCF": float(MCF)
-                })
+            names += [f"SFM_up:{soi.name}", f"SFM_dn:{soi.name}", f"MCF:{soi.name}", f"TSF:{soi.name}"]
+        return names
 
-        value = float(tsf(triplets)) if objective.upper() == "TSF" else float(tsf(triplets))
+    def _objective_name(self, objective: str) -> str:
+        lookup = {name.lower(): name for name in self.objective_names}
+        if objective.lower() not in lookup:
+            raise ValueError(f"unknown objective {objective!r}, use one of {self.objective_names}")
+        return lookup[objective.lower()]
 
-        if return_breakdown:
-            return {"value": value, "per_soi": parts}
-        return value
+    def evaluate_foms(self, thetas: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        Every objective in objective_names from one reflectivity pass.
+
+        thetas: (n, 4) packed design vectors
+        returns name -> (n,) array
+        """
+        thetas = np.atleast_2d(np.asarray(thetas, dtype=float))
+        n_caps = len(self.materials.caps)
+        cap_idx = np.clip(np.round(thetas[:, 3]), 0, n_caps - 1).astype(int)
+
+        SFM_up, SFM_dn, MCF = self._soi_foms(thetas[:, 0], thetas[:, 1], thetas[:, 2], cap_idx)
+        # per SOI TSF terms, TSF is their sum
+        with TIMINGS.phase("fom"):
+            terms = np.stack([tsf([(SFM_up[:, i], SFM_dn[:, i], MCF[:, i])]) for i in range(len(self.soi_list))], axis=1)
+
+        d_mrl = np.clip(thetas[:, 1], self.bounds_d.lo, self.bounds_d.hi)
+        d_cap = np.clip(thetas[:, 2], self.bounds_cap.lo, self.bounds_cap.hi)
+        no_cap = np.array([c == "none" for c in self.cap_choices])[cap_idx]
+
+        foms = {
+            "TSF": terms.sum(axis=1),
+            "SFM_up": SFM_up.sum(axis=1),
+            "SFM_dn": SFM_dn.sum(axis=1),
+            "MCF": MCF.sum(axis=1),
+            "SFM_diff": np.abs(SFM_up - SFM_dn).sum(axis=1),
+            "thickness": d_mrl + np.where(no_cap, 0.0, np.maximum(d_cap, 0.0)),
+        }
+        for i, soi in enumerate(self.soi_list):
+            foms[f"SFM_up:{soi.name}"] = SFM_up[:, i]
+            foms[f"SFM_dn:{soi.name}"] = SFM_dn[:, i]
+            foms[f"MCF:{soi.name}"] = MCF[:, i]
+            foms[f"TSF:{soi.name}"] = terms[:, i]
+        return foms
+
+    def evaluate_multi(self, thetas: np.ndarray, objectives: Sequence[str]) -> np.ndarray:
+        """
+        Named objective vector for many packed design vectors, one pass for
+        all objectives.
+
+        thetas: (n, 4), objectives: names from objective_names
+        returns (n, len(objectives))
+        """
+        foms = self.evaluate_foms(thetas)
+        names = [self._objective_name(o) for o in objectives]
+        return np.stack([foms[name] for name in names], axis=1)
+
+    # ------------- dense landscape scans ---------------
+    def scan(
+        self,
+        axes: Dict[str, Sequence[Any]],
+        fixed: Optional[Dict[str, Any]] = None,
+        objectives: Sequence[str] = ("TSF",),
+        per_soi: bool = False,
+        out_dir: Optional[str | os.PathLike] = None,
+        chunk_size: Optional[int] = None,
+        max_bytes: float = 256e6,
+    ) -> Dict[str, np.ndarray]:
+        """
+        Objectives on the Cartesian grid of `axes`, e.g.
+        scan({"d_mrl": d, "d_cap": c}, fixed={"x_coti": 0.7, "cap": "Au"}).
+
+        axes: param name -> 1d values (cap values are cap names), the grid
+            has shape tuple(len(v) for v in axes.values()), first axis slowest
+        fixed: values of the params not in axes
+        objectives: names from objective_names, one map each
+        per_soi: also SFM_up, SFM_dn and MCF per SOI as "<fom>:soi" maps
+            of shape grid + (n_soi,)
+        out_dir: write every map to <out_dir>/<name>.npy (":" -> "_") through
+            np.memmap and the axes to scan.json, instead of keeping them in RAM
+        chunk_size: grid points per evaluate_foms call, default chosen so the
+            reflectivity work arrays stay below about max_bytes
+
+        returns name -> map (np.memmap when out_dir is given)
+        """
+        fixed = dict(fixed or {})
+        names = self.search_space.names
+        missing = set(names) - set(axes) - set(fixed)
+        if missing or set(axes) & set(fixed) or set(axes) - set(names):
+            raise ValueError(f"every param of {names} needs exactly one of axes / fixed")
+
+        # packed value lists per param, cap names -> cap index
+        def packed(name: str, values: Sequence[Any]) -> np.ndarray:
+            if name == "cap":
+                return np.array([self.cap_choices.index(c) for c in values], dtype=float)
+            return np.asarray(values, dtype=float).ravel()
+
+        grid_axes = [packed(name, v) for name, v in axes.items()]
+        shape = tuple(len(a) for a in grid_axes)
+        n_total = int(np.prod(shape, dtype=np.int64))
+        columns = [list(axes).index(name) if name in axes else None for name in names]
+        base = np.array([0.0 if name in axes else packed(name, [fixed[name]])[0] for name in names])
+
+        out_names = [self._objective_name(o) for o in objectives]
+        maps: Dict[str, Tuple[str, Tuple[int, ...]]] = {name: (name, shape) for name in out_names}
+        n_soi = len(self.soi_list)
+        if per_soi:
+            for fom in ("SFM_up", "SFM_dn", "MCF"):
+                maps[f"{fom}:soi"] = (fom, shape + (n_soi,))
+
+        if out_dir is not None:
+            os.makedirs(out_dir, exist_ok=True)
+        out: Dict[str, np.ndarray] = {}
+        for key, (_, map_shape) in maps.items():
+            if out_dir is None:
+                out[key] = np.empty(map_shape)
+            else:
+                path = os.path.join(out_dir, key.replace(":", "_") + ".npy")
+                out[key] = np.lib.format.open_memmap(path, mode="w+", dtype=np.float64, shape=map_shape)
+        if out_dir is not None:
+            with open(os.path.join(out_dir, "scan.json"), "w", encoding="utf-8") as f:
+                json.dump({
+                    "axes": {k: list(v) if k == "cap" else np.asarray(v, dtype=float).tolist() for k, v in axes.items()},
+                    "fixed": fixed,
+                    "soi": [soi.name for soi in self.soi_list],
+                    "maps": {key: key.replace(":", "_") + ".npy" for key in maps},
+                }, f, indent=2)
+
+        if chunk_size is None:
+            # S and R per spin and SOI plus the shared Parratt state, complex128
+            per_point = 16 * self.Q.size * (4 * n_soi + 8)
+            chunk_size = max(1, int(max_bytes // per_point))
+
+        flat = {key: arr.reshape(n_total, *arr.shape[len(shape):]) for key, arr in out.items()}
+        for start in range(0, n_total, chunk_size):
+            stop = min(start + chunk_size, n_total)
+            idx = np.unravel_index(np.arange(start, stop), shape)
+            thetas = np.tile(base, (stop - start, 1))
+            for col, c in enumerate(columns):
+                if c is not None:
+                    thetas[:, col] = grid_axes[c][idx[c]]
+
+            foms = self.evaluate_foms(thetas)
+            for key, (fom, _) in maps.items():
+                if key.endswith(":soi"):
+                    flat[key][start:stop] = np.stack([foms[f"{fom}:{soi.name}"] for soi in self.soi_list], axis=1)
+                else:
+                    flat[key][start:stop] = foms[fom]
+
+        for arr in out.values():
+            if isinstance(arr, np.memmap):
+                arr.flush()
+        return out
+
+    def evaluate_gradient(
+        self,
+        x_coti: float,
+        d_mrl: float,
+        d_cap: float,
+        cap: str,
+        eps: float = 1e-12,
+    ) -> Tuple[float, np.ndarray]:
+        """
+        TSF and its gradient dTSF/d(x_coti, d_mrl, d_cap), analytic instead of
+        2-4 extra evaluations per finite-difference gradient. Usable as a
+        jac=True objective for scipy.optimize.minimize (negated, TSF is maximized).
+
+        Like the forward pass the substrate -> MRL -> cap part is differentiated
+        once per spin and only the SOI/air interfaces on top are done per SOI.
+
+        eps: smoothing of |.| in SFM, MCF and TSF (0 = sub-gradient sign(.))
+        The gradient is the one of the unclipped objective at the clipped point.
+        """
+        if cap not in self.materials.caps:
+            raise ValueError(f"unknown cap mateiral")
+        x_coti, d_mrl, d_cap = self._clip_design(x_coti, d_mrl, d_cap)
+        Q, t, w = self.Q, self._tables, self._tables.w
+        mrl = self.materials.mrl
+        top = None if self._cap_layer(cap, d_cap) is None else cap
+        zero = np.zeros((3, Q.size))
+
+        # MRL SLD per spin and d rho / d x_coti
+        rho_n, rho_m = self._mrl_rho(x_coti)
+        m_model = mrl.m_sld_from_x
+        if hasattr(m_model, "derivative"):
+            dm_dx = float(m_model.derivative(x_coti))
+        else:
+            h = 1e-6
+            dm_dx = (float(m_model(x_coti + h)) - float(m_model(x_coti - h))) / (2.0 * h)
+        dn_dx = mrl.rho_n_Co - mrl.rho_n_Ti
+
+        R, dR = {}, {}
+        for spin, sign in (("up", 1.0), ("dn", -1.0)):
+            drho_dx = (dn_dx + sign * dm_dx) * self.SLD_SCALE
+
+            # tangents w.r.t. (x_coti, d_mrl, d_cap) along the leading axis
+            def d_rho(a):  # d(.)/d rho_mrl -> (3, nQ)
+                return np.stack([a * drho_dx, zero[0], zero[0]])
+
+            # substrate | MRL: Gamma below the MRL is its Fresnel coefficient
+            k_m = _kz(Q, rho_n + sign * rho_m)
+            r_ms, dr_ms, _, _ = _fresnel_grad(k_m, t.k_sub, float(mrl.sigma_sub_mrl))
+            P_m = np.exp(2j * k_m * d_mrl)
+            dP_m = np.stack([2j * d_mrl * (-2.0 * np.pi / k_m) * P_m * drho_dx, 2j * k_m * P_m, zero[0]])
+            u = r_ms * P_m
+            du = d_rho(dr_ms) * P_m + r_ms * dP_m
+            k_below = k_m
+
+            if top is not None:
+                # cap | MRL, then the cap phase
+                cap_spec = self.materials.caps[top]
+                r_cm, _, dr_cm, _ = _fresnel_grad(t.k_cap[top], k_m, float(cap_spec.sigma))
+                G_c, dG_c = _parratt_step_grad(u, du, r_cm, d_rho(dr_cm))
+                P_c = np.exp(2j * t.k_cap[top] * d_cap)
+                u = G_c * P_c
+                du = dG_c * P_c + G_c * np.stack([zero[0], zero[0], 2j * t.k_cap[top] * P_c])
+
+            # bare stack: air on top
+            if top is None:
+                r, _, dr, _ = _fresnel_grad(t.k_air, k_below, 0.0)
+                amps = [_parratt_step_grad(u, du, r, d_rho(dr))]
+            else:
+                amps = [_parratt_step_grad(u, du, t.r_air_cap[top], zero)]
+
+            # one SOI (sigma on SOI => roughness at SOI | top) and air per SOI
+            for i, soi in enumerate(self.soi_list):
+                if top is None:
+                    r, _, dr, _ = _fresnel_grad(t.k_soi[i], k_below, float(soi.sigma))
+                    G_s, dG_s = _parratt_step_grad(u, du, r, d_rho(dr))
+                else:
+                    G_s, dG_s = _parratt_step_grad(u, du, t.r_soi_cap[(i, top)], zero)
+                amps.append(_parratt_step_grad(G_s * t.phase_soi[i], dG_s * t.phase_soi[i], t.r_air_soi[i], zero))
+
+            G = np.stack([a[0] for a in amps])    # (1 + n_soi, nQ)
+            dG = np.stack([a[1] for a in amps])   # (1 + n_soi, 3, nQ)
+            R[spin] = np.abs(G)**2 + 1e-3
+            dR[spin] = 2.0 * np.real(np.conj(G)[:, None, :] * dG)
+
+        S, dS, SFM, dSFM = {}, {}, {}, {}
+        for spin in ("up", "dn"):
+            Rsub, Rfull = R[spin][0], R[spin][1:]
+            dS_dRsub, dS_dRfull = sensitivity_grad(Q, Rsub, Rfull)
+            S[spin] = sensitivity(Q, Rsub, Rfull)                                          # (n_soi, nQ)
+            dS[spin] = dS_dRsub[:, None] * dR[spin][0] + dS_dRfull[:, None] * dR[spin][1:]  # (n_soi, 3, nQ)
+            SFM[spin] = sfm(Q, S[spin], w=w)
+            dSFM[spin] = np.einsum("iq,ipq->ip", sfm_grad(Q, S[spin], w=w, eps=eps), dS[spin])
+
+        MCF = mcf(Q, S["up"], S["dn"], w=w)
+        dmcf_up, dmcf_dn = mcf_grad(Q, S["up"], S["dn"], w=w, eps=eps)
+        dMCF = np.einsum("iq,ipq->ip", dmcf_up, dS["up"]) + np.einsum("iq,ipq->ip", dmcf_dn, dS["dn"])
+
+        triplets = list(zip(SFM["up"], SFM["dn"], MCF))
+        grad = np.zeros(3)
+        for i, (g_up, g_dn, g_mcf) in enumerate(tsf_grad(triplets, eps=eps)):
+            grad += g_up * dSFM["up"][i] + g_dn * dSFM["dn"][i] + g_mcf * dMCF[i]
+        return float(tsf(triplets)), grad
 
     def analyze_single_soi(
         self,
@@ -262,48 +585,38 @@ class Base1OptimizationProblem(OptimizationProblemProtocol):
         """Convert SLD given in 10^-6 Å^-2 into Å^-2 (what Parratt expects)."""
         return float(rho_in_1e6) * self.SLD_SCALE
 
-    def _air(self) -> Dict[str, float]:
-        return {"rho": 0.0, "thickness": 0.0, "sigma": 0.0}
+    def _mrl_rho(self, x_coti: float) -> Tuple[float, float]:
+        """ nuclear and magnetic SLD of the MRL in Å^-2 """
+        mrl = self.materials.mrl
+        # --- build MRL SLDs (inputs are in 10^-6 Å^-2, convert with _rho) ---
+        rho_n_mrl_1e6 = x_coti * mrl.rho_n_Co + (1.0 - x_coti) * mrl.rho_n_Ti
+        rho_m_mrl_1e6 = float(mrl.m_sld_from_x(x_coti))  # must be in same 10^-6 units
+        return self._rho(rho_n_mrl_1e6), self._rho(rho_m_mrl_1e6)
 
-    def _maybe_add_cap(
-        self,
-        up_stack: List[Dict[str, float]],
-        dn_stack: List[Dict[str, float]],
-        cap: str,
-        d_cap: float,
-    ) -> None:
+    def _cap_layer(self, cap: str, d_cap: float) -> Optional[Tuple[float, float, float]]:
+        """ (rho, thickness, sigma) of the cap, or None when there is no cap """
         if cap == "none" or d_cap <= 0.0:
-            return
+            return None
 
         cap_spec = self.materials.caps[cap]
 
         # sigma on the cap layer => roughness at (cap | next layer below) = (cap | MRL)
-        up_stack.append({
-            "rho": self._rho(cap_spec.rho_n),
-            "thickness": float(d_cap),
-            "sigma": float(cap_spec.sigma),
-        })
-        dn_stack.append({
-            "rho": self._rho(cap_spec.rho_n),
-            "thickness": float(d_cap),
-            "sigma": float(cap_spec.sigma),
-        })
-
-    def layers_no_mrl(self, soi: Optional[SOISpec]) -> List[Dict[str, float]]:
+        return (self._rho(cap_spec.rho_n), float(d_cap), float(cap_spec.sigma))
+
+    def layers_no_mrl(self, soi: Optional[SOISpec]) -> LayerStack:
         sub = self.materials.substrate
-        stack: List[Dict[str, float]] = [self._air()]
-        if soi is not None:
-            stack.append({
-                "rho": self._rho(soi.rho_n),
-                "thickness": float(soi.thickness),
-                "sigma": float(soi.sigma),  # (SOI | substrate) here
-            })
-        stack.append({
-            "rho": self._rho(sub.rho_n),
-            "thickness": 0.0,
-            "sigma": 0.0,  # substrate sigma is not used by your Parratt loop anyway
-        })
-        return stack
+        if soi is None:
+            return LayerStack(
+                [0.0, self._rho(sub.rho_n)],
+                [0.0, 0.0],
+                [0.0, 0.0],
+            )
+        # sigma on SOI => (SOI | substrate); substrate sigma is not used by the Parratt loop
+        return LayerStack(
+            [0.0, self._rho(soi.rho_n), self._rho(sub.rho_n)],
+            [0.0, float(soi.thickness), 0.0],
+            [0.0, float(soi.sigma), 0.0],
+        )
 
     def layers_with_mrl(
         self,
@@ -312,62 +625,45 @@ class Base1OptimizationProblem(OptimizationProblemProtocol):
         d_cap: float,
         cap: str,
         soi: Optional[SOISpec] = None,
-    ) -> Tuple[List[Dict[str, float]], List[Dict[str, float]]]:
+    ) -> Tuple[LayerStack, LayerStack]:
 
         sub = self.materials.substrate
         mrl = self.materials.mrl
 
-        # --- build MRL SLDs (inputs are in 10^-6 Å^-2, convert with _rho) ---
-        rho_n_mrl_1e6 = x_coti * mrl.rho_n_Co + (1.0 - x_coti) * mrl.rho_n_Ti
-        rho_m_mrl_1e6 = float(mrl.m_sld_from_x(x_coti))  # must be in same 10^-6 units
-
-        rho_n_mrl = self._rho(rho_n_mrl_1e6)
-        rho_m_mrl = self._rho(rho_m_mrl_1e6)
+        rho_n_mrl, rho_m_mrl = self._mrl_rho(x_coti)
 
-        rho_up_mrl = rho_n_mrl + rho_m_mrl
-        rho_dn_mrl = rho_n_mrl - rho_m_mrl
-
-        up_stack: List[Dict[str, float]] = [self._air()]
-        dn_stack: List[Dict[str, float]] = [self._air()]
+        # layers from the top: air, [SOI], [cap], MRL, substrate
+        rho = [0.0]
+        thickness = [0.0]
+        sigma = [0.0]
 
         if soi is not None:
             # sigma on SOI => roughness at (SOI | next layer below) = (SOI | cap) or (SOI | MRL)
-            up_stack.append({
-                "rho": self._rho(soi.rho_n),
-                "thickness": float(soi.thickness),
-                "sigma": float(soi.sigma),
-            })
-            dn_stack.append({
-                "rho": self._rho(soi.rho_n),
-                "thickness": float(soi.thickness),
-                "sigma": float(soi.sigma),
-            })
-
-        self._maybe_add_cap(up_stack, dn_stack, cap=cap, d_cap=d_cap)
+            rho.append(self._rho(soi.rho_n))
+            thickness.append(float(soi.thickness))
+            sigma.append(float(soi.sigma))
+
+        cap_layer = self._cap_layer(cap=cap, d_cap=d_cap)
+        if cap_layer is not None:
+            rho.append(cap_layer[0])
+            thickness.append(cap_layer[1])
+            sigma.append(cap_layer[2])
 
         # MRL: sigma on MRL => roughness at (MRL | substrate)
-        up_stack.append({
-            "rho": float(rho_up_mrl),
-            "thickness": float(d_mrl),
-            "sigma": float(mrl.sigma_sub_mrl),
-        })
-        dn_stack.append({
-            "rho": float(rho_dn_mrl),
-            "thickness": float(d_mrl),
-            "sigma": float(mrl.sigma_sub_mrl),
-        })
+        i_mrl = len(rho)
+        rho.append(rho_n_mrl)
+        thickness.append(float(d_mrl))
+        sigma.append(float(mrl.sigma_sub_mrl))
 
         # substrate (semi-infinite)
-        up_stack.append({
-            "rho": self._rho(sub.rho_n),
-            "thickness": 0.0,
-            "sigma": 0.0,
-        })
-        dn_stack.append({
-            "rho": self._rho(sub.rho_n),
-            "thickness": 0.0,
-            "sigma": 0.0,
-        })
+        rho.append(self._rho(sub.rho_n))
+        thickness.append(0.0)
+        sigma.append(0.0)
+
+        up_stack = LayerStack(rho, thickness, sigma)
+        dn_stack = LayerStack(up_stack.rho.copy(), thickness, sigma)
+        up_stack.rho[i_mrl] = rho_n_mrl + rho_m_mrl
+        dn_stack.rho[i_mrl] = rho_n_mrl - rho_m_mrl
 
         return up_stack, dn_stack
 
@@ -378,12 +674,186 @@ class Base1OptimizationProblem(OptimizationProblemProtocol):
         d_cap: float,
         cap: str,
         soi: Optional[SOISpec] = None,
-    ) -> Tuple[List[Dict[str, float]], List[Dict[str, float]]]:
+    ) -> Tuple[LayerStack, LayerStack]:
+        x_coti, d_mrl, d_cap = self._clip_design(x_coti, d_mrl, d_cap)
+        return self.layers_with_mrl(x_coti, d_mrl, d_cap, cap, soi=soi)
+
+    def _clip_design(self, x_coti: float, d_mrl: float, d_cap: float) -> Tuple[float, float, float]:
         # optional safety clip (doesn't hurt optimization)
         x_coti = float(np.clip(x_coti, self.bounds_x.lo, self.bounds_x.hi))
         d_mrl  = float(np.clip(d_mrl,  self.bounds_d.lo, self.bounds_d.hi))
         d_cap  = float(np.clip(d_cap,  self.bounds_cap.lo, self.bounds_cap.hi))
-        return self.layers_with_mrl(x_coti, d_mrl, d_cap, cap, soi=soi)
+        return x_coti, d_mrl, d_cap
 
     def _reflect(self, Q, layers, bkg: float = 1e-3) -> np.ndarray:
-        return reflectivity(Q, layers, bkg=bkg)
\ No newline at end of file
+        return reflectivity(Q, layers, bkg=bkg)
+
+    # ------------- fixed-material tables ---------------
+    def rebuild_tables(self) -> None:
+        """
+        (Re)build the FixedTables cache on self.Q. Call again after changing
+        materials, soi_list, Q or weight_fn on an existing problem.
+        """
+        Q = self.Q
+        k_air = _kz(Q, 0.0)
+        k_sub = _kz(Q, self._rho(self.materials.substrate.rho_n))
+        k_cap = {name: _kz(Q, self._rho(c.rho_n)) for name, c in self.materials.caps.items()}
+        k_soi = [_kz(Q, self._rho(soi.rho_n)) for soi in self.soi_list]
+
+        r_soi_cap = {
+            (i, name): _fresnel(k_soi[i], k_cap[name], float(soi.sigma))
+            for i, soi in enumerate(self.soi_list) for name in k_cap
+        }
+        self._tables = FixedTables(
+            k_air=k_air,
+            k_sub=k_sub,
+            k_cap=k_cap,
+            k_soi=k_soi,
+            r_air_cap={name: _fresnel(k_air, k, 0.0) for name, k in k_cap.items()},
+            r_air_soi=[_fresnel(k_air, k, 0.0) for k in k_soi],
+            r_soi_cap=r_soi_cap,
+            phase_soi=[np.exp(2j * k * float(soi.thickness)) for k, soi in zip(k_soi, self.soi_list)],
+            w=None if self.weight_fn is None else self.weight_fn(Q),
+        )
+
+    def warmup(self) -> None:
+        """
+        Touch the fixed tables and the MRL model once, e.g. in a fresh worker
+        process right after unpickling, so the first batch does not pay for it.
+        """
+        t = self._tables
+        for arrays in (t.k_cap, t.r_air_cap, t.r_soi_cap):
+            for a in arrays.values():
+                a.sum()
+        for a in (t.k_air, t.k_sub, *t.k_soi, *t.r_air_soi, *t.phase_soi):
+            a.sum()
+        self._m_sld(np.array([self.bounds_x.lo]))
+
+    # ------------- shared (SOI independent) part of the recursion ---------------
+    def _soi_foms(
+        self,
+        x_coti: np.ndarray,
+        d_mrl: np.ndarray,
+        d_cap: np.ndarray,
+        cap_idx: np.ndarray,
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Vectorized core of the objective.
+
+        x_coti, d_mrl, d_cap, cap_idx: (n,) arrays (cap_idx indexes cap_choices)
+        returns SFM_up, SFM_dn, MCF, each (n, n_soi)
+        """
+        x_coti = np.clip(x_coti, self.bounds_x.lo, self.bounds_x.hi)
+        d_mrl = np.clip(d_mrl, self.bounds_d.lo, self.bounds_d.hi)
+        d_cap = np.clip(d_cap, self.bounds_cap.lo, self.bounds_cap.hi)
+
+        n, n_soi = x_coti.shape[0], len(self.soi_list)
+        SFM_up = np.empty((n, n_soi))
+        SFM_dn = np.empty((n, n_soi))
+        MCF = np.empty((n, n_soi))
+        w = self._tables.w
+
+        # one group per cap on top of the stack (None: no cap layer)
+        caps = self.cap_choices
+        groups: Dict[Optional[str], np.ndarray] = {}
+        with TIMINGS.phase("stack"):
+            for c in np.unique(cap_idx):
+                rows = np.flatnonzero(cap_idx == c)
+                if caps[c] == "none":
+                    groups.setdefault(None, []).append(rows)
+                    continue
+                has_cap = d_cap[rows] > 0.0
+                groups.setdefault(caps[c], []).append(rows[has_cap])
+                groups.setdefault(None, []).append(rows[~has_cap])
+
+        for top, rows in groups.items():
+            rows = np.concatenate(rows)
+            if rows.size == 0:
+                continue
+
+            # substrate -> MRL -> cap is the same for every SOI: do it once per spin
+            state_up, state_dn = self._partial_states(x_coti[rows], d_mrl[rows], d_cap[rows], top)
+            with TIMINGS.phase("parratt_up"):
+                Rsub_up = self._reflect_bare(state_up, top)
+            with TIMINGS.phase("parratt_dn"):
+                Rsub_dn = self._reflect_bare(state_dn, top)
+
+            S_up = np.empty((n_soi, rows.size, self.Q.size))
+            S_dn = np.empty((n_soi, rows.size, self.Q.size))
+            for i in range(n_soi):
+                # the SOI is the top layer: one more interface on the shared part
+                with TIMINGS.phase("parratt_up"):
+                    Rfull_up = self._reflect_soi(state_up, top, i)
+                with TIMINGS.phase("parratt_dn"):
+                    Rfull_dn = self._reflect_soi(state_dn, top, i)
+
+                # sensitivities S(Q)
+                with TIMINGS.phase("sensitivity"):
+                    S_up[i] = sensitivity(self.Q, Rsub_up, Rfull_up)
+                    S_dn[i] = sensitivity(self.Q, Rsub_dn, Rfull_dn)
+
+            # FOMs for all SOIs at once, (n_soi, rows) -> (rows, n_soi)
+            with TIMINGS.phase("fom"):
+                SFM_up[rows] = sfm(self.Q, S_up, w=w).T
+                SFM_dn[rows] = sfm(self.Q, S_dn, w=w).T
+                MCF[rows] = mcf(self.Q, S_up, S_dn, w=w).T
+
+        return SFM_up, SFM_dn, MCF
+
+    def _m_sld(self, x_coti: np.ndarray) -> np.ndarray:
+        """ m_sld_from_x over an array, falling back to a loop for scalar-only callables """
+        m_sld_from_x = self.materials.mrl.m_sld_from_x
+        try:
+            rho_m = np.asarray(m_sld_from_x(x_coti), dtype=float)
+        except (TypeError, ValueError):
+            rho_m = None
+        if rho_m is None or rho_m.shape != x_coti.shape:
+            rho_m = np.array([float(m_sld_from_x(float(x))) for x in x_coti])
+        return rho_m
+
+    def _partial_states(
+        self,
+        x_coti: np.ndarray,
+        d_mrl: np.ndarray,
+        d_cap: np.ndarray,
+        cap: Optional[str],
+    ) -> Tuple[ParrattState, ParrattState]:
+        """
+        Parratt state at the top of substrate -> MRL -> cap, per spin, with
+        Gamma of shape (n, nQ). cap=None builds the stack without a cap.
+        """
+        t = self._tables
+        mrl = self.materials.mrl
+
+        # --- MRL SLDs (inputs are in 10^-6 Å^-2) ---
+        with TIMINGS.phase("stack"):
+            rho_n_mrl = (x_coti * mrl.rho_n_Co + (1.0 - x_coti) * mrl.rho_n_Ti) * self.SLD_SCALE
+            rho_m_mrl = self._m_sld(x_coti) * self.SLD_SCALE
+
+        states = []
+        for spin, rho_mrl in (("up", rho_n_mrl + rho_m_mrl), ("dn", rho_n_mrl - rho_m_mrl)):
+            with TIMINGS.phase(f"parratt_{spin}"):
+                state = ParrattState(self.Q, np.zeros((x_coti.shape[0], self.Q.size), dtype=np.complex128), t.k_sub, 0.0)
+                # MRL: sigma on MRL => roughness at (MRL | substrate)
+                state = parratt_extend(state, rho_mrl[:, None], d_mrl[:, None], float(mrl.sigma_sub_mrl))
+                if cap is not None:
+                    # sigma on the cap layer => roughness at (cap | MRL)
+                    cap_spec = self.materials.caps[cap]
+                    state = parratt_extend(state, self._rho(cap_spec.rho_n), d_cap[:, None], float(cap_spec.sigma),
+                                           k=t.k_cap[cap])
+            states.append(state)
+        return states[0], states[1]
+
+    def _reflect_bare(self, state: ParrattState, top: Optional[str], bkg: float = 1e-3) -> np.ndarray:
+        t = self._tables
+        r = None if top is None else t.r_air_cap[top]
+        return np.abs(parratt_finish(state, k=t.k_air, r=r))**2 + float(bkg)
+
+    def _reflect_soi(self, state: ParrattState, top: Optional[str], i: int, bkg: float = 1e-3) -> np.ndarray:
+        t = self._tables
+        soi = self.soi_list[i]
+        r = None if top is None else t.r_soi_cap[(i, top)]
+        # sigma on SOI => roughness at (SOI | cap) or (SOI | MRL)
+        state = parratt_extend(state, self._rho(soi.rho_n), float(soi.thickness), float(soi.sigma),
+                               k=t.k_soi[i], r=r)
+        return np.abs(parratt_finish(state, k=t.k_air, r=t.r_air_soi[i], phase=t.phase_soi[i]))**2 + float(bkg)
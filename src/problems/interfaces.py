@@ -1,4 +1,5 @@
 from typing import Protocol, runtime_checkable, Dict, Any
+import numpy as np
 from solvers.search_space import SearchSpace 
 
 
@@ -21,4 +22,17 @@ class OptimizationProblemProtocol(Protocol):
         return_breakdown: bool = False,
         **kwargs: Any,
     ) -> float | Dict[str, Any]:
-        ...
\ No newline at end of file
+        ...
+
+    def evaluate_batch(self, thetas: np.ndarray) -> np.ndarray:
+        """
+        Objective for many packed design vectors, thetas: (n, d) -> (n,)
+
+        Default loops over evaluate_objective, problems override it with a
+        vectorized version.
+        """
+        space = self.search_space
+        return np.array([
+            float(self.evaluate_objective(**x))
+            for x in space.unpack_batch(np.atleast_2d(thetas))
+        ])
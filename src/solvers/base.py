@@ -3,8 +3,13 @@ from typing import Any, Dict, List, Tuple, Optional, Sequence, Protocol
 from abc import ABC, abstractmethod
 import numpy as np 
 import json
+import sys
 from problems.interfaces import OptimizationProblemProtocol
 from solvers.search_space import SearchSpace
+from solvers.evaluator import Evaluator
+from solvers.history import RunHistory, space_from_spec, space_spec
+from solvers.callback import Callback, CheckpointCallback
+from solvers.timing import TIMINGS
 
 
 """
@@ -20,6 +25,9 @@ class OptimizationProblemProtocol(Protocol):
     def evaluate_objective(self, *args, **kwargs) -> float: 
         pass 
 
+    def evaluate_batch(self, thetas: np.ndarray) -> np.ndarray: 
+        pass 
+
     @property 
     def search_space(self): 
         pass 
@@ -29,10 +37,15 @@ class OptimizationProblemProtocol(Protocol):
 
 @dataclass 
 class RunResults: 
-    """ Final outcome """
+    """ 
+    Final outcome 
+
+    history is a columnar RunHistory for Solver.run (indexing it gives the 
+    {"theta", "x", "y"} dicts), a plain list of dicts is accepted too. 
+    """
     x_best: dict[str: any]
     y_best: float | tuple[float] # single or multi obj
-    history: List[Dict[str, Any]] = field(default_factory=list)
+    history: RunHistory | List[Dict[str, Any]] = field(default_factory=list)
     n_evals: int = 0 
     meta: Dict[str, Any] = field(default_factory=list)
 
@@ -59,26 +72,65 @@ class RunResults:
         return obj
 
     def to_dict(self) -> Dict[str, Any]:
-        return self._to_json_safe({
+        out = self._to_json_safe({
             "x_best": self.x_best,
             "y_best": self.y_best,
-            "history": self.history,
             "n_evals": self.n_evals,
             "meta": self.meta,
         })
+        if isinstance(self.history, RunHistory): 
+            # columnar, tolist() per column instead of a walk over every entry
+            out["history"] = self.history.to_dict()
+        else: 
+            out["history"] = self._to_json_safe(self.history)
+        return out
 
     def to_json(self, path: str, indent: int = 2) -> None:
         with open(path, "w", encoding="utf-8") as f:
             json.dump(self.to_dict(), f, indent=indent)
 
+    def save(self, path: str) -> None: 
+        """ 
+        Binary save (.npz): history columns as arrays, the rest as JSON. 
+        Needs a RunHistory history. 
+        """
+        if not isinstance(self.history, RunHistory): 
+            raise TypeError("save() needs a RunHistory history, use to_json for lists of dicts")
+        info = self._to_json_safe({
+            "x_best": self.x_best,
+            "y_best": self.y_best,
+            "n_evals": self.n_evals,
+            "meta": self.meta,
+            "space": space_spec(self.history.space),
+        })
+        np.savez(path, info=np.array(json.dumps(info)), **self.history.arrays())
+
+    @classmethod
+    def load(cls, path: str) -> "RunResults": 
+        """ inverse of save() """
+        with np.load(path, allow_pickle=False) as data: 
+            info = json.loads(str(data["info"]))
+            history = RunHistory.from_arrays(space_from_spec(info["space"]), data["theta"], data["y"])
+        return cls(
+            x_best=info["x_best"], 
+            y_best=info["y_best"], 
+            history=history, 
+            n_evals=info["n_evals"], 
+            meta=info["meta"], 
+        )
+
     def summary(self, max_history: int = 3) -> str:
         lines: list[str] = []
         lines.append("=== RunResults ===")
         lines.append(f"n_evals : {self.n_evals}")
         lines.append(f"y_best  : {self.y_best}")
-        lines.append("x_best  :")
-        for k, v in self.x_best.items():
-            lines.append(f"  {k:10s} = {v}")
+        if isinstance(self.x_best, list):
+            # multi objective: x_best is the Pareto front
+            lines.append(f"x_best  : {len(self.x_best)} Pareto points")
+        else:
+            lines.append("x_best  :")
+            for k, v in self.x_best.items():
+                lines.append(f"  {k:10s} = {v}")
 
         lines.append(f"history : {len(self.history)} entries")
         if self.history:
@@ -113,10 +165,18 @@ class Solver:
     """
     def __init__(self, 
                  problem: OptimizationProblemProtocol, 
-                 maximize: bool = True,) -> None: 
+                 maximize: bool = True,
+                 batch_size: int = 1,
+                 seed: Optional[int] = None,) -> None: 
         self.problem = problem
         self.space: SearchSpace = problem.search_space
         self.maximize = maximize
+        # solvers draw from self.rng only, run() re-seeds it so runs are reproducible
+        self.seed = seed
+        self.rng = np.random.default_rng(seed)
+        # points per ask() in run(), population solvers use their population size
+        self.batch_size = int(batch_size)
+        self.evaluator: Optional[Evaluator] = None
 
         self._X: List[Dict[str, Any]] = []
         self._Y: List[Any] = []
@@ -166,6 +226,14 @@ class Solver:
         ...
 
     # --------- helpers --------------
+    def _after_resume(self) -> None: 
+        """ called once the state was restored from a checkpoint, e.g. to restart clocks """
+        pass
+
+    def _next_batch_size(self) -> int: 
+        """ points run() asks for next (before the eval budget cap) """
+        return self.batch_size
+
     def best(self) ->Tuple[Dict[str, Any], Any]: 
         return self._x_best, self._y_best
     
@@ -189,51 +257,195 @@ class Solver:
                 self._x_best = dict(x_dict)
                 self._y_best = value
 
+    def _minimized(self, values: np.ndarray) -> np.ndarray: 
+        """ values as a cost to minimize """
+        return -values if self.maximize else values
+
+    def _evaluate(self, thetas: np.ndarray) -> np.ndarray: 
+        """
+        Evaluate a (n, d) batch of clipped packed points. Goes through
+        self.evaluator when one is set, else uses the problem's vectorized
+        evaluate_batch when it has one.
+        """
+        if self.evaluator is not None: 
+            return np.asarray(self.evaluator(thetas))
+        evaluate_batch = getattr(self.problem, "evaluate_batch", None)
+        if evaluate_batch is not None: 
+            return np.asarray(evaluate_batch(thetas))
+        return np.array([self.problem.evaluate_objective(**x) for x in self.space.unpack_batch(thetas)])
+
     # -------- defalt run 
 
-    def run(self, evals: int) -> RunResults: 
+    def run(self, 
+            evals: Optional[int], 
+            evaluator: Optional[Evaluator] = None, 
+            history_path: Optional[str] = None,
+            checkpoint: Optional[CheckpointCallback] = None,
+            callbacks: Sequence[Callback] = (),
+            ) -> RunResults: 
         """
         Docstring for run
         
         :param self: Description
-        :param evals: Description
-        :type evals: int
+        :param evals: evaluation budget, None for no limit (then a callback such as 
+            EarlyStoppingCallback(max_time=...) or the solver itself has to end the run)
+        :type evals: int | None
+        :param evaluator: backend for the batches (solvers.evaluator), default serial
+        :type evaluator: Evaluator | None
+        :param history_path: also stream the history to this file (see RunHistory)
+        :type history_path: str | None
+        :param checkpoint: periodic checkpoints, resumes from its last one when it has one 
+            (the history then streams to the checkpoint directory, history_path is ignored)
+        :type checkpoint: CheckpointCallback | None
+        :param callbacks: called on start, after every batch and at the end (solvers.callback), 
+            a truthy on_step return stops the run (e.g. EarlyStoppingCallback) 
+        :type callbacks: Sequence[Callback]
         :return: Description
         :rtype: RunResults
         
         Simple eval loop. More sophisticated solver can override this
+        Points are asked for in batches of self.batch_size and evaluated together.
         """
-        self.reset()
-        history: List[Dict[str, Any]] = []
-        n_evals = 0 
+        self.evaluator = evaluator
+        if checkpoint is not None and checkpoint.exists(): 
+            n_evals, n_rows = checkpoint.load(self)
+            history = RunHistory.resume_stream(self.space, checkpoint.history_path, n_rows)
+        else: 
+            self.rng = np.random.default_rng(self.seed)
+            self.reset()
+            n_evals = 0 
+            if checkpoint is not None: 
+                history_path = checkpoint.history_path
+            history = RunHistory(self.space, path=history_path)
+        # the checkpoint goes last so it sees the other callbacks' step done
+        callbacks = list(callbacks) + ([checkpoint] if checkpoint is not None else [])
+        for cb in callbacks: 
+            cb.on_start(self, history, n_evals)
         
+        if evals is None: 
+            evals = np.iinfo(np.int64).max
+        # eval limits of callbacks (EarlyStoppingCallback.max_evals) trim the last batch like evals does
+        limits = [cb.max_evals for cb in callbacks if getattr(cb, "max_evals", None) is not None]
+        evals = min([evals] + limits)
         while n_evals < evals: 
-            thetas = self.ask(1)
-            theta = thetas[0]
-
-            # clip + unpack -> dict
-
-            theta = self.space.clip(theta)
-            x_dict = self.space.unpack(theta)
-
-            y = self.problem.evaluate_objective(**x_dict)
-
-            self.tell([theta], [y])
-            n_evals += 1 
-
-            history.append(
-                {
-                    "theta": theta.copy(), 
-                    "x": dict(x_dict), 
-                    "y": y,
-                }
-            )
+            with TIMINGS.phase("solver.ask"): 
+                thetas = self.ask(int(min(self._next_batch_size(), evals - n_evals)))
+            if len(thetas) == 0: 
+                break
+
+            # clip -> evaluate the whole batch
+            batch = self.space.clip_batch(np.asarray(thetas, dtype=float))
+            thetas = list(batch)
+            with TIMINGS.phase("evaluate"): 
+                ys = self._evaluate(batch)
+
+            with TIMINGS.phase("solver.tell"): 
+                self.tell(thetas, ys)
+            n_evals += len(thetas)
+            with TIMINGS.phase("history"): 
+                history.append(batch, ys)
+            stop = False
+            for cb in callbacks: 
+                stop = bool(cb.on_step(self, history, n_evals)) or stop
+            if stop: 
+                break
+        for cb in callbacks: 
+            cb.on_end(self, history, n_evals)
+        history.close()
         x_best, y_best = self.best()
+        meta = {"problem_name": self.problem.name, "Maximize": self.maximize}
+        reasons = [cb.reason for cb in callbacks if getattr(cb, "reason", None)]
+        if reasons: 
+            meta["stopped_by"] = reasons[0]
 
         return RunResults(
             x_best= x_best, 
             y_best = y_best, 
             history=history, 
             n_evals=n_evals, 
-            meta={"problem_name": self.problem.name, "Maximize": self.maximize}
-        ) 
\ No newline at end of file
+            meta=meta
+        ) 
+
+
+class PopulationSolver(Solver): 
+    """
+    Base for generation based solvers (CMA-ES, DE, NSGA-II ...)
+
+    ask(n) hands out the points of the current generation (at most n, never 
+    past the end of the generation), tell() collects their values in the same 
+    order and once the whole generation is told _update() is called with it. 
+    batch_size=None evaluates whole generations per batch. 
+
+    Subclasses implement: 
+        - _init_state(): fresh algorithm state (called by reset)
+        - _generate() -> (pop, thetas): internal coordinates and the clipped packed points
+        - _update(pop, thetas, values): one generation step
+    """
+    def __init__(self, 
+                 problem: OptimizationProblemProtocol, 
+                 maximize: bool = True,
+                 batch_size: Optional[int] = None,
+                 seed: Optional[int] = None,) -> None: 
+        super().__init__(problem, maximize, batch_size or 1, seed)
+        self._whole_generations = batch_size is None
+        self.generation = 0
+
+    @abstractmethod
+    def _init_state(self) -> None: 
+        ...
+
+    @abstractmethod
+    def _generate(self) -> Tuple[np.ndarray, np.ndarray]: 
+        ...
+
+    @abstractmethod
+    def _update(self, pop: np.ndarray, thetas: np.ndarray, values: np.ndarray) -> None: 
+        ...
+
+    def reset(self) -> None: 
+        self._X = []
+        self._Y = []
+        self._x_best = None
+        self._y_best = None
+        self.generation = 0
+        self._pop: Optional[np.ndarray] = None
+        self._thetas: Optional[np.ndarray] = None
+        self._values: List[Any] = []
+        self._n_asked = 0
+        self._init_state()
+
+    def _next_batch_size(self) -> int: 
+        if not self._whole_generations: 
+            return self.batch_size
+        # the rest of the current generation, the next one is handed out whole by ask
+        if self._thetas is None: 
+            return sys.maxsize
+        return len(self._thetas) - self._n_asked
+
+    def _new_generation(self) -> None: 
+        self._pop, self._thetas = self._generate()
+        self._values = []
+        self._n_asked = 0
+        if self._whole_generations: 
+            self.batch_size = len(self._thetas)
+
+    def ask(self, n: int = 1) -> List[np.ndarray]: 
+        if self._thetas is None: 
+            self._new_generation()
+        start = self._n_asked
+        stop = min(start + n, len(self._thetas))
+        self._n_asked = stop
+        return [theta.copy() for theta in self._thetas[start:stop]]
+
+    def tell(self, thetas: List[np.ndarray], values: Sequence[Any]) -> None: 
+        if len(thetas) == 0: 
+            return
+        for x_dict, val in zip(self.space.unpack_batch(np.asarray(thetas, dtype=float)), values): 
+            self._update_best(x_dict, val)
+
+        self._values.extend(values)
+        if len(self._values) >= len(self._thetas): 
+            values = np.asarray(self._values[:len(self._thetas)], dtype=float)
+            self._update(self._pop, self._thetas, values)
+            self.generation += 1
+            self._thetas = None
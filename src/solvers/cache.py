@@ -0,0 +1,189 @@
+"""
+Opt-in memoization of objective evaluations.
+
+CachedProblem wraps any OptimizationProblemProtocol and answers repeated
+queries from a bounded LRU cache. Keys are built from the clipped packed
+design: categorical/integer params by their (rounded) index, continuous
+params either exactly or quantized to a per-param tolerance, so that points
+closer than the tolerance share one evaluation.
+"""
+
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Hashable, List, Mapping, Optional, Tuple
+import numpy as np
+
+from problems.interfaces import OptimizationProblemProtocol
+from solvers.search_space import SearchSpace, ContinuousParam
+
+
+def quantize_key(
+        space: SearchSpace,
+        theta: np.ndarray,
+        tolerances: Optional[Mapping[str, float]] = None,
+        ) -> Tuple[Hashable, ...]:
+    """
+    Hashable key of a clipped packed point.
+
+    tolerances: param name -> quantization step. Continuous params without a
+    tolerance (or with 0) are keyed on their exact value.
+    """
+    tolerances = tolerances or {}
+    key: List[Hashable] = []
+    for p, v in zip(space.params, np.asarray(theta, dtype=float)):
+        tol = float(tolerances.get(p.name, 0.0))
+        if not isinstance(p, ContinuousParam):
+            key.append(int(round(v)))
+        elif tol > 0.0:
+            key.append(int(np.floor(v / tol + 0.5)))
+        else:
+            key.append(float(v))
+    return tuple(key)
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    size: int = 0
+    maxsize: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class CachedProblem(OptimizationProblemProtocol):
+    """
+    LRU cache around a problem.
+
+    problem: the wrapped problem
+    maxsize: max number of cached values (least recently used evicted first)
+    tolerances: per-param quantization step, e.g. {"d_mrl": 1e-3, "d_cap": 1e-3}
+
+    evaluate_objective(..., return_breakdown=True) is passed through uncached.
+    Any other attribute is forwarded to the wrapped problem.
+    """
+    def __init__(
+            self,
+            problem: OptimizationProblemProtocol,
+            maxsize: int = 100_000,
+            tolerances: Optional[Mapping[str, float]] = None,
+            ) -> None:
+        self._problem = problem
+        self._space: SearchSpace = problem.search_space
+        self.maxsize = int(maxsize)
+        self.tolerances: Dict[str, float] = dict(tolerances or {})
+        self._cache: "OrderedDict[Tuple[Hashable, ...], Any]" = OrderedDict()
+        self._stats = CacheStats(maxsize=self.maxsize)
+        self._lock = threading.Lock()
+
+    @property
+    def problem(self) -> OptimizationProblemProtocol:
+        return self._problem
+
+    @property
+    def name(self) -> str:
+        return self._problem.name
+
+    @property
+    def search_space(self) -> SearchSpace:
+        return self._space
+
+    def __getattr__(self, attr: str) -> Any:
+        # only called for attributes not found on the wrapper
+        if attr.startswith("__") or attr == "_problem":
+            raise AttributeError(attr)
+        return getattr(self._problem, attr)
+
+    # pickling (process pools): locks cannot be pickled
+    def __getstate__(self) -> Dict[str, Any]:
+        state = dict(self.__dict__)
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    # ------------- cache bookkeeping -------------
+    def key(self, theta: np.ndarray, objective: str = "TSF") -> Tuple[Hashable, ...]:
+        return (objective.upper(),) + quantize_key(self._space, theta, self.tolerances)
+
+    def _get(self, key: Tuple[Hashable, ...]) -> Tuple[bool, Any]:
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                self._stats.hits += 1
+                return True, self._cache[key]
+            self._stats.misses += 1
+            return False, None
+
+    def _put(self, key: Tuple[Hashable, ...], value: Any) -> None:
+        with self._lock:
+            self._cache[key] = value
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.maxsize:
+                self._cache.popitem(last=False)
+                self._stats.evictions += 1
+
+    def stats(self) -> CacheStats:
+        with self._lock:
+            self._stats.size = len(self._cache)
+            return CacheStats(**vars(self._stats))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cache.clear()
+            self._stats = CacheStats(maxsize=self.maxsize)
+
+    # ------------- problem interface -------------
+    def evaluate_objective(
+            self,
+            *,
+            objective: str = "TSF",
+            return_breakdown: bool = False,
+            **kwargs: Any,
+            ) -> float | Dict[str, Any]:
+        if return_breakdown:
+            return self._problem.evaluate_objective(objective=objective, return_breakdown=True, **kwargs)
+
+        theta = self._space.clip(self._space.pack(kwargs))
+        key = self.key(theta, objective)
+        hit, value = self._get(key)
+        if hit:
+            return value
+        value = self._problem.evaluate_objective(objective=objective, **kwargs)
+        self._put(key, value)
+        return value
+
+    def evaluate_batch(self, thetas: np.ndarray) -> np.ndarray:
+        thetas = np.atleast_2d(np.asarray(thetas, dtype=float))
+        values = np.empty(thetas.shape[0])
+
+        # look everything up first, then evaluate the distinct misses in one call
+        missing: Dict[Tuple[Hashable, ...], List[int]] = {}
+        for i, theta in enumerate(self._space.clip_batch(thetas)):
+            key = self.key(theta)
+            if key in missing:
+                # repeated within the batch, evaluated once below
+                missing[key].append(i)
+                with self._lock:
+                    self._stats.hits += 1
+                continue
+            hit, value = self._get(key)
+            if hit:
+                values[i] = value
+            else:
+                missing.setdefault(key, []).append(i)
+
+        if missing:
+            rows = [idx[0] for idx in missing.values()]
+            new_values = np.asarray(self._problem.evaluate_batch(thetas[rows]), dtype=float)
+            for (key, idx), value in zip(missing.items(), new_values):
+                values[idx] = value
+                self._put(key, float(value))
+        return values
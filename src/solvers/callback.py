@@ -1,12 +1,292 @@
-class Callback: 
-    def on_start(self): pass 
-    def on_step(self): pass 
-    def on_end(self): pass 
+import io
+import logging
+import os
+import pickle
+import time
+from typing import Any, Dict, Optional, Tuple
+import numpy as np
 
+from solvers.timing import TIMINGS
 
-class LoggingCallback(Callback): pass 
-class EarlyStoppingCallback(Callback): pass  
-class CheckpointCallback(Callback): pass 
 
+class Callback:
+    """
+    Hooks called by Solver.run:
 
+    on_start(solver, history, n_evals): before the first batch (n_evals > 0 on resume)
+    on_step(solver, history, n_evals): after every told batch, a truthy return stops the run
+    on_end(solver, history, n_evals): after the last batch
 
+    history is the run's RunHistory, the last batch is its tail.
+    """
+    def on_start(self, solver: Any, history: Any, n_evals: int) -> None: pass
+    def on_step(self, solver: Any, history: Any, n_evals: int) -> Optional[bool]: pass
+    def on_end(self, solver: Any, history: Any, n_evals: int) -> None: pass
+
+
+class LoggingCallback(Callback):
+    """
+    Progress lines (evals, best so far, evals/s) through `logging`, every
+    `every` batches and at the end.
+    """
+    def __init__(self, every: int = 10, logger: Optional[logging.Logger] = None, level: int = logging.INFO) -> None:
+        self.every = max(1, int(every))
+        self.logger = logger or logging.getLogger("solvers")
+        self.level = level
+
+    def _log(self, solver: Any, n_evals: int) -> None:
+        rate = n_evals / max(time.monotonic() - self._t0, 1e-12)
+        _, y_best = solver.best()
+        self.logger.log(self.level, "%s: %d evals, best %s, %.1f evals/s", type(solver).__name__, n_evals, y_best, rate)
+
+    def on_start(self, solver: Any, history: Any, n_evals: int) -> None:
+        self._t0 = time.monotonic()
+        self._steps = 0
+
+    def on_step(self, solver: Any, history: Any, n_evals: int) -> None:
+        self._steps += 1
+        if self._steps % self.every == 0:
+            self._log(solver, n_evals)
+
+    def on_end(self, solver: Any, history: Any, n_evals: int) -> None:
+        self._log(solver, n_evals)
+
+
+class EarlyStoppingCallback(Callback):
+    """
+    Stopping rules checked between batches, the run stops as soon as one of
+    the given ones holds (reason says which). Several instances compose the
+    same way, e.g. a time budget from the scheduler plus a per-study target.
+
+    max_time: wall-clock seconds of this run() call (a resumed run starts
+        over). The next batch is only started when it is expected to finish in
+        time (at the mean batch duration so far), so the budget is kept up to
+        one unusually slow batch.
+    target: stop once the best value reaches target (>= when maximizing)
+    patience: stop after this many evaluations without an improvement of the
+        best value by more than rtol * |best| + atol
+    max_evals: stop after this many evaluations, counted like run's evals
+        (Solver.run trims the last batch to it). Solvers that draw their points
+        per batch (random search, BO) then see a shorter batch than an
+        uninterrupted run would, so a run resumed from there only continues
+        bit for bit when max_evals is on a batch boundary.
+
+    target and patience use solver.best(), they are skipped for vector valued
+    solvers (NSGA2Solver).
+    """
+    def __init__(self,
+                 max_time: Optional[float] = None,
+                 target: Optional[float] = None,
+                 patience: Optional[int] = None,
+                 rtol: float = 1e-3,
+                 atol: float = 0.0,
+                 max_evals: Optional[int] = None,
+                 ) -> None:
+        if max_time is not None and max_time <= 0:
+            raise ValueError("max_time must be > 0")
+        if patience is not None and patience < 1:
+            raise ValueError("patience must be >= 1")
+        if rtol < 0 or atol < 0:
+            raise ValueError("rtol and atol must be >= 0")
+        self.max_time = max_time
+        self.target = target
+        self.patience = patience
+        self.rtol = rtol
+        self.atol = atol
+        self.max_evals = max_evals
+        self.reason: Optional[str] = None
+
+    def _cost(self, solver: Any) -> Optional[float]:
+        """ best-so-far as a cost (lower is better), None when there is none or it is not a scalar """
+        _, y_best = solver.best()
+        if y_best is None or np.ndim(y_best) != 0:
+            return None
+        return -float(y_best) if solver.maximize else float(y_best)
+
+    def on_start(self, solver: Any, history: Any, n_evals: int) -> None:
+        self.reason = None
+        self._t0 = time.monotonic()
+        self._batches = 0
+        self._ref = self._cost(solver)
+        self._ref_evals = n_evals
+
+    def on_step(self, solver: Any, history: Any, n_evals: int) -> bool:
+        self._batches += 1
+        if self.max_evals is not None and n_evals >= self.max_evals:
+            self.reason = f"max_evals ({self.max_evals})"
+            return True
+        if self.max_time is not None:
+            elapsed = time.monotonic() - self._t0
+            if elapsed + elapsed / self._batches > self.max_time:
+                self.reason = f"max_time ({self.max_time:g} s)"
+                return True
+        if self.target is None and self.patience is None:
+            return False
+
+        cost = self._cost(solver)
+        if cost is None:
+            return False
+        if self.target is not None:
+            target = -self.target if solver.maximize else self.target
+            if cost <= target:
+                self.reason = f"target ({self.target:g})"
+                return True
+        if self.patience is not None:
+            if self._ref is None or cost < self._ref - (self.rtol * abs(self._ref) + self.atol):
+                self._ref, self._ref_evals = cost, n_evals
+            elif n_evals - self._ref_evals >= self.patience:
+                self.reason = f"no improvement in {n_evals - self._ref_evals} evals"
+                return True
+        return False
+
+
+class TimingCallback(Callback):
+    """
+    Times the hot path of a run with solvers.timing.TIMINGS: objective
+    phases (stack, parratt_up/dn, sensitivity, fom) and the run loop
+    (solver.ask, evaluate, solver.tell, history). report / format() hold
+    the aggregates of the last run, per phase and per evaluation.
+    """
+    def __init__(self) -> None:
+        self.report: Dict[str, Dict[str, float]] = {}
+        self.n_evals = 0
+
+    def on_start(self, solver: Any, history: Any, n_evals: int) -> None:
+        TIMINGS.reset()
+        TIMINGS.enabled = True
+        self._start_evals = n_evals
+
+    def on_end(self, solver: Any, history: Any, n_evals: int) -> None:
+        TIMINGS.enabled = False
+        self.n_evals = n_evals - self._start_evals
+        self.report = TIMINGS.report(self.n_evals)
+        self._text = TIMINGS.format(self.n_evals)
+
+    def format(self) -> str:
+        return getattr(self, "_text", "")
+
+
+# ---------- checkpoints ----------
+class _StatePickler(pickle.Pickler):
+    """ pickles solver state, objects in `external` are written as their name only """
+    def __init__(self, file: io.BytesIO, external: Dict[int, str]) -> None:
+        super().__init__(file, protocol=pickle.HIGHEST_PROTOCOL)
+        self.external = external
+
+    def persistent_id(self, obj: Any) -> Optional[str]:
+        return self.external.get(id(obj))
+
+
+class _StateUnpickler(pickle.Unpickler):
+    def __init__(self, file: io.BytesIO, external: Dict[str, Any]) -> None:
+        super().__init__(file)
+        self.external = external
+
+    def persistent_load(self, pid: str) -> Any:
+        # e.g. an evaluator at save time but none now
+        return self.external.get(pid)
+
+
+class CheckpointCallback(Callback):
+    """
+    Periodic checkpoints of a Solver.run, pass it as run(..., checkpoint=cb).
+
+    directory/state.pkl: the solver's complete state (population / GP data,
+        RNG, best so far ...) as its __getstate__ gives it, plus the eval
+        count and history length. Solvers leave out what they can rebuild
+        from the rest (BayesianSolver's Cholesky factor). It is
+        written to a temp file and renamed over the old one, so a crash
+        leaves either the old or the new checkpoint, never half of one.
+    directory/history.bin (+ .json): the run history, appended as it grows
+        (see RunHistory), so a checkpoint costs the same at any history length.
+
+    Running the same solver (same problem and constructor args) with the same
+    checkpoint again resumes from the last checkpoint and continues exactly as
+    the interrupted run would have. Rows the interrupted run evaluated after
+    its last checkpoint are dropped and evaluated again.
+
+    The problem, search space, evaluator and the attributes named in the
+    solver's _checkpoint_external (e.g. user callables) are not stored, the
+    resuming solver's own ones are used. Wall-clock budgets (DE's max_time,
+    EarlyStoppingCallback) start over in the resumed run, the solver's
+    _after_resume() restarts its clocks.
+
+    every: checkpoint after every `every` batches
+    interval: checkpoint when this many seconds passed since the last one
+    A checkpoint is written when any given trigger fires, with neither given
+    after every batch (every=1).
+    """
+    STATE = "state.pkl"
+    HISTORY = "history.bin"
+
+    def __init__(self, directory: str | os.PathLike, every: Optional[int] = None, interval: Optional[float] = None) -> None:
+        self.directory = os.fspath(directory)
+        os.makedirs(self.directory, exist_ok=True)
+        if every is None and interval is None:
+            every = 1
+        self.every = None if every is None else max(1, int(every))
+        self.interval = interval
+        self._steps = 0
+        self._last = time.monotonic()
+
+    @property
+    def state_path(self) -> str:
+        return os.path.join(self.directory, self.STATE)
+
+    @property
+    def history_path(self) -> str:
+        return os.path.join(self.directory, self.HISTORY)
+
+    def exists(self) -> bool:
+        return os.path.exists(self.state_path)
+
+    @staticmethod
+    def _external(solver: Any) -> Dict[str, Any]:
+        names = ("problem", "space", "evaluator") + tuple(getattr(solver, "_checkpoint_external", ()))
+        return {name: getattr(solver, name) for name in names if getattr(solver, name, None) is not None}
+
+    # ------------- save / load -------------
+    def save(self, solver: Any, history: Any, n_evals: int) -> None:
+        history.sync()
+        external = {id(obj): name for name, obj in self._external(solver).items()}
+        buf = io.BytesIO()
+        _StatePickler(buf, external).dump({
+            "solver": dict(solver.__getstate__()),
+            "n_evals": int(n_evals),
+            "n_rows": len(history),
+        })
+
+        tmp = self.state_path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(buf.getvalue())
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.state_path)
+        self._steps = 0
+        self._last = time.monotonic()
+
+    def load(self, solver: Any) -> Tuple[int, int]:
+        """ restore solver in place, returns (n_evals, history rows) at the checkpoint """
+        with open(self.state_path, "rb") as f:
+            state = _StateUnpickler(io.BytesIO(f.read()), self._external(solver)).load()
+        setstate = getattr(solver, "__setstate__", None)
+        if setstate is not None:
+            setstate(state["solver"])
+        else:
+            solver.__dict__.update(state["solver"])
+        after_resume = getattr(solver, "_after_resume", None)
+        if after_resume is not None:
+            after_resume()
+        return state["n_evals"], state["n_rows"]
+
+    # ------------- hooks used by Solver.run -------------
+    def on_step(self, solver: Any, history: Any, n_evals: int) -> None:
+        self._steps += 1
+        due = self.every is not None and self._steps >= self.every
+        if self.interval is not None:
+            due = due or time.monotonic() - self._last >= self.interval
+        if due:
+            self.save(solver, history, n_evals)
+
+    def on_end(self, solver: Any, history: Any, n_evals: int) -> None:
+        self.save(solver, history, n_evals)
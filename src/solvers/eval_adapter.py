@@ -39,7 +39,6 @@ def make_single_objective_fn(
     return f
 
 
-#NOTE: NOT PROPERLY IMPLEMENTED!
 def make_multi_objective_fn(
     problem: OptimizationProblemProtocol,
     objectives: Sequence[str],
@@ -54,29 +53,26 @@ def make_multi_objective_fn(
     :return: Description
     :rtype: Callable[[ndarray[_AnyShape, dtype[Any]]], ndarray[_AnyShape, dtype[Any]]]
     
-    returns(F(theta)) -> np.ndarray of shape n_objectives, 
-    I assume that problem.evaluate_objective can be called witrh the 
-    obj function 
+    returns F(theta) -> np.ndarray of shape n_objectives, or (n, n_objectives)
+    for a (n, d) batch of thetas.
+    Problems with evaluate_multi (Base1) get all objectives from one
+    evaluation, others fall back to one evaluate_objective call per objective.
     """
     space: SearchSpace = problem.search_space
     obj: List[str] = list(objectives)
+    evaluate_multi = getattr(problem, "evaluate_multi", None)
 
     def F(theta: np.ndarray) -> np.ndarray: 
         theta = np.asarray(theta, dtype=float)
-        theta = space.clip(theta)
-        x_dict = space.unpack(theta)
-        #assumption (CUZ NOT IMPLEMENTED) 
-        # problem gives us a dict per obj func
-        vals: List[float] = []
+        thetas = space.clip_batch(np.atleast_2d(theta))
 
-        for obj_name in obj: 
-            v = problem.evaluate_objective(objective=obj_name, **x_dict)
-            if type(v) == dict: 
-                vals.append(float(v["value"]))
-            else: 
-                vals.append(float(v))
-        return np.asarray(vals, dtype=float)
+        if evaluate_multi is not None: 
+            vals = np.asarray(evaluate_multi(thetas, obj), dtype=float)
+        else: 
+            vals = np.empty((thetas.shape[0], len(obj)))
+            for i, x_dict in enumerate(space.unpack_batch(thetas)): 
+                for j, obj_name in enumerate(obj): 
+                    v = problem.evaluate_objective(objective=obj_name, **x_dict)
+                    vals[i, j] = float(v["value"]) if type(v) == dict else float(v)
+        return vals[0] if theta.ndim == 1 else vals
     return F
-    
-
-
@@ -0,0 +1,219 @@
+"""
+Evaluation backends used by Solver.run
+
+An evaluator maps a (n, d) batch of clipped packed points to their objective
+values, in order. Solvers only ever see the returned array, so the backend
+can be swapped without touching the solver. evaluate(thetas, method, args)
+calls another batch method of the problem over the same backend, e.g.
+NSGA-II's evaluate(thetas, "evaluate_multi", (objectives,)).
+
+- SerialEvaluator: the problem's own evaluate_batch in this process
+- ThreadPoolEvaluator: chunks over a thread pool (NumPy releases the GIL
+  inside the big array ops)
+- ProcessPoolEvaluator: chunks over worker processes. The problem is pickled
+  once and installed in every worker by the pool initializer; tasks only
+  carry the theta chunks.
+"""
+
+import math
+import pickle
+import threading
+from abc import ABC, abstractmethod
+from functools import partial
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+import multiprocessing as mp
+from typing import Any, List, Optional, Tuple
+import numpy as np
+
+from problems.interfaces import OptimizationProblemProtocol
+from solvers.eval_adapter import make_multi_objective_fn
+
+
+def _call(problem: Any, method: str, thetas: np.ndarray, args: Tuple[Any, ...] = ()) -> np.ndarray:
+    fn = getattr(problem, method, None)
+    if fn is not None:
+        return np.asarray(fn(thetas, *args))
+    # problem without a batch method: evaluate point by point
+    if method == "evaluate_multi":
+        return make_multi_objective_fn(problem, *args)(thetas)
+    space = problem.search_space
+    return np.array([problem.evaluate_objective(**x) for x in space.unpack_batch(thetas)])
+
+
+class Evaluator(ABC):
+    """
+    Base evaluator. Subclasses implement evaluate(), close() frees resources.
+    Usable as a context manager.
+
+    method: problem method evaluate() calls by default
+    """
+    def __init__(self, problem: OptimizationProblemProtocol, method: str = "evaluate_batch") -> None:
+        self.problem = problem
+        self.method = method
+
+    @abstractmethod
+    def evaluate(self, thetas: np.ndarray, method: Optional[str] = None, args: Tuple[Any, ...] = ()) -> np.ndarray:
+        """ problem.<method>(thetas, *args), method defaults to self.method """
+        ...
+
+    def __call__(self, thetas: np.ndarray) -> np.ndarray:
+        return self.evaluate(thetas)
+
+    def close(self) -> None:
+        pass
+
+    def __enter__(self) -> "Evaluator":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+
+class SerialEvaluator(Evaluator):
+    """ Whole batch in the calling process """
+    def evaluate(self, thetas: np.ndarray, method: Optional[str] = None, args: Tuple[Any, ...] = ()) -> np.ndarray:
+        return _call(self.problem, method or self.method, np.atleast_2d(thetas), args)
+
+
+class _PoolEvaluator(Evaluator):
+    """
+    Shared chunking for the pool backends.
+
+    n_workers: pool size (default: os.cpu_count())
+    chunk_size: rows per task, default splits each batch evenly over the workers
+    """
+    def __init__(
+            self,
+            problem: OptimizationProblemProtocol,
+            n_workers: Optional[int] = None,
+            chunk_size: Optional[int] = None,
+            method: str = "evaluate_batch",
+            ) -> None:
+        super().__init__(problem, method)
+        self.n_workers = n_workers or mp.cpu_count()
+        self.chunk_size = chunk_size
+        self._pool: Optional[Executor] = None
+
+    def _chunks(self, thetas: np.ndarray) -> List[np.ndarray]:
+        n = thetas.shape[0]
+        size = self.chunk_size or max(1, math.ceil(n / self.n_workers))
+        return [thetas[i:i + size] for i in range(0, n, size)]
+
+    @abstractmethod
+    def _submit_all(self, thetas: np.ndarray, method: str, args: Tuple[Any, ...]) -> List[np.ndarray]:
+        ...
+
+    def evaluate(self, thetas: np.ndarray, method: Optional[str] = None, args: Tuple[Any, ...] = ()) -> np.ndarray:
+        thetas = np.atleast_2d(np.asarray(thetas, dtype=float))
+        if thetas.shape[0] == 0:
+            return np.empty(0)
+        # pool.map keeps the order of the chunks
+        return np.concatenate(self._submit_all(thetas, method or self.method, args), axis=0)
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+
+
+class ThreadPoolEvaluator(_PoolEvaluator):
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self._pool = ThreadPoolExecutor(max_workers=self.n_workers)
+
+    def _submit_all(self, thetas: np.ndarray, method: str, args: Tuple[Any, ...]) -> List[np.ndarray]:
+        return list(self._pool.map(lambda chunk: _call(self.problem, method, chunk, args), self._chunks(thetas)))
+
+
+# ---------- process pool: problem lives in a module global of each worker ----------
+_WORKER_PROBLEM: Any = None
+_WORKER_BARRIER: Any = None
+
+
+def _init_worker(problem_bytes: bytes, barrier: Any = None) -> None:
+    global _WORKER_PROBLEM, _WORKER_BARRIER
+    _WORKER_PROBLEM = pickle.loads(problem_bytes)
+    _WORKER_BARRIER = barrier
+    if barrier is not None:
+        # pay for page faults / connections now instead of in the first batch
+        warmup = getattr(_WORKER_PROBLEM, "warmup", None)
+        if callable(warmup):
+            warmup()
+
+
+def _worker_evaluate(method: str, args: Tuple[Any, ...], thetas: np.ndarray) -> np.ndarray:
+    return _call(_WORKER_PROBLEM, method, thetas, args)
+
+
+def _worker_wait(timeout: float) -> None:
+    # holds the worker until all workers got here, so none takes two of these tasks
+    try:
+        _WORKER_BARRIER.wait(timeout)
+    except threading.BrokenBarrierError:
+        pass
+
+
+class ProcessPoolEvaluator(_PoolEvaluator):
+    """
+    Process pool backend. The problem must be picklable (see
+    physics.magnetic_sld for picklable MRL models).
+
+    warmup: start every worker right away and wait until each has unpickled
+        the problem and run its warmup() (if it has one), so process start-up,
+        imports and unpickling are paid before the first batch. Nothing is
+        evaluated.
+    mp_context: multiprocessing start method ("fork", "spawn", ...), default
+        is the platform default
+    """
+    def __init__(
+            self,
+            problem: OptimizationProblemProtocol,
+            n_workers: Optional[int] = None,
+            chunk_size: Optional[int] = None,
+            method: str = "evaluate_batch",
+            warmup: bool = True,
+            mp_context: Optional[str] = None,
+            ) -> None:
+        super().__init__(problem, n_workers, chunk_size, method)
+        try:
+            problem_bytes = pickle.dumps(problem)
+        except Exception as exc:
+            raise TypeError(
+                f"problem {type(problem).__name__} cannot be pickled for worker processes: {exc}"
+            ) from exc
+
+        ctx = mp.get_context(mp_context)
+        self._barrier = ctx.Barrier(self.n_workers) if warmup else None
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.n_workers,
+            mp_context=ctx,
+            initializer=_init_worker,
+            initargs=(problem_bytes, self._barrier),
+        )
+        if warmup:
+            self.warmup()
+
+    def warmup(self, timeout: float = 60.0) -> None:
+        """ one barrier task per worker: every worker is started and initialized when it returns """
+        if self._barrier is None:
+            raise RuntimeError("warmup needs ProcessPoolEvaluator(warmup=True)")
+        list(self._pool.map(_worker_wait, [timeout] * self.n_workers))
+
+    def _submit_all(self, thetas: np.ndarray, method: str, args: Tuple[Any, ...]) -> List[np.ndarray]:
+        return list(self._pool.map(partial(_worker_evaluate, method, args), self._chunks(thetas)))
+
+
+def make_evaluator(
+        problem: OptimizationProblemProtocol,
+        backend: str = "serial",
+        **kwargs: Any,
+        ) -> Evaluator:
+    """ backend: "serial", "thread" or "process" """
+    backends = {
+        "serial": SerialEvaluator,
+        "thread": ThreadPoolEvaluator,
+        "process": ProcessPoolEvaluator,
+    }
+    if backend not in backends:
+        raise ValueError(f"unknown evaluator backend {backend!r}, use one of {list(backends)}")
+    return backends[backend](problem, **kwargs)
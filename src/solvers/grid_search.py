@@ -1,63 +1,103 @@
 
 import numpy as np
-from itertools import product
-from typing import List, Sequence, Any
+from typing import Iterator, List, Mapping, Optional, Sequence, Any
 from solvers.base import Solver
+from solvers.search_space import CategoricalParam, IntegerParam
 
 class GridSearchSolver(Solver):
     """
     GridSearchSolver that discretizes the search space and evaluates all points.
+
+    The grid is never materialized: grid point i is found from its flat index
+    with mixed-radix arithmetic (last param varies fastest), so only the
+    points of the current batch exist at any time.
+
+    n_points: points per continuous / integer axis
+    resolution: per param override of n_points, e.g. {"d_mrl": 400}
+    log_axes: continuous params spaced logarithmically (need lo > 0)
+
+    Categorical params use all choices, integer params the distinct rounded
+    values of their linspace. Once the grid (or the shard, see shard()) is
+    done ask() returns no points, which ends run().
     """
-    def __init__(self, problem, n_points: int = 5, maximize: bool = True):
-        super().__init__(problem, maximize)
+    def __init__(self,
+                 problem,
+                 n_points: int = 5,
+                 maximize: bool = True,
+                 batch_size: int = 256,
+                 seed=None,
+                 resolution: Optional[Mapping[str, int]] = None,
+                 log_axes: Sequence[str] = (),
+                 ):
+        super().__init__(problem, maximize, batch_size, seed)
         self.n_points = n_points
-        self._grid_iterator = None
+        self.resolution = dict(resolution or {})
+        self.log_axes = set(log_axes)
+        unknown = (set(self.resolution) | self.log_axes) - set(self.space.names)
+        if unknown:
+            raise ValueError(f"unknown params {sorted(unknown)}")
+        self.axes = [self._axis(p) for p in self.space.params]
+        self.shape = tuple(len(a) for a in self.axes)
+        self.size = int(np.prod(self.shape, dtype=np.int64))
+        self._indices = range(self.size)
+        self._grid_idx = 0
+
+    def _axis(self, p) -> np.ndarray:
+        if isinstance(p, CategoricalParam):
+            return np.array([p.pack(c) for c in p.choices], dtype=float)
+        n = int(self.resolution.get(p.name, self.n_points))
+        if p.name in self.log_axes:
+            if isinstance(p, IntegerParam) or p.lo <= 0.0:
+                raise ValueError(f"log spacing needs a continuous param with lo > 0, got {p.name!r}")
+            return np.geomspace(p.lo, p.hi, n)
+        grid = np.linspace(p.lo, p.hi, n)
+        if isinstance(p, IntegerParam):
+            return np.unique(p.clip_array(grid))
+        return grid
+
+    # ------------- lazy grid -------------
+    def points(self, indices: Sequence[int] | np.ndarray) -> np.ndarray:
+        """ (n, d) grid points for flat indices in [0, size) """
+        idx = np.unravel_index(np.asarray(indices, dtype=np.int64), self.shape)
+        return np.stack([axis[k] for axis, k in zip(self.axes, idx)], axis=-1)
+
+    def shard(self, i: int, k: int) -> "GridSearchSolver":
+        """
+        Restrict this solver to shard i of k: flat indices i, i + k, i + 2k, ...
+        Every grid point is in exactly one shard and strided shards mix all
+        choices of the slow axes, so the k workers get similar work.
+        """
+        if not 0 <= i < k:
+            raise ValueError(f"shard index {i} not in [0, {k})")
+        self._indices = range(i, self.size, k)
+        self._grid_idx = 0
+        return self
+
+    def __len__(self) -> int:
+        """ points in this (shard of the) grid """
+        return len(self._indices)
+
+    def iter_batches(self, batch_size: int) -> Iterator[np.ndarray]:
+        """ the remaining grid as (<= batch_size, d) arrays, for direct vectorized evaluation """
+        while self._grid_idx < len(self._indices):
+            stop = min(self._grid_idx + batch_size, len(self._indices))
+            batch = self.points(self._indices[self._grid_idx:stop])
+            self._grid_idx = stop
+            yield batch
 
+    # ------------- ask / tell -------------
     def reset(self) -> None:
-        super().reset()
-        # Create a grid for each continuous parameter
-        # For categorical, use all choices.
-        # For integer, use linspace and round.
-        
-        # Build a list of arrays
-        param_grids = []
-        for p in self.space.params:
-            if hasattr(p, 'choices'): # Categorical
-                packed_choices = [p.pack(c) for c in p.choices]
-                param_grids.append(packed_choices)
-            else:
-                lo = p.lo
-                hi = p.hi
-                
-                # Generate n_points
-                grid = np.linspace(lo, hi, self.n_points)
-                param_grids.append(grid)
-        
-        # Create cartesian product
-        self._grid = list(product(*param_grids))
+        self._X = []
+        self._Y = []
+        self._x_best = None
+        self._y_best = None
         self._grid_idx = 0
 
     def ask(self, n: int = 1) -> List[np.ndarray]:
-        if self._grid_iterator is None:
-            # We initialize lazily or in reset. 
-            # If reset wasnt called manually, rely on run() calling reset()
-            if not hasattr(self, '_grid'):
-                self.reset()
-        
-        points = []
-        for _ in range(n):
-            if self._grid_idx < len(self._grid):
-                point = np.array(self._grid[self._grid_idx])
-                points.append(point)
-                self._grid_idx += 1
-            else:
-                # Return random to keep loop going if budget > grid size
-                return [self.space.sample(1)[0]]
-        
-        return points
+        return list(next(self.iter_batches(n), np.empty((0, len(self.axes)))))
 
     def tell(self, thetas: List[np.ndarray], values: Sequence[Any]) -> None:
-        # Update best
-        for theta, val in zip(thetas, values):
-            x_dict = self.space.unpack(theta)
+        if len(thetas) == 0:
+            return
+        for x_dict, val in zip(self.space.unpack_batch(np.asarray(thetas, dtype=float)), values):
             self._update_best(x_dict, val)
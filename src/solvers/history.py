@@ -0,0 +1,212 @@
+"""
+Columnar run history
+
+RunHistory keeps every evaluated point of a run in two growable NumPy
+arrays, theta (n, d) in packed coordinates (categoricals as their choice
+index) and y (n,) or (n, m) for vector objectives, instead of one dict per
+evaluation. The dict view ({"theta", "x", "y"} per entry) is only built for
+the entries that are actually looked at.
+
+With a path the rows are also appended to a raw float64 file as they come
+in (plus a JSON sidecar describing the columns), so a crashed or running
+run can be read back with RunHistory.load_stream.
+"""
+
+import json
+import os
+from typing import Any, Dict, Iterator, List, Optional
+import numpy as np
+
+from solvers.search_space import CategoricalParam, ContinuousParam, IntegerParam, Param, SearchSpace
+
+
+# ------------- search space <-> JSON, so saved histories can be unpacked again -------------
+def space_spec(space: SearchSpace) -> List[Dict[str, Any]]:
+    spec: List[Dict[str, Any]] = []
+    for p in space.params:
+        if isinstance(p, CategoricalParam):
+            spec.append({"kind": "categorical", "name": p.name, "choices": list(p.choices)})
+        elif isinstance(p, IntegerParam):
+            spec.append({"kind": "integer", "name": p.name, "lo": float(p.lo), "hi": float(p.hi)})
+        else:
+            spec.append({"kind": "continuous", "name": p.name, "lo": float(p.lo), "hi": float(p.hi)})
+    return spec
+
+
+def space_from_spec(spec: List[Dict[str, Any]]) -> SearchSpace:
+    params: List[Param] = []
+    for s in spec:
+        if s["kind"] == "categorical":
+            params.append(CategoricalParam(s["name"], list(s["choices"])))
+        elif s["kind"] == "integer":
+            p = IntegerParam(s["name"])
+            p.lo, p.hi = s["lo"], s["hi"]
+            params.append(p)
+        else:
+            params.append(ContinuousParam(s["name"], s["lo"], s["hi"]))
+    return SearchSpace(params)
+
+
+class RunHistory:
+    """
+    space: search space of the run (used for the dict view)
+    capacity: initial number of rows, doubled whenever it runs out
+    path: optional file the rows are streamed to (path + ".json" describes it)
+    """
+    def __init__(self, space: SearchSpace, capacity: int = 1024, path: Optional[str | os.PathLike] = None) -> None:
+        self.space = space
+        self.d = len(space)
+        self.m: Optional[int] = None       # objectives per point, known after the first append
+        self._theta = np.empty((max(1, int(capacity)), self.d))
+        self._y: Optional[np.ndarray] = None
+        self._n = 0
+        self.path = None if path is None else os.fspath(path)
+        self._file = None
+
+    # ------------- appending -------------
+    def _grow(self, n_min: int) -> None:
+        cap = self._theta.shape[0]
+        while cap < n_min:
+            cap *= 2
+        theta = np.empty((cap, self.d))
+        theta[:self._n] = self._theta[:self._n]
+        y = np.empty((cap,) + self._y.shape[1:])
+        y[:self._n] = self._y[:self._n]
+        self._theta, self._y = theta, y
+
+    def append(self, thetas: np.ndarray, ys: np.ndarray) -> None:
+        """ add a batch: thetas (n, d), ys (n,) or (n, m) """
+        thetas = np.atleast_2d(np.asarray(thetas, dtype=float))
+        ys = np.asarray(ys, dtype=float).reshape(thetas.shape[0], -1)
+        n = thetas.shape[0]
+        if n == 0:
+            return
+        if self._y is None:
+            self.m = ys.shape[1]
+            shape = (self._theta.shape[0],) if self.m == 1 else (self._theta.shape[0], self.m)
+            self._y = np.empty(shape)
+            if self.path is not None:
+                self._open_stream()
+        if self._n + n > self._theta.shape[0]:
+            self._grow(self._n + n)
+        self._theta[self._n:self._n + n] = thetas
+        self._y[self._n:self._n + n] = ys[:, 0] if self.m == 1 else ys
+        self._n += n
+
+        if self._file is not None:
+            np.hstack([thetas, ys]).tofile(self._file)
+            self._file.flush()
+
+    def _open_stream(self, mode: str = "wb") -> None:
+        if mode == "wb":
+            with open(self.path + ".json", "w", encoding="utf-8") as f:
+                json.dump({"space": space_spec(self.space), "m": self.m}, f, indent=2)
+        self._file = open(self.path, mode)
+
+    def sync(self) -> None:
+        """ make the streamed rows durable (before a checkpoint refers to them) """
+        if self._file is not None:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    # ------------- columnar access -------------
+    @property
+    def theta(self) -> np.ndarray:
+        """ (n, d) packed points, a view """
+        return self._theta[:self._n]
+
+    @property
+    def y(self) -> np.ndarray:
+        """ (n,) values, (n, m) for vector objectives, a view """
+        if self._y is None:
+            return np.empty(0)
+        return self._y[:self._n]
+
+    def columns(self) -> Dict[str, np.ndarray]:
+        """ param name -> unpacked column (see SearchSpace.unpack_columns) """
+        return self.space.unpack_columns(self.theta)
+
+    def codes(self, name: str) -> np.ndarray:
+        """ int choice index per row of a categorical param """
+        i = self.space.names.index(name)
+        return self.space.params[i].indices(self.theta[:, i])
+
+    # ------------- dict view (list of {"theta", "x", "y"}) -------------
+    def __len__(self) -> int:
+        return self._n
+
+    def _entry(self, i: int) -> Dict[str, Any]:
+        y = self._y[i]
+        return {
+            "theta": self._theta[i].copy(),
+            "x": self.space.unpack(self._theta[i]),
+            "y": float(y) if self.m == 1 else y.copy(),
+        }
+
+    def __getitem__(self, key: int | slice) -> Dict[str, Any] | List[Dict[str, Any]]:
+        if isinstance(key, slice):
+            return [self._entry(i) for i in range(*key.indices(self._n))]
+        i = int(key)
+        if i < 0:
+            i += self._n
+        if not 0 <= i < self._n:
+            raise IndexError("history index out of range")
+        return self._entry(i)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for i in range(self._n):
+            yield self._entry(i)
+
+    # ------------- (de)serialization -------------
+    def to_dict(self) -> Dict[str, Any]:
+        """ columnar, JSON ready """
+        return {
+            "names": self.space.names,
+            "theta": self.theta.tolist(),
+            "y": self.y.tolist(),
+        }
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        return {"theta": self.theta, "y": self.y}
+
+    @classmethod
+    def from_arrays(cls, space: SearchSpace, theta: np.ndarray, y: np.ndarray) -> "RunHistory":
+        history = cls(space, capacity=max(1, len(theta)))
+        history.append(theta, y)
+        return history
+
+    @classmethod
+    def resume_stream(cls, space: SearchSpace, path: str | os.PathLike, n_rows: int) -> "RunHistory":
+        """
+        Continue streaming to path after its first n_rows rows. Rows written
+        after those (e.g. after the last checkpoint) are cut off the file.
+        """
+        path = os.fspath(path)
+        if n_rows == 0 or not os.path.exists(path + ".json"):
+            return cls(space, path=path)
+        history = cls.load_stream(path)
+        if len(history) < n_rows:
+            raise ValueError(f"{path} has {len(history)} rows, expected at least {n_rows}")
+        history._n = n_rows
+        history.space, history.path = space, path
+        with open(path, "r+b") as f:
+            f.truncate(n_rows * (history.d + history.m) * 8)
+        history._open_stream("ab")
+        return history
+
+    @classmethod
+    def load_stream(cls, path: str | os.PathLike) -> "RunHistory":
+        """ read back a history streamed to path (also while the run is still going) """
+        path = os.fspath(path)
+        with open(path + ".json", "r", encoding="utf-8") as f:
+            info = json.load(f)
+        space = space_from_spec(info["space"])
+        width = len(space) + int(info["m"])
+        rows = np.fromfile(path, dtype=np.float64)
+        rows = rows[:rows.size - rows.size % width].reshape(-1, width)   # drop a partly written row
+        return cls.from_arrays(space, rows[:, :len(space)], rows[:, len(space):])
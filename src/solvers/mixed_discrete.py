@@ -0,0 +1,232 @@
+"""
+Mixed discrete solvers
+
+One continuous solver per choice of a categorical param (the cap material
+for Base1), see "Mixed discrete" in SoftwareDesign.md. The continuous
+solvers stay unaware of the categorical param, they each see a FixedChoiceProblem.
+
+- FixedChoiceProblem: a problem with one categorical param pinned to a choice
+- CapRacingSolver: successive halving race over the choices
+"""
+
+import math
+from typing import Any, Callable, Dict, List, Optional, Sequence
+import numpy as np
+
+from problems.interfaces import OptimizationProblemProtocol
+from solvers.base import RunResults, Solver
+from solvers.callback import Callback, CheckpointCallback
+from solvers.evaluator import Evaluator
+from solvers.search_space import CategoricalParam, SearchSpace
+from solvers.single_obj import CMASolver
+
+
+class FixedChoiceProblem(OptimizationProblemProtocol):
+    """
+    problem with the categorical param `param` fixed to `choice`. Its search
+    space is the one of problem without that param, evaluate_batch puts the
+    choice back in and evaluates on the full problem.
+    """
+    def __init__(self, problem: OptimizationProblemProtocol, param: str, choice: Any) -> None:
+        self._problem = problem
+        full = problem.search_space
+        self.param = param
+        self.choice = choice
+        self.column = full.names.index(param)
+        self.index = full.params[self.column].pack(choice)
+        self._space = SearchSpace([p for p in full.params if p.name != param])
+
+    @property
+    def problem(self) -> OptimizationProblemProtocol:
+        return self._problem
+
+    @property
+    def name(self) -> str:
+        return f"{self._problem.name}[{self.param}={self.choice}]"
+
+    @property
+    def search_space(self) -> SearchSpace:
+        return self._space
+
+    def full_thetas(self, thetas: np.ndarray) -> np.ndarray:
+        """ (n, d - 1) points of this problem -> (n, d) points of the full problem """
+        thetas = np.atleast_2d(np.asarray(thetas, dtype=float))
+        return np.insert(thetas, self.column, self.index, axis=1)
+
+    def evaluate_objective(self, *, objective: str = "TSF", return_breakdown: bool = False, **kwargs: Any) -> Any:
+        kwargs[self.param] = self.choice
+        return self._problem.evaluate_objective(objective=objective, return_breakdown=return_breakdown, **kwargs)
+
+    def evaluate_batch(self, thetas: np.ndarray) -> np.ndarray:
+        full = self.full_thetas(thetas)
+        evaluate_batch = getattr(self._problem, "evaluate_batch", None)
+        if evaluate_batch is not None:
+            return np.asarray(evaluate_batch(full))
+        return np.array([self._problem.evaluate_objective(**x) for x in self._problem.search_space.unpack_batch(full)])
+
+
+def _default_factory(problem: OptimizationProblemProtocol, maximize: bool, seed: Optional[int]) -> Solver:
+    return CMASolver(problem, maximize=maximize, seed=seed)
+
+
+class CapRacingSolver(Solver):
+    """
+    Successive halving over the choices of a categorical param.
+
+    Every choice (arm) gets its own continuous sub-solver on a
+    FixedChoiceProblem. The budget is split into rounds, in each round the
+    active arms get the same number of evaluations, then only the best
+    1 / eta of them (by best-so-far) go on. The last arm left gets whatever
+    budget remains. With K choices there are ceil(log_eta K) halvings, so the
+    winner gets most of the evaluations instead of 1 / K of them.
+
+    The budget is the evals of run(), or `budget` for plain ask/tell use.
+    Without one (run(None) bounded by EarlyStoppingCallback) round r gives
+    every active arm min_evals * eta**r evaluations.
+    ask() hands out points of one arm at a time, tell() routes values back to
+    the arms by the categorical column of the points.
+
+    :param param: categorical param to race over, default the only one in the space
+    :param solver_factory: (problem, maximize, seed) -> Solver, default CMASolver
+    :param eta: halving factor, keep ceil(active / eta) arms per round
+    :param min_evals: lower bound on the evaluations per arm and round (the
+        first round's quota without a budget)
+    :param budget: total evaluations when used without run()
+    """
+    _checkpoint_external = ("solver_factory",)
+    def __init__(self,
+                 problem: OptimizationProblemProtocol,
+                 maximize: bool = True,
+                 batch_size: Optional[int] = None,
+                 seed: Optional[int] = None,
+                 param: Optional[str] = None,
+                 solver_factory: Optional[Callable[[OptimizationProblemProtocol, bool, Optional[int]], Solver]] = None,
+                 eta: float = 2.0,
+                 min_evals: int = 10,
+                 budget: Optional[int] = None,
+                 ) -> None:
+        # batch_size=None: every ask hands out as much as the arm gives (one generation for population solvers)
+        super().__init__(problem, maximize, batch_size or 2**31 - 1, seed)
+        if param is None:
+            cats = [p.name for p in self.space.params if isinstance(p, CategoricalParam)]
+            if len(cats) != 1:
+                raise ValueError(f"CapRacingSolver needs param= when the space has {len(cats)} categorical params")
+            param = cats[0]
+        if not isinstance(self.space.params[self.space.names.index(param)], CategoricalParam):
+            raise ValueError(f"{param!r} is not a categorical param")
+        if eta <= 1.0:
+            raise ValueError("eta must be > 1")
+        self.param = param
+        self.column = self.space.names.index(param)
+        self.choices: List[Any] = list(self.space.params[self.column].choices)
+        self.solver_factory = solver_factory or _default_factory
+        self.eta = float(eta)
+        self.min_evals = int(min_evals)
+        self.budget = budget
+        self._budget: Optional[int] = budget
+
+    # ------------- state -------------
+    def reset(self) -> None:
+        self._X = []
+        self._Y = []
+        self._x_best = None
+        self._y_best = None
+        self.arms: List[Solver] = []
+        for choice in self.choices:
+            sub = self.solver_factory(
+                FixedChoiceProblem(self.problem, self.param, choice),
+                self.maximize,
+                int(self.rng.integers(2**31)),
+            )
+            sub.reset()
+            self.arms.append(sub)
+        k = len(self.choices)
+        self.active: List[int] = list(range(k))
+        self.n_evals = np.zeros(k, dtype=int)
+        self.best_cost = np.full(k, np.inf)
+        self.exhausted = np.zeros(k, dtype=bool)    # sub-solver stopped handing out points
+        self.round = 0
+        self.n_rounds = 1 + (math.ceil(math.log(k) / math.log(self.eta) - 1e-12) if k > 1 else 0)
+        self._start_round()
+
+    def _after_resume(self) -> None:
+        for sub in self.arms:
+            sub._after_resume()
+
+    def _start_round(self) -> None:
+        self._round_evals = np.zeros(len(self.choices), dtype=int)
+        if len(self.active) == 1:
+            # last arm standing: no quota
+            self._quota = np.iinfo(np.int64).max
+            return
+        if self._budget is None:
+            # unknown budget (run(None) with a time limit): quotas grow by eta per round, as in Hyperband
+            self._quota = int(math.ceil(self.min_evals * self.eta ** self.round))
+            return
+        per_round = self._budget / self.n_rounds
+        self._quota = max(self.min_evals, int(per_round / len(self.active)))
+
+    def _end_round(self) -> None:
+        n_keep = max(1, math.ceil(len(self.active) / self.eta))
+        # stable: ties keep the earlier choice
+        ranked = sorted(self.active, key=lambda a: self.best_cost[a])
+        self.active = sorted(ranked[:n_keep])
+        self.round += 1
+        self._start_round()
+
+    def _open_arms(self) -> List[int]:
+        return [a for a in self.active if not self.exhausted[a] and self._round_evals[a] < self._quota]
+
+    # ------------- ask / tell -------------
+    def ask(self, n: int = 1) -> List[np.ndarray]:
+        while True:
+            open_arms = self._open_arms()
+            if not open_arms:
+                if len(self.active) == 1 or all(self.exhausted[a] for a in self.active):
+                    return []
+                self._end_round()
+                continue
+            # round robin: the arm with the fewest evaluations this round
+            arm = min(open_arms, key=lambda a: self._round_evals[a])
+            m = int(min(n, self._quota - self._round_evals[arm]))
+            thetas = self.arms[arm].ask(m)
+            if len(thetas) == 0:
+                self.exhausted[arm] = True
+                continue
+            sub_problem: FixedChoiceProblem = self.arms[arm].problem
+            return list(sub_problem.full_thetas(np.asarray(thetas, dtype=float)))
+
+    def tell(self, thetas: List[np.ndarray], values: Sequence[Any]) -> None:
+        if len(thetas) == 0:
+            return
+        thetas = np.asarray(thetas, dtype=float)
+        values = np.asarray(values, dtype=float)
+        for x_dict, val in zip(self.space.unpack_batch(thetas), values):
+            self._update_best(x_dict, val)
+
+        arm_of = np.clip(np.round(thetas[:, self.column]), 0, len(self.choices) - 1).astype(int)
+        for arm in np.unique(arm_of):
+            rows = arm_of == arm
+            sub_thetas = np.delete(thetas[rows], self.column, axis=1)
+            self.arms[arm].tell(list(sub_thetas), values[rows])
+            self.n_evals[arm] += int(rows.sum())
+            self._round_evals[arm] += int(rows.sum())
+            self.best_cost[arm] = min(self.best_cost[arm], float(self._minimized(values[rows]).min()))
+
+    # ------------- run -------------
+    def run(self, evals: Optional[int], evaluator: Optional[Evaluator] = None, history_path: Optional[str] = None,
+            checkpoint: Optional[CheckpointCallback] = None, callbacks: Sequence[Callback] = ()) -> RunResults:
+        self._budget = evals if self.budget is None else self.budget
+        result = super().run(evals, evaluator, history_path, checkpoint, callbacks)
+        result.meta["race"] = self.state()
+        return result
+
+    def state(self) -> Dict[str, Any]:
+        """ per choice evaluations and best-so-far, for logging """
+        sign = -1.0 if self.maximize else 1.0
+        return {
+            "round": self.round,
+            "active": [self.choices[a] for a in self.active],
+            "n_evals": {c: int(n) for c, n in zip(self.choices, self.n_evals)},
+            "best": {c: (None if np.isinf(b) else sign * float(b)) for c, b in zip(self.choices, self.best_cost)},
+        }
@@ -1,5 +1,294 @@
 """
-Docstring for solvers.multi_obj
+Multi objective solvers
 
+- NSGA2Solver: NSGA-II (elitist non-dominated sorting GA) with SBX crossover
+  and polynomial mutation
 
-"""
\ No newline at end of file
+Non-dominated sorting and crowding distance work on a whole (n, m) cost
+matrix with NumPy ops, the only Python loops are over fronts and objectives.
+"""
+
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+
+from problems.interfaces import OptimizationProblemProtocol
+from solvers.base import PopulationSolver
+from solvers.eval_adapter import make_multi_objective_fn
+
+
+# ------------- sorting helpers (costs are minimized) -------------
+def dominance_matrix(F: np.ndarray) -> np.ndarray:
+    """
+    D[i, j] = point i dominates point j: no worse in every objective and
+    strictly better in at least one. F: (n, m) costs
+    """
+    F = np.asarray(F, dtype=float)
+    n = F.shape[0]
+    no_worse = np.ones((n, n), dtype=bool)
+    better = np.zeros((n, n), dtype=bool)
+    for j in range(F.shape[1]):
+        col = F[:, j]
+        no_worse &= col[:, None] <= col[None, :]
+        better |= col[:, None] < col[None, :]
+    return no_worse & better
+
+
+def non_dominated_sort(F: np.ndarray) -> np.ndarray:
+    """
+    Fast non-dominated sort. Returns the front index of every row of the
+    (n, m) cost matrix F, 0 is the Pareto front.
+    """
+    D = dominance_matrix(F)
+    n = D.shape[0]
+    count = D.sum(axis=0)               # how many points dominate each point
+    rank = np.full(n, -1, dtype=int)
+    k = 0
+    front = np.flatnonzero(count == 0)
+    while front.size > 0:
+        rank[front] = k
+        # peel the front off: its points no longer count as dominators
+        count = count - D[front].sum(axis=0)
+        count[rank >= 0] = -1
+        front = np.flatnonzero(count == 0)
+        k += 1
+    return rank
+
+
+def crowding_distance(F: np.ndarray, rank: np.ndarray) -> np.ndarray:
+    """
+    Crowding distance of every row of F within its own front (rank).
+    Boundary points of a front get inf, the rest the sum over objectives of
+    the normalized gap between their neighbours.
+    """
+    F = np.asarray(F, dtype=float)
+    rank = np.asarray(rank)
+    n, m = F.shape
+    dist = np.zeros(n)
+    if n == 0:
+        return dist
+    for j in range(m):
+        # all fronts at once: sort by front, then by objective j
+        order = np.lexsort((F[:, j], rank))
+        r, f = rank[order], F[order, j]
+        first = np.r_[True, r[1:] != r[:-1]]
+        last = np.r_[r[1:] != r[:-1], True]
+        group = np.cumsum(first) - 1
+        span = (f[last] - f[first])[group]
+
+        gap = np.zeros(n)
+        gap[1:-1] = f[2:] - f[:-2]
+        d = np.divide(gap, span, out=np.zeros(n), where=span > 0)
+        d[first | last] = np.inf
+        dist[order] += d
+    return dist
+
+
+# ------------- variation operators on the unit box -------------
+def sbx_crossover(
+    p1: np.ndarray,
+    p2: np.ndarray,
+    rng: np.random.Generator,
+    eta: float = 15.0,
+    prob: float = 0.9,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """ Simulated binary crossover (bounded version) of (n, d) parent pairs in [0, 1] """
+    c1, c2 = p1.copy(), p2.copy()
+    n, d = p1.shape
+    do = (rng.random((n, 1)) < prob) & (rng.random((n, d)) < 0.5) & (np.abs(p1 - p2) > 1e-14)
+
+    y1, y2 = np.minimum(p1, p2), np.maximum(p1, p2)
+    dy = np.where(do, y2 - y1, 1.0)
+    u = rng.random((n, d))
+    e = 1.0 / (eta + 1.0)
+
+    def betaq(beta: np.ndarray) -> np.ndarray:
+        alpha = 2.0 - beta ** -(eta + 1.0)
+        return np.where(u <= 1.0 / alpha, (u * alpha) ** e, (1.0 / (2.0 - u * alpha)) ** e)
+
+    lo_child = 0.5 * (y1 + y2 - betaq(1.0 + 2.0 * y1 / dy) * dy)
+    hi_child = 0.5 * (y1 + y2 + betaq(1.0 + 2.0 * (1.0 - y2) / dy) * dy)
+    lo_child, hi_child = np.clip(lo_child, 0.0, 1.0), np.clip(hi_child, 0.0, 1.0)
+
+    swap = rng.random((n, d)) < 0.5
+    c1 = np.where(do, np.where(swap, hi_child, lo_child), c1)
+    c2 = np.where(do, np.where(swap, lo_child, hi_child), c2)
+    return c1, c2
+
+
+def polynomial_mutation(
+    y: np.ndarray,
+    rng: np.random.Generator,
+    eta: float = 20.0,
+    prob: Optional[float] = None,
+) -> np.ndarray:
+    """ Polynomial mutation (bounded version) of (n, d) points in [0, 1], default prob 1/d """
+    n, d = y.shape
+    prob = 1.0 / d if prob is None else prob
+    do = rng.random((n, d)) < prob
+    u = rng.random((n, d))
+    e = 1.0 / (eta + 1.0)
+
+    low = u < 0.5
+    val_lo = 2.0 * u + (1.0 - 2.0 * u) * (1.0 - y) ** (eta + 1.0)
+    val_hi = 2.0 * (1.0 - u) + 2.0 * (u - 0.5) * y ** (eta + 1.0)
+    delta = np.where(low, val_lo ** e - 1.0, 1.0 - val_hi ** e)
+    return np.clip(np.where(do, y + delta, y), 0.0, 1.0)
+
+
+class NSGA2Solver(PopulationSolver):
+    """
+    NSGA-II (Deb et al. 2002): (mu + lambda) survival by non-dominated rank
+    and crowding distance, binary tournaments, SBX and polynomial mutation.
+
+    Objective vectors come from `objective_fn` (packed theta -> (m,) array),
+    by default make_multi_objective_fn(problem, objectives), which is called
+    once per generation with the whole (n, d) batch. With an
+    evaluator set in run() the batches go through the evaluator's
+    evaluate(thetas, "evaluate_multi", (objectives,)) instead, a custom
+    objective_fn cannot be sent to an evaluator. Whole generations are
+    asked / told at once by default.
+
+    Like CMASolver it works in the unit box of search_space.relaxed_bounds()
+    and categorical / integer params are continuous coordinates that clip
+    rounds. The stored genes are the clipped (evaluated) points.
+
+    best() returns the current Pareto front: (list of x dicts, (k, m) values).
+
+    :param objectives: objective names for make_multi_objective_fn
+    :param objective_fn: vector objective, overrides objectives
+    :param maximize: one bool for all objectives or one per objective
+    :param popsize: parents per generation (= offspring per generation)
+    :param eta_c, p_c: SBX distribution index and crossover prob per pair
+    :param eta_m, p_m: mutation distribution index and prob per coordinate (default 1/d)
+    """
+    _checkpoint_external = ("objective_fn",)
+    def __init__(self,
+                 problem: OptimizationProblemProtocol,
+                 objectives: Optional[Sequence[str]] = None,
+                 objective_fn: Optional[Callable[[np.ndarray], np.ndarray]] = None,
+                 maximize: bool | Sequence[bool] = True,
+                 batch_size: Optional[int] = None,
+                 seed: Optional[int] = None,
+                 popsize: int = 100,
+                 eta_c: float = 15.0,
+                 p_c: float = 0.9,
+                 eta_m: float = 20.0,
+                 p_m: Optional[float] = None,
+                 ) -> None:
+        # the adapter takes whole (n, d) batches, a user objective_fn single points
+        self._batched_fn = objective_fn is None
+        if objective_fn is None:
+            if objectives is None:
+                raise ValueError("NSGA2Solver needs objectives or objective_fn")
+            objective_fn = make_multi_objective_fn(problem, objectives)
+        super().__init__(problem, maximize, batch_size, seed)
+        self.objectives = None if objectives is None else list(objectives)
+        self.objective_fn = objective_fn
+        # costs are minimized: -1 flips the maximized objectives
+        self._sign = np.where(np.asarray(maximize, dtype=bool), -1.0, 1.0)
+        self.dim = len(self.space)
+        self.lo, self.hi = self.space.relaxed_bounds()
+        self.popsize = int(popsize)
+        self.eta_c = float(eta_c)
+        self.p_c = float(p_c)
+        self.eta_m = float(eta_m)
+        self.p_m = p_m
+
+    # ------------- coordinates -------------
+    def _to_unit(self, thetas: np.ndarray) -> np.ndarray:
+        return (np.asarray(thetas, dtype=float) - self.lo) / (self.hi - self.lo)
+
+    def _from_unit(self, ys: np.ndarray) -> np.ndarray:
+        return self.space.clip_batch(self.lo + ys * (self.hi - self.lo))
+
+    def _minimized(self, values: np.ndarray) -> np.ndarray:
+        return np.asarray(values, dtype=float) * self._sign
+
+    def _evaluate(self, thetas: np.ndarray) -> np.ndarray:
+        if self.evaluator is not None:
+            if not self._batched_fn:
+                raise ValueError("NSGA2Solver with an evaluator needs objectives, not a custom objective_fn")
+            values = np.asarray(self.evaluator.evaluate(thetas, "evaluate_multi", (self.objectives,)), dtype=float)
+        elif self._batched_fn:
+            values = np.asarray(self.objective_fn(thetas), dtype=float)
+        else:
+            values = np.array([self.objective_fn(theta) for theta in thetas], dtype=float)
+        values = values.reshape(len(thetas), -1)
+        if self.objectives is not None and values.shape[1] != len(self.objectives):
+            raise ValueError(
+                f"expected {len(self.objectives)} objective values per point, got {values.shape[1]}"
+            )
+        return values
+
+    # ------------- state -------------
+    def _init_state(self) -> None:
+        self._parents: Optional[np.ndarray] = None     # unit box genes
+        self._parent_values: Optional[np.ndarray] = None
+        self._parent_rank: Optional[np.ndarray] = None
+        self._parent_crowd: Optional[np.ndarray] = None
+
+    def _update_best(self, x_dict: Dict[str, Any], value: Any) -> None:
+        # no single best, the front is kept in _update
+        pass
+
+    # ------------- ask / tell steps -------------
+    def _tournament(self, n: int) -> np.ndarray:
+        a, b = self.rng.integers(0, len(self._parents), (2, n))
+        rank, crowd = self._parent_rank, self._parent_crowd
+        a_wins = (rank[a] < rank[b]) | ((rank[a] == rank[b]) & (crowd[a] > crowd[b]))
+        return np.where(a_wins, a, b)
+
+    def _generate(self) -> Tuple[np.ndarray, np.ndarray]:
+        if self._parents is None:
+            ys = self.rng.uniform(0.0, 1.0, (self.popsize, self.dim))
+        else:
+            n_pairs = (self.popsize + 1) // 2
+            mates = self._tournament(2 * n_pairs).reshape(2, n_pairs)
+            c1, c2 = sbx_crossover(self._parents[mates[0]], self._parents[mates[1]],
+                                   self.rng, self.eta_c, self.p_c)
+            ys = np.concatenate([c1, c2])[:self.popsize]
+            ys = polynomial_mutation(ys, self.rng, self.eta_m, self.p_m)
+        thetas = self._from_unit(ys)
+        # keep the rounded / clipped point as the gene
+        return self._to_unit(thetas), thetas
+
+    def _update(self, pop: np.ndarray, thetas: np.ndarray, values: np.ndarray) -> None:
+        values = values.reshape(len(pop), -1)
+        if self._parents is None:
+            genes, vals = pop, values
+        else:
+            genes = np.concatenate([self._parents, pop])
+            vals = np.concatenate([self._parent_values, values])
+
+        cost = self._minimized(vals)
+        rank = non_dominated_sort(cost)
+        crowd = crowding_distance(cost, rank)
+        keep = np.lexsort((-crowd, rank))[:self.popsize]
+
+        self._parents = genes[keep]
+        self._parent_values = vals[keep]
+        # fronts are kept whole except the last one, so ranks carry over,
+        # crowding is redone for the truncated front
+        self._parent_rank = rank[keep]
+        self._parent_crowd = crowding_distance(cost[keep], self._parent_rank)
+
+    # ------------- results -------------
+    def pareto_front(self) -> Tuple[np.ndarray, np.ndarray]:
+        """ (packed thetas (k, d), values (k, m)) of the current front """
+        if self._parents is None:
+            return np.empty((0, self.dim)), np.empty((0, 0))
+        on_front = self._parent_rank == 0
+        return self._from_unit(self._parents[on_front]), self._parent_values[on_front]
+
+    def best(self) -> Tuple[List[Dict[str, Any]], np.ndarray]:
+        thetas, values = self.pareto_front()
+        return self.space.unpack_batch(thetas), values
+
+    def state(self) -> Dict[str, Any]:
+        """ population summary, for logging """
+        return {
+            "generation": self.generation,
+            "popsize": self.popsize,
+            "front_size": 0 if self._parent_rank is None else int(np.sum(self._parent_rank == 0)),
+            "n_fronts": 0 if self._parent_rank is None else int(self._parent_rank.max()) + 1,
+        }
@@ -18,12 +18,14 @@ class RandomSearchSolver(Solver):
 
     def ask(self, n: int = 1) -> List[np.ndarray]:
         # Generate n random samples from the search space
-        samples_2d = self.space.sample(n)
+        samples_2d = self.space.sample(n, self.rng)
         # Convert to list of 1D arrays as expected by Solver.ask protocol
         return [row for row in samples_2d]
     
     def tell(self, thetas: List[np.ndarray], values: Sequence[Any]) -> None:
         # No state, but track best result
-        for theta, val in zip(thetas, values):
-            x_dict = self.space.unpack(theta)
+        if len(thetas) == 0:
+            return
+        x_dicts = self.space.unpack_batch(np.asarray(thetas, dtype=float))
+        for x_dict, val in zip(x_dicts, values):
             self._update_best(x_dict, val)
@@ -10,6 +10,10 @@ General parameter and just search space abstractions used by ther opt framework
 Each parameter is a "scalar" in the opt. vector. And the search space holds the list of the parameters 
 and it provides helping functions to unpack and pack the vals to their numeric vector repr. used by the solver. 
 
+The *_batch / unpack_columns functions do the same for a whole (n, d) population at once, 
+one vectorized pass per column, instead of one param and one point at a time. 
+Sampling takes an optional np.random.Generator, without one the global np.random is used. 
+
 
 NOTE: The clip functions works as a strong correction thing for when solver finds solutions outside the bounds 
 This is a first implementation and it's NOT a sound way of doing it. 
@@ -24,7 +28,19 @@ CAP -
 
 import numpy as np 
 from dataclasses import dataclass, field
-from typing import Any, Dict, Mapping, Sequence, List
+from typing import Any, Dict, Mapping, Sequence, List, Optional
+
+
+def _uniform(rng: Optional[np.random.Generator], lo: float, hi: float, n: int) -> np.ndarray:
+    if rng is None:
+        return np.random.uniform(lo, hi, size=n)
+    return rng.uniform(lo, hi, size=n)
+
+def _integers(rng: Optional[np.random.Generator], lo: int, hi: int, n: int) -> np.ndarray:
+    # hi exclusive
+    if rng is None:
+        return np.random.randint(lo, hi, size=n)
+    return rng.integers(lo, hi, size=n)
 
 
 @dataclass
@@ -36,7 +52,10 @@ class Param:
         - pack: Any -> float 
         - unpack: float -> float
         - clip(scalar): float -> float 
-        - sample(n): 
+        - sample(n, rng): 
+
+    The *_array versions work on a whole column (1D array) of a population, 
+    the defaults below just loop over the scalar versions. 
     """
     name: str 
 
@@ -56,8 +75,17 @@ class Param:
         """
         raise NotImplementedError
 
-    def sample(self, n: int = 1) -> np.ndarray: 
-        return np.random.uniform(self.lo, self.hi, size=n)
+    def sample(self, n: int = 1, rng: Optional[np.random.Generator] = None) -> np.ndarray: 
+        return _uniform(rng, self.lo, self.hi, n)
+
+    def pack_array(self, values: Sequence[Any]) -> np.ndarray: 
+        return np.array([self.pack(v) for v in values], dtype=float)
+
+    def unpack_array(self, column: np.ndarray) -> np.ndarray: 
+        return np.array([self.unpack(v) for v in column])
+
+    def clip_array(self, column: np.ndarray) -> np.ndarray: 
+        return np.array([self.clip(v) for v in column], dtype=float)
 
 @dataclass
 class ContinuousParam(Param): 
@@ -75,8 +103,17 @@ class ContinuousParam(Param):
     def clip(self, scalar):
         return float(np.clip(scalar, self.lo, self.hi))
 
-    def sample(self, n = 1):
-        return super().sample(n)
+    def sample(self, n = 1, rng = None):
+        return super().sample(n, rng)
+
+    def pack_array(self, values):
+        return np.asarray(values, dtype=float)
+
+    def unpack_array(self, column):
+        return np.asarray(column, dtype=float)
+
+    def clip_array(self, column):
+        return np.clip(np.asarray(column, dtype=float), self.lo, self.hi)
     
 
 
@@ -108,8 +145,18 @@ class IntegerParam(Param):
 
         return rounded 
     
-    def sample(self, n: int = 1) -> np.ndarray:
-        raise NotImplementedError
+    def sample(self, n: int = 1, rng: Optional[np.random.Generator] = None) -> np.ndarray:
+        lo, hi = int(np.ceil(self.lo)), int(np.floor(self.hi))
+        return _integers(rng, lo, hi + 1, n).astype(float)
+
+    def pack_array(self, values):
+        return np.asarray(values).astype(int).astype(float)
+
+    def unpack_array(self, column):
+        return np.round(np.asarray(column, dtype=float)).astype(int)
+
+    def clip_array(self, column):
+        return np.round(np.clip(np.asarray(column, dtype=float), self.lo, self.hi))
     
 
 @dataclass
@@ -131,9 +178,26 @@ class CategoricalParam(Param):
         idx = int(np.clip(round(float(scalar)), 0, len(self.choices) - 1))
         return float(idx)
     
-    def sample(self, n: int = 1) -> np.ndarray: 
+    def sample(self, n: int = 1, rng: Optional[np.random.Generator] = None) -> np.ndarray: 
         k = len(self.choices)
-        return np.random.randint(0, k, size=n).astype(float)
+        return _integers(rng, 0, k, n).astype(float)
+
+    def indices(self, column: np.ndarray) -> np.ndarray: 
+        """ column of float repr. -> int choice indices (rounded and clipped) """
+        return np.clip(np.round(np.asarray(column, dtype=float)), 0, len(self.choices) - 1).astype(int)
+
+    def pack_array(self, values: Sequence[Any]) -> np.ndarray: 
+        lookup = {c: float(i) for i, c in enumerate(self.choices)}
+        return np.array([lookup[v] for v in values], dtype=float)
+
+    def unpack_array(self, column: np.ndarray) -> np.ndarray: 
+        # object array so choices keep their python type
+        choices = np.empty(len(self.choices), dtype=object)
+        choices[:] = list(self.choices)
+        return choices[self.indices(column)]
+
+    def clip_array(self, column: np.ndarray) -> np.ndarray: 
+        return self.indices(column).astype(float)
     
 
 
@@ -205,11 +269,12 @@ class SearchSpace:
             clipped[i] = p.clip(arr[i])
         return clipped
     
-    def sample(self, n: int) -> np.ndarray: 
+    def sample(self, n: int, rng: Optional[np.random.Generator] = None) -> np.ndarray: 
         """
         Draw random feasible samples from the search space 
 
         parameters: n amount of samples to draw  
+                    rng np.random.Generator, default is the global np.random
         
         return: 
         a 2D arr where row i is a sample vector 
@@ -217,9 +282,67 @@ class SearchSpace:
         num_params = len(self.params)
         samples = np.empty((n, num_params), dtype=float)
         for i, p in enumerate(self.params): 
-            samples[:, i] = p.sample(n)
+            samples[:, i] = p.sample(n, rng)
         return samples 
-    
+
+    def relaxed_bounds(self) -> tuple[np.ndarray, np.ndarray]: 
+        """
+        (lo, hi) arrays of a box in which every param can be treated as continuous, 
+        for solvers working in continuous coordinates. clip maps the box onto the 
+        feasible points: continuous params keep their bounds, integer and categorical 
+        params get half a step on each side so every value rounds from an equal width bin. 
+        """
+        lo = np.empty(len(self.params))
+        hi = np.empty(len(self.params))
+        for i, p in enumerate(self.params): 
+            if isinstance(p, CategoricalParam): 
+                lo[i], hi[i] = -0.5, len(p.choices) - 0.5
+            elif isinstance(p, ContinuousParam): 
+                lo[i], hi[i] = p.lo, p.hi
+            else: 
+                lo[i], hi[i] = p.lo - 0.5, p.hi + 0.5
+        return lo, hi
+
+    # ------------- population (n, d) versions -------------
+    def pack_batch(self, values: Sequence[Mapping[str, Any]] | Mapping[str, Sequence[Any]]) -> np.ndarray: 
+        """
+        Pack many points at once into a (n, d) array. 
+
+        values is either a list of dicts (like pack) or columns, a dict 
+        param name -> sequence of values (like unpack_columns returns)
+        """
+        if isinstance(values, Mapping): 
+            columns = values
+        else: 
+            columns = {p.name: [v[p.name] for v in values] for p in self.params}
+        n = len(columns[self.params[0].name]) if self.params else 0
+        thetas = np.empty((n, len(self.params)), dtype=float)
+        for i, p in enumerate(self.params): 
+            thetas[:, i] = p.pack_array(columns[p.name])
+        return thetas
+
+    def unpack_columns(self, thetas: np.ndarray) -> Dict[str, np.ndarray]: 
+        """
+        Columnar unpack of a (n, d) array: param name -> array of n values 
+        (float for continuous, int for integer, object array of choices for categorical)
+        """
+        arr = np.atleast_2d(np.asarray(thetas, dtype=float))
+        return {p.name: p.unpack_array(arr[:, i]) for i, p in enumerate(self.params)}
+
+    def unpack_batch(self, thetas: np.ndarray) -> List[Dict[str, Any]]: 
+        """ unpack of every row, list of dicts (same values as unpack on each row) """
+        columns = self.unpack_columns(thetas)
+        lists = [columns[p.name].tolist() for p in self.params]
+        names = self.names
+        return [dict(zip(names, row)) for row in zip(*lists)]
+
+    def clip_batch(self, thetas: np.ndarray) -> np.ndarray: 
+        """ clip every row of a (n, d) array, returns a new array """
+        arr = np.atleast_2d(np.asarray(thetas, dtype=float))
+        clipped = np.empty_like(arr)
+        for i, p in enumerate(self.params): 
+            clipped[:, i] = p.clip_array(arr[:, i])
+        return clipped
 
 
 
@@ -0,0 +1,650 @@
+"""
+Single objective solvers
+
+- CMASolver: CMA-ES with IPOP restarts
+- BayesianSolver: Gaussian process + expected improvement, mixed continuous / categorical
+- DifferentialEvolutionSolver: batched DE (best1bin & co.) with dithering
+"""
+
+import math
+import time
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+import numpy as np
+from scipy.linalg import cho_solve, solve_triangular
+from scipy.optimize import minimize
+from scipy.special import erfc, ndtr
+
+from problems.interfaces import OptimizationProblemProtocol
+from solvers.base import PopulationSolver, Solver
+from solvers.search_space import CategoricalParam
+
+
+class CMASolver(PopulationSolver):
+    """
+    CMA-ES (Hansen's tutorial version: cumulative step-size adaptation,
+    rank-one and rank-mu covariance updates) with IPOP restarts.
+
+    Works in the unit box of search_space.relaxed_bounds(). Samples outside
+    the box are repaired by clipping to it (so the evaluated point is exactly
+    SearchSpace.clip of the point used in the update) and categorical /
+    integer params are searched as continuous coordinates that clip rounds.
+    For mixed spaces a cap-per-run setup is usually better, CMA-ES is made for
+    the continuous part.
+
+    :param x0: start point (dict like search_space.unpack), default uniform random
+    :param sigma0: initial step size in unit-box coordinates
+    :param popsize: lambda, default 4 + floor(3 ln d)
+    :param restarts: max number of IPOP restarts (0 disables them)
+    :param incpopsize: population growth factor per restart
+    :param tolx: restart when sigma * max std along any axis falls below this
+    :param tolfun: restart when the recent best values span less than this
+    """
+    def __init__(self,
+                 problem: OptimizationProblemProtocol,
+                 maximize: bool = True,
+                 batch_size: Optional[int] = None,
+                 seed: Optional[int] = None,
+                 x0: Optional[Mapping[str, Any]] = None,
+                 sigma0: float = 0.3,
+                 popsize: Optional[int] = None,
+                 restarts: int = 9,
+                 incpopsize: float = 2.0,
+                 tolx: float = 1e-5,
+                 tolfun: float = 1e-8,
+                 ) -> None:
+        super().__init__(problem, maximize, batch_size, seed)
+        self.dim = len(self.space)
+        self.lo, self.hi = self.space.relaxed_bounds()
+        self.x0 = None if x0 is None else dict(x0)
+        self.sigma0 = float(sigma0)
+        self.popsize0 = int(popsize) if popsize is not None else 4 + int(3 * math.log(self.dim))
+        self.restarts = int(restarts)
+        self.incpopsize = float(incpopsize)
+        self.tolx = float(tolx)
+        self.tolfun = float(tolfun)
+
+    # ------------- coordinates -------------
+    def _to_unit(self, thetas: np.ndarray) -> np.ndarray:
+        return (np.asarray(thetas, dtype=float) - self.lo) / (self.hi - self.lo)
+
+    def _from_unit(self, ys: np.ndarray) -> np.ndarray:
+        return self.space.clip_batch(self.lo + ys * (self.hi - self.lo))
+
+    # ------------- state -------------
+    def _init_state(self) -> None:
+        self.restarts_done = 0
+        self.popsize = self.popsize0
+        if self.x0 is not None:
+            mean = self._to_unit(self.space.pack(self.x0))
+        else:
+            mean = self.rng.uniform(0.0, 1.0, self.dim)
+        self._start(mean)
+
+    def _start(self, mean: np.ndarray) -> None:
+        """ fresh CMA-ES run at mean with the current popsize """
+        n, lam = self.dim, self.popsize
+        mu = lam // 2
+        w = math.log(mu + 0.5) - np.log(np.arange(1, mu + 1))
+        self.weights = w / w.sum()
+        self.mu = mu
+        self.mueff = 1.0 / np.sum(self.weights**2)
+
+        # strategy parameters
+        self.cs = (self.mueff + 2.0) / (n + self.mueff + 5.0)
+        self.damps = 1.0 + 2.0 * max(0.0, math.sqrt((self.mueff - 1.0) / (n + 1.0)) - 1.0) + self.cs
+        self.cc = (4.0 + self.mueff / n) / (n + 4.0 + 2.0 * self.mueff / n)
+        self.c1 = 2.0 / ((n + 1.3)**2 + self.mueff)
+        self.cmu = min(1.0 - self.c1, 2.0 * (self.mueff - 2.0 + 1.0 / self.mueff) / ((n + 2.0)**2 + self.mueff))
+        self.chiN = math.sqrt(n) * (1.0 - 1.0 / (4.0 * n) + 1.0 / (21.0 * n * n))
+
+        # dynamic state
+        self.mean = np.clip(np.asarray(mean, dtype=float), 0.0, 1.0)
+        self.sigma = self.sigma0
+        self.C = np.eye(n)
+        self.B = np.eye(n)
+        self.D = np.ones(n)
+        self.pc = np.zeros(n)
+        self.ps = np.zeros(n)
+        self._gen_in_run = 0
+        self._best_hist: List[float] = []
+
+    # ------------- ask / tell steps -------------
+    def _generate(self) -> Tuple[np.ndarray, np.ndarray]:
+        z = self.rng.standard_normal((self.popsize, self.dim))
+        ys = self.mean + self.sigma * (z * self.D) @ self.B.T
+        ys = np.clip(ys, 0.0, 1.0)  # repair, see class docstring
+        return ys, self._from_unit(ys)
+
+    def _update(self, pop: np.ndarray, thetas: np.ndarray, values: np.ndarray) -> None:
+        n = self.dim
+        cost = self._minimized(values)
+        order = np.argsort(cost, kind="stable")
+        sel = pop[order[:self.mu]]
+
+        old_mean = self.mean
+        self.mean = self.weights @ sel
+        y_w = (self.mean - old_mean) / self.sigma
+
+        # step-size path (uses C^-1/2 = B D^-1 B^T)
+        C_inv_sqrt_y = self.B @ ((self.B.T @ y_w) / self.D)
+        self.ps = (1.0 - self.cs) * self.ps + math.sqrt(self.cs * (2.0 - self.cs) * self.mueff) * C_inv_sqrt_y
+        self._gen_in_run += 1
+        ps_norm = np.linalg.norm(self.ps)
+        hsig = ps_norm / math.sqrt(1.0 - (1.0 - self.cs)**(2 * self._gen_in_run)) < (1.4 + 2.0 / (n + 1.0)) * self.chiN
+
+        # covariance: rank-one (evolution path) + rank-mu
+        self.pc = (1.0 - self.cc) * self.pc + hsig * math.sqrt(self.cc * (2.0 - self.cc) * self.mueff) * y_w
+        Y = (sel - old_mean) / self.sigma
+        rank_mu = (Y.T * self.weights) @ Y
+        self.C = (
+            (1.0 - self.c1 - self.cmu) * self.C
+            + self.c1 * (np.outer(self.pc, self.pc) + (not hsig) * self.cc * (2.0 - self.cc) * self.C)
+            + self.cmu * rank_mu
+        )
+
+        self.sigma *= math.exp((self.cs / self.damps) * (ps_norm / self.chiN - 1.0))
+
+        self.C = np.triu(self.C) + np.triu(self.C, 1).T
+        eigvals, self.B = np.linalg.eigh(self.C)
+        self.D = np.sqrt(np.maximum(eigvals, 1e-300))
+
+        self._best_hist.append(float(cost[order[0]]))
+        if self._should_restart(cost):
+            self._restart()
+
+    # ------------- IPOP -------------
+    def _should_restart(self, cost: np.ndarray) -> bool:
+        n = self.dim
+        hist_len = 10 + int(math.ceil(30.0 * n / self.popsize))
+        recent = self._best_hist[-hist_len:]
+        if len(self._best_hist) >= hist_len:
+            span = max(np.max(recent), np.max(cost)) - min(np.min(recent), np.min(cost))
+            if span < self.tolfun:
+                return True
+        if self.sigma * max(np.max(self.D), np.max(np.abs(self.pc))) < self.tolx:
+            return True
+        if np.max(self.D) > 1e7 * np.min(self.D):  # cond(C) > 1e14
+            return True
+        # adding 0.2 std in a coordinate does not move the mean
+        if np.any(self.mean == self.mean + 0.2 * self.sigma * np.sqrt(np.diag(self.C))):
+            return True
+        return False
+
+    def _restart(self) -> None:
+        if self.restarts_done >= self.restarts:
+            return
+        self.restarts_done += 1
+        self.popsize = int(round(self.popsize * self.incpopsize))
+        self._start(self.rng.uniform(0.0, 1.0, self.dim))
+
+    def state(self) -> Dict[str, Any]:
+        """ current distribution in packed coordinates, for logging """
+        return {
+            "generation": self.generation,
+            "restarts": self.restarts_done,
+            "popsize": self.popsize,
+            "sigma": self.sigma,
+            "mean": self.lo + self.mean * (self.hi - self.lo),
+        }
+
+
+class BayesianSolver(Solver):
+    """
+    Bayesian optimization with a Gaussian process surrogate (NumPy/SciPy only).
+
+    Kernel: Matern 5/2 with one length scale per continuous (and integer)
+    param on the unit box, times exp(-lambda_c [c != c']) per categorical
+    param, plus a small noise term. Every unit box coordinate is first warped
+    by a Kumaraswamy CDF 1 - (1 - u^a)^b (Snoek et al. 2014), so the GP can
+    resolve features next to a bound, e.g. Base1's narrow TSF peak at small
+    d_mrl next to the drop to zero at d_mrl -> 0. Hyperparameters (warping
+    included) are fitted by maximum marginal likelihood every `refit_every`
+    new points. In between, tell()
+    extends the Cholesky factor by one row per point (O(n^2) instead of a new
+    O(n^3) factorization).
+
+    Pickles (and checkpoints) leave the O(n^2) factor out: it is rebuilt on
+    load by the same full factorization and row appends, so it is bit for bit
+    the factor of the pickled solver.
+
+    ask(n) returns a batch picked by local penalization: expected improvement
+    is maximized, then multiplied by a penalty around every point already in
+    the batch (radius from the GP mean and a Lipschitz estimate), and
+    maximized again.
+
+    :param n_init: random points before the GP is used, default 2 d + 1
+    :param refit_every: hyperparameter refit after this many new points
+    :param n_candidates: random candidates per acquisition maximization
+    :param xi: EI exploration margin (in standardized units)
+    """
+    def __init__(self,
+                 problem: OptimizationProblemProtocol,
+                 maximize: bool = True,
+                 batch_size: int = 1,
+                 seed: Optional[int] = None,
+                 n_init: Optional[int] = None,
+                 refit_every: int = 10,
+                 n_candidates: int = 2000,
+                 xi: float = 0.01,
+                 ) -> None:
+        super().__init__(problem, maximize, batch_size, seed)
+        params = self.space.params
+        self._cat = np.array([isinstance(p, CategoricalParam) for p in params])
+        self._cont = ~self._cat
+        self.lo, self.hi = self.space.relaxed_bounds()
+        self.n_init = int(n_init) if n_init is not None else 2 * len(params) + 1
+        self.refit_every = int(refit_every)
+        self.n_candidates = int(n_candidates)
+        self.xi = float(xi)
+
+    # ------------- coordinates -------------
+    def _encode(self, thetas: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """ packed points -> (unit box continuous coords, categorical indices) """
+        thetas = np.atleast_2d(thetas)
+        c = self._cont
+        return (thetas[:, c] - self.lo[c]) / (self.hi[c] - self.lo[c]), thetas[:, self._cat]
+
+    def _decode(self, U: np.ndarray, cats: np.ndarray) -> np.ndarray:
+        thetas = np.empty((U.shape[0], len(self.space)))
+        c = self._cont
+        thetas[:, c] = self.lo[c] + np.clip(U, 0.0, 1.0) * (self.hi[c] - self.lo[c])
+        thetas[:, self._cat] = cats
+        return self.space.clip_batch(thetas)
+
+    @property
+    def _U(self) -> np.ndarray:
+        """ (n, continuous) unit box coords of the told points """
+        return self._Ubuf[:self._n_data]
+
+    @property
+    def _C(self) -> np.ndarray:
+        """ (n, categorical) choice indices of the told points """
+        return self._Cbuf[:self._n_data]
+
+    def _grow(self, n_min: int) -> None:
+        cap = max(1, self._Ubuf.shape[0])
+        while cap < n_min:
+            cap *= 2
+        if cap == self._Ubuf.shape[0]:
+            return
+        U, C = np.empty((cap, self._Ubuf.shape[1])), np.empty((cap, self._Cbuf.shape[1]))
+        U[:self._n_data], C[:self._n_data] = self._U, self._C
+        self._Ubuf, self._Cbuf = U, C
+
+    # ------------- kernel -------------
+    def _unpack_hyp(self, h: np.ndarray) -> Tuple[np.ndarray, np.ndarray, float, float]:
+        nc, ncat = int(self._cont.sum()), int(self._cat.sum())
+        e = np.exp(h)
+        # length scales, cat lambdas, signal var, noise var (the warping follows, see _warp)
+        return e[:nc], e[nc:nc + ncat], e[nc + ncat], e[nc + ncat + 1]
+
+    def _warp(self, U: np.ndarray, h: np.ndarray) -> np.ndarray:
+        nc = int(self._cont.sum())
+        e = np.exp(h[len(h) - 2 * nc:])
+        a, b = e[:nc], e[nc:]
+        return 1.0 - (1.0 - np.clip(U, 0.0, 1.0) ** a) ** b
+
+    def _kernel(self, U1, C1, U2, C2, h: Optional[np.ndarray] = None) -> np.ndarray:
+        h = self.hyp if h is None else h
+        ell, lam, s2, _ = self._unpack_hyp(h)
+        U1, U2 = self._warp(U1, h), self._warp(U2, h)
+        d2 = np.zeros((U1.shape[0], U2.shape[0]))
+        for j in range(U1.shape[1]):
+            d2 += ((U1[:, j, None] - U2[None, :, j]) / ell[j])**2
+        r5 = np.sqrt(5.0 * d2)
+        K = s2 * (1.0 + r5 + r5 * r5 / 3.0) * np.exp(-r5)
+        for j in range(C1.shape[1]):
+            K *= np.exp(-lam[j] * (C1[:, j, None] != C2[None, :, j]))
+        return K
+
+    def _neg_lml(self, h: np.ndarray) -> float:
+        n = self._U.shape[0]
+        K = self._kernel(self._U, self._C, self._U, self._C, h)
+        K[np.diag_indices(n)] += self._unpack_hyp(h)[3] + 1e-10
+        try:
+            L = np.linalg.cholesky(K)
+        except np.linalg.LinAlgError:
+            return 1e25
+        alpha = cho_solve((L, True), self._ys)
+        return float(0.5 * self._ys @ alpha + np.log(np.diag(L)).sum() + 0.5 * n * math.log(2 * math.pi))
+
+    def _refit(self) -> None:
+        """ max marginal likelihood hyperparameters, then a full factorization """
+        y = self._cost_arr()
+        self._y_mean, self._y_std = float(y.mean()), float(y.std()) or 1.0
+        self._ys = (y - self._y_mean) / self._y_std
+        nc, ncat = int(self._cont.sum()), int(self._cat.sum())
+        bounds = [(math.log(1e-2), math.log(1e1))] * nc + [(math.log(1e-3), math.log(1e2))] * ncat \
+            + [(math.log(1e-2), math.log(1e2)), (math.log(1e-8), math.log(1e-1))] \
+            + [(math.log(0.2), math.log(5.0))] * (2 * nc)
+        res = minimize(self._neg_lml, self.hyp, method="L-BFGS-B", bounds=bounds, options={"maxiter": 50})
+        if np.isfinite(res.fun):
+            self.hyp = res.x
+        self._factorize()
+        self._since_refit = 0
+
+    def _factorize(self, n: Optional[int] = None) -> None:
+        """ full factorization of the first n points (default all) """
+        n = self._U.shape[0] if n is None else n
+        U, C = self._U[:n], self._C[:n]
+        K = self._kernel(U, C, U, C)
+        K[np.diag_indices(n)] += self._unpack_hyp(self.hyp)[3] + 1e-10
+        self._L = np.linalg.cholesky(K)
+        self._n_factorized = n
+
+    def _chol_append(self, u: np.ndarray, c: np.ndarray) -> bool:
+        """ extend the Cholesky factor by one point (the data already contains it) """
+        n = self._L.shape[0]
+        k = self._kernel(self._U[:n], self._C[:n], u[None], c[None])[:, 0]
+        _, _, s2, noise = self._unpack_hyp(self.hyp)
+        kss = s2 + noise + 1e-10
+        l = solve_triangular(self._L, k, lower=True)
+        d2 = kss - l @ l
+        if d2 <= 1e-12:
+            return False  # (near) duplicate: caller refactorizes
+        L = np.zeros((n + 1, n + 1))
+        L[:n, :n] = self._L
+        L[n, :n] = l
+        L[n, n] = math.sqrt(d2)
+        self._L = L
+        return True
+
+    # ------------- GP prediction / acquisition -------------
+    def _cost_arr(self) -> np.ndarray:
+        return self._minimized(np.asarray(self._Y, dtype=float))
+
+    def _predict(self, U: np.ndarray, C: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """ posterior mean and std in standardized cost units """
+        Ks = self._kernel(U, C, self._U, self._C)
+        mu = Ks @ self._alpha
+        v = solve_triangular(self._L, Ks.T, lower=True)
+        var = self._unpack_hyp(self.hyp)[2] - np.sum(v * v, axis=0)
+        return mu, np.sqrt(np.maximum(var, 1e-12))
+
+    def _ei(self, U: np.ndarray, C: np.ndarray) -> np.ndarray:
+        mu, sd = self._predict(U, C)
+        imp = self._ys_best - mu - self.xi
+        z = imp / sd
+        return imp * ndtr(z) + sd * np.exp(-0.5 * z * z) / math.sqrt(2 * math.pi)
+
+    def _penalty(self, U, C, batch: List[Tuple[np.ndarray, np.ndarray, float, float]], lipschitz: float) -> np.ndarray:
+        """ local penalization (Gonzalez et al. 2016) around the points already in the batch """
+        pen = np.ones(U.shape[0])
+        for u_j, c_j, mu_j, sd_j in batch:
+            same = np.all(C == c_j, axis=1)  # other categories are not penalized
+            dist = np.linalg.norm(U - u_j, axis=1)
+            # in cost units: the ball around x_j where f can't beat the best
+            z = (lipschitz * dist - (mu_j - self._ys_best)) / (math.sqrt(2.0) * sd_j)
+            pen = np.where(same, pen * 0.5 * erfc(-z), pen)
+        return pen
+
+    def _lipschitz(self, U: np.ndarray, C: np.ndarray) -> float:
+        """ max norm of the GP mean gradient over the candidates (central differences) """
+        h = 1e-4
+        grads = np.zeros_like(U)
+        for j in range(U.shape[1]):
+            e = np.zeros(U.shape[1]); e[j] = h
+            grads[:, j] = (self._predict(U + e, C)[0] - self._predict(U - e, C)[0]) / (2 * h)
+        return max(float(np.max(np.linalg.norm(grads, axis=1))), 1e-7)
+
+    def _candidates(self) -> Tuple[np.ndarray, np.ndarray]:
+        U, C = self._encode(self.space.sample(self.n_candidates, self.rng))
+        # plus local perturbations of the best points so far
+        top = np.argsort(self._ys)[:5]
+        n_loc = self.n_candidates // 4
+        idx = self.rng.choice(top, size=n_loc)
+        U_loc = np.clip(self._U[idx] + 0.05 * self.rng.standard_normal((n_loc, U.shape[1])), 0.0, 1.0)
+        return np.vstack([U, U_loc]), np.vstack([C, self._C[idx]])
+
+    def _maximize_acq(self, batch, lipschitz: float, U: np.ndarray, C: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        def acq(U_, C_):
+            a = self._ei(U_, C_)
+            return a * self._penalty(U_, C_, batch, lipschitz) if batch else a
+
+        values = acq(U, C)
+        best_u, best_c, best_v = U[np.argmax(values)], C[np.argmax(values)], float(np.max(values))
+        # local refinement of the continuous coordinates, categories fixed
+        if U.shape[1] > 0:
+            for i in np.argsort(values)[::-1][:3]:
+                c = C[i]
+                res = minimize(lambda u: -float(acq(u[None], c[None])[0]), U[i],
+                               method="L-BFGS-B", bounds=[(0.0, 1.0)] * U.shape[1], options={"maxiter": 30})
+                if -res.fun > best_v:
+                    best_u, best_c, best_v = np.clip(res.x, 0.0, 1.0), c, -res.fun
+        return best_u, best_c
+
+    # ------------- ask / tell -------------
+    def reset(self) -> None:
+        self._X = []
+        self._Y = []
+        self._x_best = None
+        self._y_best = None
+        nc, ncat = int(self._cont.sum()), int(self._cat.sum())
+        # warping starts as the identity (a = b = 1)
+        self.hyp = np.log(np.concatenate([np.full(nc, 0.3), np.ones(ncat), [1.0, 1e-6], np.ones(2 * nc)]))
+        # told points in preallocated buffers (doubled when full), _U / _C are views
+        self._Ubuf = np.empty((64, nc))
+        self._Cbuf = np.empty((64, ncat))
+        self._n_data = 0
+        self._L: Optional[np.ndarray] = None
+        self._n_factorized = 0
+        self._since_refit = 0
+
+    def ask(self, n: int = 1) -> List[np.ndarray]:
+        if len(self._Y) < self.n_init:
+            return list(self.space.sample(n, self.rng))
+        if self._L is None or self._since_refit >= self.refit_every:
+            self._refit()
+
+        # data standardized with the mean/std of the last refit
+        self._ys = (self._cost_arr() - self._y_mean) / self._y_std
+        self._alpha = cho_solve((self._L, True), self._ys)
+        self._ys_best = float(self._ys.min())
+
+        U, C = self._candidates()
+        lipschitz = self._lipschitz(U[:500], C[:500]) if n > 1 else 0.0
+        batch: List[Tuple[np.ndarray, np.ndarray, float, float]] = []
+        for _ in range(n):
+            u, c = self._maximize_acq(batch, lipschitz, U, C)
+            mu, sd = self._predict(u[None], c[None])
+            batch.append((u, c, float(mu[0]), float(sd[0])))
+        return list(self._decode(np.array([b[0] for b in batch]), np.array([b[1] for b in batch])))
+
+    def tell(self, thetas: List[np.ndarray], values: Sequence[Any]) -> None:
+        if len(thetas) == 0:
+            return
+        thetas = np.asarray(thetas, dtype=float)
+        for x_dict, val in zip(self.space.unpack_batch(thetas), values):
+            self._update_best(x_dict, val)
+        self._X.extend(thetas)
+        self._Y.extend(float(v) for v in values)
+
+        U, C = self._encode(thetas)
+        self._grow(self._n_data + len(U))
+        for u, c in zip(U, C):
+            self._Ubuf[self._n_data] = u
+            self._Cbuf[self._n_data] = c
+            self._n_data += 1
+            if self._L is not None and not self._chol_append(u, c):
+                self._factorize()
+            self._since_refit += 1
+
+    # ------------- pickling -------------
+    def __getstate__(self) -> Dict[str, Any]:
+        state = dict(self.__dict__)
+        # derived from the data, rebuilt in __setstate__ / recomputed by ask
+        state["_L"] = self._L is not None
+        state["_Ubuf"], state["_Cbuf"] = self._U.copy(), self._C.copy()
+        for name in ("_alpha", "_ys", "_ys_best"):
+            state.pop(name, None)
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        if not self._L:
+            self._L = None
+            return
+        # replay: the last full factorization, then the appends tell() made since
+        n = self._U.shape[0]
+        self._factorize(self._n_factorized)
+        for i in range(self._n_factorized, n):
+            if not self._chol_append(self._U[i], self._C[i]):
+                self._factorize(i + 1)
+
+
+class DifferentialEvolutionSolver(PopulationSolver):
+    """
+    Differential evolution with deferred (generation wise) updating, the
+    setup of scipy.optimize.differential_evolution(updating="deferred") used
+    in the notebooks, but as a PopulationSolver: every generation is one
+    ask(popsize) batch, so it runs through any evaluator and Solver.run.
+
+    Works in the unit box of search_space.relaxed_bounds(). Mutant
+    coordinates outside the box are redrawn uniformly (as scipy does) and the
+    stored genes are the clipped (evaluated) points.
+
+    :param strategy: "best1bin", "rand1bin", "currenttobest1bin", "best2bin" or "rand2bin"
+    :param popsize: population size, default 15 * d
+    :param mutation: F, or (lo, hi) for dithering: F ~ U(lo, hi) per generation
+    :param recombination: crossover prob CR
+    :param init: "latinhypercube" or "random"
+    :param tol, atol: converged when std(values) <= atol + tol * |mean(values)| (tol=0, atol=0 disables)
+    :param max_time: wall-clock budget in seconds per run, None for no limit
+        (a run resumed from a checkpoint starts its clock over)
+
+    Once converged or out of time ask() returns no points, which ends run().
+    """
+    STRATEGIES = ("best1bin", "rand1bin", "currenttobest1bin", "best2bin", "rand2bin")
+
+    def __init__(self,
+                 problem: OptimizationProblemProtocol,
+                 maximize: bool = True,
+                 batch_size: Optional[int] = None,
+                 seed: Optional[int] = None,
+                 strategy: str = "best1bin",
+                 popsize: Optional[int] = None,
+                 mutation: float | Tuple[float, float] = (0.5, 1.0),
+                 recombination: float = 0.7,
+                 init: str = "latinhypercube",
+                 tol: float = 0.01,
+                 atol: float = 0.0,
+                 max_time: Optional[float] = None,
+                 ) -> None:
+        if strategy not in self.STRATEGIES:
+            raise ValueError(f"unknown strategy {strategy!r}, use one of {list(self.STRATEGIES)}")
+        if init not in ("latinhypercube", "random"):
+            raise ValueError(f"unknown init {init!r}, use 'latinhypercube' or 'random'")
+        super().__init__(problem, maximize, batch_size, seed)
+        self.dim = len(self.space)
+        self.lo, self.hi = self.space.relaxed_bounds()
+        self.strategy = strategy
+        self.popsize = int(popsize) if popsize is not None else 15 * self.dim
+        if self.popsize < 5:
+            raise ValueError("DifferentialEvolutionSolver needs popsize >= 5")
+        self.mutation = mutation
+        self.recombination = float(recombination)
+        self.init = init
+        self.tol = float(tol)
+        self.atol = float(atol)
+        self.max_time = max_time
+
+    # ------------- coordinates -------------
+    def _to_unit(self, thetas: np.ndarray) -> np.ndarray:
+        return (np.asarray(thetas, dtype=float) - self.lo) / (self.hi - self.lo)
+
+    def _from_unit(self, ys: np.ndarray) -> np.ndarray:
+        return self.space.clip_batch(self.lo + ys * (self.hi - self.lo))
+
+    # ------------- state -------------
+    def _init_state(self) -> None:
+        self._pop_unit: Optional[np.ndarray] = None
+        self._cost: Optional[np.ndarray] = None
+        self.converged = False
+        self._t0 = time.monotonic()
+
+    def _init_population(self) -> np.ndarray:
+        n, d = self.popsize, self.dim
+        if self.init == "random":
+            return self.rng.uniform(0.0, 1.0, (n, d))
+        # one sample per stratum in every coordinate, strata shuffled per coordinate
+        strata = np.argsort(self.rng.random((n, d)), axis=0)
+        return (strata + self.rng.uniform(0.0, 1.0, (n, d))) / n
+
+    def _after_resume(self) -> None:
+        # the checkpointed clock reading is from another process (or machine)
+        self._t0 = time.monotonic()
+
+    def _stopped(self) -> bool:
+        if self.converged:
+            return True
+        return self.max_time is not None and time.monotonic() - self._t0 > self.max_time
+
+    def ask(self, n: int = 1) -> List[np.ndarray]:
+        # only stop between generations, a started one is always handed out
+        if self._thetas is None and self._stopped():
+            return []
+        return super().ask(n)
+
+    # ------------- ask / tell steps -------------
+    def _mutants(self, F: float) -> np.ndarray:
+        pop, n = self._pop_unit, self.popsize
+        n_rand = 5 if self.strategy.endswith("2bin") else 3
+        # n_rand distinct members per row, all different from the row itself
+        r = np.argsort(self.rng.random((n, n - 1)), axis=1)[:, :n_rand]
+        r = r + (r >= np.arange(n)[:, None])
+        best = pop[np.argmin(self._cost)]
+
+        if self.strategy == "best1bin":
+            return best + F * (pop[r[:, 0]] - pop[r[:, 1]])
+        if self.strategy == "rand1bin":
+            return pop[r[:, 0]] + F * (pop[r[:, 1]] - pop[r[:, 2]])
+        if self.strategy == "currenttobest1bin":
+            return pop + F * (best - pop + pop[r[:, 0]] - pop[r[:, 1]])
+        if self.strategy == "best2bin":
+            return best + F * (pop[r[:, 0]] + pop[r[:, 1]] - pop[r[:, 2]] - pop[r[:, 3]])
+        return pop[r[:, 0]] + F * (pop[r[:, 1]] + pop[r[:, 2]] - pop[r[:, 3]] - pop[r[:, 4]])
+
+    def _generate(self) -> Tuple[np.ndarray, np.ndarray]:
+        if self._pop_unit is None:
+            ys = self._init_population()
+        else:
+            n, d = self.popsize, self.dim
+            if isinstance(self.mutation, (tuple, list)):
+                F = float(self.rng.uniform(*self.mutation))
+            else:
+                F = float(self.mutation)
+            mutant = self._mutants(F)
+
+            # binomial crossover, at least one coordinate from the mutant
+            take = self.rng.random((n, d)) < self.recombination
+            take[np.arange(n), self.rng.integers(0, d, n)] = True
+            ys = np.where(take, mutant, self._pop_unit)
+
+            out = (ys < 0.0) | (ys > 1.0)
+            ys[out] = self.rng.uniform(0.0, 1.0, int(out.sum()))
+        thetas = self._from_unit(ys)
+        return self._to_unit(thetas), thetas
+
+    def _update(self, pop: np.ndarray, thetas: np.ndarray, values: np.ndarray) -> None:
+        cost = self._minimized(values)
+        if self._pop_unit is None:
+            self._pop_unit, self._cost = pop.copy(), cost
+        else:
+            better = cost <= self._cost
+            self._pop_unit[better] = pop[better]
+            self._cost[better] = cost[better]
+
+        if self.tol > 0.0 or self.atol > 0.0:
+            spread = np.std(self._cost)
+            self.converged = bool(spread <= self.atol + self.tol * abs(np.mean(self._cost)))
+
+    def state(self) -> Dict[str, Any]:
+        """ population summary, for logging """
+        return {
+            "generation": self.generation,
+            "popsize": self.popsize,
+            "converged": self.converged,
+            "elapsed": time.monotonic() - self._t0,
+            "best_cost": None if self._cost is None else float(self._cost.min()),
+            "spread": None if self._cost is None else float(np.std(self._cost)),
+        }
@@ -0,0 +1,219 @@
+"""
+Persistent evaluation store shared across runs and processes.
+
+Values are kept in a SQLite database (WAL mode, so many readers and one
+writer at a time, other writers wait up to `timeout` seconds). Rows are keyed
+by the problem fingerprint, the objective name and the quantized packed point
+(see solvers.cache.quantize_key), so one file can hold several problems and
+only identical problem definitions share values.
+
+    problem = StoredProblem(Base1OptimizationProblem(...), "evals.sqlite")
+    solver = RandomSearchSolver(problem)   # asks the store before evaluating
+
+StoredProblem can be combined with CachedProblem (in-memory LRU in front of
+the store) and is picklable, every worker process opens its own connection.
+"""
+
+import json
+import os
+import sqlite3
+from pathlib import Path
+from typing import Any, Dict, Hashable, Iterable, List, Mapping, Optional, Sequence, Tuple
+import numpy as np
+
+from problems.interfaces import OptimizationProblemProtocol
+from solvers.cache import quantize_key
+from solvers.search_space import SearchSpace
+
+
+def problem_fingerprint(problem: OptimizationProblemProtocol) -> str:
+    """ problem.fingerprint() if the problem provides one """
+    fingerprint = getattr(problem, "fingerprint", None)
+    if fingerprint is None:
+        raise TypeError(
+            f"{type(problem).__name__} has no fingerprint(), pass problem_key explicitly"
+        )
+    return str(fingerprint())
+
+
+class EvaluationStore:
+    """
+    path: SQLite file, created if missing
+    problem_key: fingerprint of the problem definition
+    timeout: seconds to wait for a lock held by another writer
+    """
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS evaluations (
+            problem   TEXT NOT NULL,
+            objective TEXT NOT NULL,
+            key       TEXT NOT NULL,
+            value     REAL NOT NULL,
+            PRIMARY KEY (problem, objective, key)
+        ) WITHOUT ROWID
+    """
+
+    def __init__(self, path: str | os.PathLike, problem_key: str, timeout: float = 30.0) -> None:
+        self.path = Path(path)
+        self.problem_key = str(problem_key)
+        self.timeout = float(timeout)
+        self._conn: Optional[sqlite3.Connection] = None
+        self._pid: Optional[int] = None
+        self._connection()  # create the file and table right away
+
+    def _connection(self) -> sqlite3.Connection:
+        # one connection per process (connections must not cross a fork)
+        if self._conn is None or self._pid != os.getpid():
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), timeout=self.timeout, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(self._SCHEMA)
+            conn.commit()
+            self._conn, self._pid = conn, os.getpid()
+        return self._conn
+
+    @staticmethod
+    def encode_key(key: Sequence[Hashable]) -> str:
+        # json keeps floats exact (repr round trip)
+        return json.dumps(list(key))
+
+    def get_many(self, keys: Iterable[Sequence[Hashable]], objective: str = "TSF") -> Dict[str, float]:
+        """ encoded key -> value for the keys that are stored """
+        encoded = [self.encode_key(k) for k in keys]
+        found: Dict[str, float] = {}
+        conn = self._connection()
+        # stay below SQLite's limit on bound parameters
+        for i in range(0, len(encoded), 500):
+            chunk = encoded[i:i + 500]
+            rows = conn.execute(
+                f"SELECT key, value FROM evaluations WHERE problem = ? AND objective = ? "
+                f"AND key IN ({','.join('?' * len(chunk))})",
+                [self.problem_key, objective.upper(), *chunk],
+            ).fetchall()
+            found.update(rows)
+        return found
+
+    def put_many(self, items: Iterable[Tuple[Sequence[Hashable], float]], objective: str = "TSF") -> None:
+        rows = [(self.problem_key, objective.upper(), self.encode_key(k), float(v)) for k, v in items]
+        if not rows:
+            return
+        conn = self._connection()
+        with conn:
+            # another process may have stored the same point meanwhile, same value
+            conn.executemany("INSERT OR IGNORE INTO evaluations VALUES (?, ?, ?, ?)", rows)
+
+    def __len__(self) -> int:
+        (n,) = self._connection().execute(
+            "SELECT COUNT(*) FROM evaluations WHERE problem = ?", (self.problem_key,)
+        ).fetchone()
+        return int(n)
+
+    def close(self) -> None:
+        if self._conn is not None and self._pid == os.getpid():
+            self._conn.close()
+        self._conn, self._pid = None, None
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = dict(self.__dict__)
+        state["_conn"], state["_pid"] = None, None
+        return state
+
+
+class StoredProblem(OptimizationProblemProtocol):
+    """
+    Problem wrapper that looks every point up in an EvaluationStore before
+    evaluating it and stores what it had to evaluate.
+
+    problem: the wrapped problem
+    path: SQLite file
+    tolerances: per-param quantization step of the keys (see quantize_key)
+    problem_key: defaults to problem.fingerprint()
+    """
+    def __init__(
+            self,
+            problem: OptimizationProblemProtocol,
+            path: str | os.PathLike,
+            tolerances: Optional[Mapping[str, float]] = None,
+            problem_key: Optional[str] = None,
+            timeout: float = 30.0,
+            ) -> None:
+        self._problem = problem
+        self._space: SearchSpace = problem.search_space
+        self.tolerances: Dict[str, float] = dict(tolerances or {})
+        key = problem_key if problem_key is not None else problem_fingerprint(problem)
+        self.store = EvaluationStore(path, key, timeout=timeout)
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def problem(self) -> OptimizationProblemProtocol:
+        return self._problem
+
+    @property
+    def name(self) -> str:
+        return self._problem.name
+
+    @property
+    def search_space(self) -> SearchSpace:
+        return self._space
+
+    def __getattr__(self, attr: str) -> Any:
+        if attr.startswith("__") or attr == "_problem":
+            raise AttributeError(attr)
+        return getattr(self._problem, attr)
+
+    def warmup(self) -> None:
+        """ open this process' connection, then warm up the wrapped problem """
+        self.store._connection()
+        warmup = getattr(self._problem, "warmup", None)
+        if callable(warmup):
+            warmup()
+
+    def _key(self, theta: np.ndarray) -> Tuple[Hashable, ...]:
+        return quantize_key(self._space, self._space.clip(theta), self.tolerances)
+
+    def evaluate_objective(
+            self,
+            *,
+            objective: str = "TSF",
+            return_breakdown: bool = False,
+            **kwargs: Any,
+            ) -> float | Dict[str, Any]:
+        if return_breakdown:
+            return self._problem.evaluate_objective(objective=objective, return_breakdown=True, **kwargs)
+
+        key = self._key(self._space.pack(kwargs))
+        found = self.store.get_many([key], objective)
+        if found:
+            self.hits += 1
+            return next(iter(found.values()))
+        self.misses += 1
+        value = float(self._problem.evaluate_objective(objective=objective, **kwargs))
+        self.store.put_many([(key, value)], objective)
+        return value
+
+    def evaluate_batch(self, thetas: np.ndarray) -> np.ndarray:
+        thetas = np.atleast_2d(np.asarray(thetas, dtype=float))
+        keys = [quantize_key(self._space, theta, self.tolerances) for theta in self._space.clip_batch(thetas)]
+        found = self.store.get_many(keys)
+
+        values = np.empty(thetas.shape[0])
+        missing: Dict[str, List[int]] = {}
+        missing_keys: Dict[str, Tuple[Hashable, ...]] = {}
+        for i, key in enumerate(keys):
+            encoded = EvaluationStore.encode_key(key)
+            if encoded in found:
+                values[i] = found[encoded]
+            else:
+                missing.setdefault(encoded, []).append(i)
+                missing_keys[encoded] = key
+        self.hits += thetas.shape[0] - sum(len(idx) for idx in missing.values())
+        self.misses += len(missing)
+
+        if missing:
+            rows = [idx[0] for idx in missing.values()]
+            new_values = np.asarray(self._problem.evaluate_batch(thetas[rows]), dtype=float)
+            for idx, value in zip(missing.values(), new_values):
+                values[idx] = value
+            self.store.put_many(zip((missing_keys[e] for e in missing), new_values))
+        return values
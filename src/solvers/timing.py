@@ -0,0 +1,82 @@
+"""
+Hot-path timing
+
+TIMINGS is a process wide accumulator of wall time per named phase. The
+objective code and Solver.run wrap their stages in `with TIMINGS.phase(name)`,
+which does nothing while TIMINGS is disabled (the default), so it can stay
+in the hot path. TimingCallback (solvers.callback) enables it for one run.
+
+Phases (Base1 and Solver.run):
+    stack            MRL SLDs and grouping of the batch by cap
+    parratt_up/dn    Parratt recursion per spin (shared part and per SOI)
+    sensitivity      S(Q) from the reflectivities
+    fom              SFM / MCF integration and the TSF terms
+    solver.ask, solver.tell, evaluate, history   the run loop itself
+
+Only the calling process is timed: with a ProcessPoolEvaluator the physics
+phases run in the workers and only "evaluate" shows up here.
+"""
+
+import time
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+from typing import Any, Dict, Iterator, Optional
+
+
+class Timings:
+    def __init__(self) -> None:
+        self.enabled = False
+        self.total: Dict[str, float] = defaultdict(float)
+        self.calls: Dict[str, int] = defaultdict(int)
+        self._null = nullcontext()
+
+    def reset(self) -> None:
+        self.total.clear()
+        self.calls.clear()
+
+    def add(self, name: str, seconds: float) -> None:
+        self.total[name] += seconds
+        self.calls[name] += 1
+
+    @contextmanager
+    def _timed(self, name: str) -> Iterator[None]:
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - t0)
+
+    def phase(self, name: str) -> Any:
+        if not self.enabled:
+            return self._null
+        return self._timed(name)
+
+    def report(self, n_evals: Optional[int] = None) -> Dict[str, Dict[str, float]]:
+        """
+        phase -> {"total_s", "calls", "per_eval_s", "share"}, sorted by total
+        time. share is relative to the sum over the run loop phases (solver.*,
+        evaluate, history) when they were timed, else to the sum of all phases.
+        """
+        loop = [k for k in self.total if k.startswith("solver.") or k in ("evaluate", "history")]
+        wall = sum(self.total[k] for k in (loop or self.total)) or 1.0
+        out: Dict[str, Dict[str, float]] = {}
+        for name in sorted(self.total, key=self.total.get, reverse=True):
+            out[name] = {
+                "total_s": self.total[name],
+                "calls": self.calls[name],
+                "per_eval_s": self.total[name] / n_evals if n_evals else float("nan"),
+                "share": self.total[name] / wall,
+            }
+        return out
+
+    def format(self, n_evals: Optional[int] = None) -> str:
+        lines = [f"{'phase':14s} {'total [s]':>10s} {'calls':>8s} {'per eval [us]':>14s} {'share':>7s}"]
+        for name, r in self.report(n_evals).items():
+            lines.append(
+                f"{name:14s} {r['total_s']:10.4f} {int(r['calls']):8d} "
+                f"{1e6 * r['per_eval_s']:14.2f} {100 * r['share']:6.1f}%"
+            )
+        return "\n".join(lines)
+
+
+TIMINGS = Timings()
@@ -0,0 +1,22 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+SRC = Path(__file__).resolve().parents[1] / "src"
+if str(SRC) not in sys.path:
+    sys.path.insert(0, str(SRC))
+
+from data.materials_loader import load_base1_materials
+from problems.base1 import Base1OptimizationProblem, Bounds, SOISpec
+
+
+@pytest.fixture(scope="session")
+def problem() -> Base1OptimizationProblem:
+    """ small Base1: data.json materials, two SOIs, 200 Q points """
+    materials = load_base1_materials("data.json")
+    sois = [SOISpec("a", 2.0, 50.0, 3.0), SOISpec("b", 4.0, 30.0, 3.0)]
+    return Base1OptimizationProblem(
+        materials, sois, np.linspace(0.01, 0.2, 200), Bounds(0.0, 1.0), Bounds(10.0, 300.0), Bounds(0.0, 100.0),
+    )
@@ -0,0 +1,77 @@
+"""
+Base1 figures of merit from the shared-prefix recursion and the fixed tables
+against the straightforward path: four reflectivity calls per SOI on the
+stacks built by layers_with_mrl.
+"""
+import copy
+
+import numpy as np
+import pytest
+
+from data.materials_loader import load_base1_materials
+from physics.fom import mcf, sensitivity, sfm, tsf
+from physics.reflectometry import reflectivity
+from problems.base1 import Base1OptimizationProblem, Bounds, CapSpec, SOISpec
+
+
+def _problem(weight_fn=None):
+    materials = copy.deepcopy(load_base1_materials("data.json"))
+    materials.caps["none"] = CapSpec("none", 0.0, 0.0, 0.0)
+    sois = [SOISpec("thin", 2.0, 50.0, 3.0), SOISpec("dense", 4.0, 30.0, 5.0), SOISpec("rough", 1.0, 120.0, 10.0)]
+    return Base1OptimizationProblem(
+        materials, sois, np.geomspace(0.008, 0.25, 300), Bounds(0.0, 1.0), Bounds(10.0, 300.0), Bounds(0.0, 100.0),
+        weight_fn=weight_fn,
+    )
+
+
+def _reference(problem, x_coti, d_mrl, d_cap, cap):
+    """ (TSF, [(SFM_up, SFM_dn, MCF) per SOI]) the way evaluate_objective used to compute it """
+    Q = problem.Q
+    w = None if problem.weight_fn is None else problem.weight_fn(Q)
+    sub_up, sub_dn = problem._layers(x_coti, d_mrl, d_cap, cap, soi=None)
+    triplets = []
+    for soi in problem.soi_list:
+        full_up, full_dn = problem._layers(x_coti, d_mrl, d_cap, cap, soi=soi)
+        S_up = sensitivity(Q, reflectivity(Q, sub_up, bkg=1e-3), reflectivity(Q, full_up, bkg=1e-3))
+        S_dn = sensitivity(Q, reflectivity(Q, sub_dn, bkg=1e-3), reflectivity(Q, full_dn, bkg=1e-3))
+        triplets.append((sfm(Q, S_up, w=w), sfm(Q, S_dn, w=w), mcf(Q, S_up, S_dn, w=w)))
+    return float(tsf(triplets)), triplets
+
+
+DESIGNS = [
+    (0.7, 120.0, 30.0, "Au"),
+    (0.95, 40.0, 12.0, "SiO2"),
+    (0.5, 250.0, 80.0, "Al2O3"),
+    (0.8, 60.0, 25.0, "none"),          # no cap layer
+    (0.8, 60.0, 0.0, "Au"),             # zero thickness cap: no cap layer either
+    # out of bounds, clipped by the problem
+    (1.3, 5.0, -4.0, "SiO2"),
+    (-0.2, 400.0, 150.0, "Al2O3"),
+    (0.6, 500.0, 30.0, "none"),
+]
+
+
+@pytest.mark.parametrize("weighted", [False, True])
+def test_objective_matches_per_soi_reference(weighted):
+    problem = _problem(weight_fn=(lambda Q: Q ** 2) if weighted else None)
+    thetas = np.array([[x, d, c, problem.cap_choices.index(cap)] for x, d, c, cap in DESIGNS])
+    batch = problem.evaluate_batch(thetas)
+    foms = problem.evaluate_foms(thetas)
+
+    for row, (x, d, c, cap) in enumerate(DESIGNS):
+        value, triplets = _reference(problem, x, d, c, cap)
+        assert problem.evaluate_objective(x_coti=x, d_mrl=d, d_cap=c, cap=cap) == pytest.approx(value, rel=1e-10)
+        assert batch[row] == pytest.approx(value, rel=1e-10)
+        for soi, (sfm_up, sfm_dn, mcf_) in zip(problem.soi_list, triplets):
+            assert foms[f"SFM_up:{soi.name}"][row] == pytest.approx(sfm_up, rel=1e-10)
+            assert foms[f"SFM_dn:{soi.name}"][row] == pytest.approx(sfm_dn, rel=1e-10)
+            assert foms[f"MCF:{soi.name}"][row] == pytest.approx(mcf_, rel=1e-10)
+
+
+def test_tables_follow_rebuild():
+    problem = _problem()
+    design = dict(x_coti=0.7, d_mrl=120.0, d_cap=30.0, cap="Au")
+    problem.soi_list[0] = SOISpec("thin", 2.5, 70.0, 4.0)
+    problem.Q = np.geomspace(0.01, 0.2, 150)
+    problem.rebuild_tables()
+    assert problem.evaluate_objective(**design) == pytest.approx(_reference(problem, **design)[0], rel=1e-10)
@@ -0,0 +1,47 @@
+"""
+BayesianSolver: incremental Cholesky factor, growth of the data buffers,
+and that it beats random search on the standard Base1 setup.
+"""
+import copy
+
+import numpy as np
+
+from benchmarks.compare import standard_problem
+from solvers.random_search import RandomSearchSolver
+from solvers.single_obj import BayesianSolver
+
+
+def _refactorized(solver):
+    full = copy.deepcopy(solver)
+    full._factorize()
+    return full._L
+
+
+def test_incremental_factor_matches_full_factorization(problem):
+    solver = BayesianSolver(problem, seed=0, batch_size=4, n_candidates=200, refit_every=1000)
+    solver.run(100)
+    # one refit when the GP was first used, every point since was appended
+    assert solver._n_factorized < 20 and solver._L.shape == (100, 100)
+    np.testing.assert_allclose(solver._L, _refactorized(solver), rtol=0, atol=1e-10)
+
+
+def test_data_buffers_grow_by_doubling(problem):
+    solver = BayesianSolver(problem, seed=0, n_init=1000)
+    solver.reset()
+    capacities = set()
+    for _ in range(300):
+        thetas = solver.ask(1)
+        solver.tell(thetas, [0.0])
+        capacities.add(solver._Ubuf.shape[0])
+    assert capacities == {64, 128, 256, 512}
+    assert solver._U.shape == (300, 3) and solver._C.shape == (300, 1)
+    np.testing.assert_array_equal(solver._U, solver._encode(np.asarray(solver._X))[0])
+
+
+def test_beats_random_search_on_the_standard_problem():
+    problem = standard_problem()
+    bo, rs = [], []
+    for seed in range(4):
+        bo.append(BayesianSolver(problem, seed=seed, batch_size=4, n_candidates=200).run(80).y_best)
+        rs.append(RandomSearchSolver(problem, seed=seed, batch_size=4).run(80).y_best)
+    assert np.median(bo) > np.median(rs)
@@ -0,0 +1,78 @@
+"""
+CachedProblem: LRU eviction, quantized keys, hit / miss counters.
+"""
+import numpy as np
+
+from solvers.cache import CachedProblem, quantize_key
+
+
+class _Counting:
+    """ problem stub that counts evaluated rows, value = x_coti """
+    def __init__(self, problem):
+        self.search_space = problem.search_space
+        self.name = "counting"
+        self.rows = 0
+
+    def evaluate_batch(self, thetas):
+        self.rows += len(thetas)
+        return np.asarray(thetas, dtype=float)[:, 0].copy()
+
+    def evaluate_objective(self, *, objective="TSF", **x):
+        self.rows += 1
+        return float(x["x_coti"])
+
+
+def _theta(x, cap=0):
+    return np.array([x, 100.0, 10.0, cap])
+
+
+def test_lru_evicts_the_least_recently_used(problem):
+    cached = CachedProblem(_Counting(problem), maxsize=3)
+    a, b, c, d = (_theta(x) for x in (0.1, 0.2, 0.3, 0.4))
+    cached.evaluate_batch(np.array([a, b, c]))
+    cached.evaluate_batch(a[None])                  # a is now the most recent
+    cached.evaluate_batch(d[None])                  # evicts b, the least recent
+    assert cached.stats().evictions == 1
+    assert list(cached._cache) == [cached.key(k) for k in (c, a, d)]
+
+    rows = cached.problem.rows
+    cached.evaluate_batch(np.array([a, c, d]))
+    assert cached.problem.rows == rows              # all still cached
+    cached.evaluate_batch(b[None])
+    assert cached.problem.rows == rows + 1          # b was evicted
+
+
+def test_points_closer_than_the_quantum_share_an_entry(problem):
+    tolerances = {"x_coti": 1e-3, "d_mrl": 1e-2}
+    space = problem.search_space
+    t1 = np.array([0.5000, 100.000, 10.0, 1])
+    t2 = np.array([0.5003, 100.004, 10.0, 1])
+    t3 = np.array([0.5010, 100.000, 10.0, 1])
+    assert quantize_key(space, t1, tolerances) == quantize_key(space, t2, tolerances)
+    assert quantize_key(space, t1, tolerances) != quantize_key(space, t3, tolerances)
+    # without a tolerance the exact value is the key
+    assert quantize_key(space, t1) != quantize_key(space, t2)
+
+    cached = CachedProblem(_Counting(problem), tolerances=tolerances)
+    values = cached.evaluate_batch(np.array([t1, t2, t3]))
+    assert cached.problem.rows == 2
+    assert values[0] == values[1] == 0.5 and values[2] == 0.501
+
+
+def test_stats_after_a_repeated_batch(problem):
+    cached = CachedProblem(problem, maxsize=100)
+    thetas = problem.search_space.sample(20, np.random.default_rng(0))
+    thetas = np.concatenate([thetas, thetas[:5]])   # 5 repeats within the batch
+    first = cached.evaluate_batch(thetas)
+    stats = cached.stats()
+    assert (stats.hits, stats.misses, stats.size) == (5, 20, 20)
+
+    second = cached.evaluate_batch(thetas)
+    stats = cached.stats()
+    assert (stats.hits, stats.misses, stats.size, stats.evictions) == (30, 20, 20, 0)
+    assert stats.hit_rate == 30 / 50
+    np.testing.assert_array_equal(first, second)
+    np.testing.assert_array_equal(first, problem.evaluate_batch(thetas))
+
+    cached.clear()
+    assert cached.stats().hits == 0 and cached.stats().size == 0
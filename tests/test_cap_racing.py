@@ -0,0 +1,74 @@
+"""
+CapRacingSolver: successive halving drops the worse caps, the race stays
+within its evaluation budget.
+"""
+import numpy as np
+import pytest
+
+from solvers.callback import EarlyStoppingCallback
+from solvers.mixed_discrete import CapRacingSolver
+from solvers.random_search import RandomSearchSolver
+
+OFFSETS = np.array([1.0, 0.0, 2.0])    # per cap index: cap 1 is clearly worst, cap 2 best
+
+
+class _Offsets:
+    """ per-cap offset plus a small smooth term, maximized at x_coti = 0.5 """
+    name = "offsets"
+
+    def __init__(self, problem):
+        self.search_space = problem.search_space
+        self.caps = problem.search_space.params[3].choices
+
+    def evaluate_batch(self, thetas):
+        thetas = np.atleast_2d(thetas)
+        return OFFSETS[thetas[:, 3].astype(int)] - 0.1 * (thetas[:, 0] - 0.5) ** 2
+
+
+def _random(problem, maximize, seed):
+    return RandomSearchSolver(problem, maximize=maximize, batch_size=8, seed=seed)
+
+
+def test_worse_cap_is_dropped_after_the_first_round(problem):
+    caps = problem.search_space.params[3].choices
+    solver = CapRacingSolver(_Offsets(problem), seed=0, solver_factory=_random, min_evals=5)
+    solver.run(300)
+    # 3 caps, eta 2: rounds of 3, 2 and 1 arms
+    assert solver.n_rounds == 3 and solver.round == 2
+    first_quota = int(300 / 3 / 3)
+    assert solver.n_evals[1] == first_quota
+    # the best cap won and got most of the budget
+    assert [caps[a] for a in solver.active] == [caps[2]]
+    assert solver.n_evals[2] > solver.n_evals[0] > solver.n_evals[1]
+    assert solver.best()[1] == pytest.approx(2.0, abs=1e-3)
+
+
+def test_first_round_elimination_with_cma(problem):
+    solver = CapRacingSolver(_Offsets(problem), seed=0)
+    seen = []
+    end_round = solver._end_round
+
+    def recording_end_round():
+        end_round()
+        seen.append(list(solver.active))
+    solver._end_round = recording_end_round
+
+    solver.run(300)
+    assert seen[0] == [0, 2] and seen[-1] == [2]
+
+
+@pytest.mark.parametrize("evals", [20, 57, 300, 1001])
+@pytest.mark.parametrize("eta", [2.0, 3.0])
+def test_total_evaluations_stay_within_evals(problem, evals, eta):
+    solver = CapRacingSolver(_Offsets(problem), seed=1, eta=eta, min_evals=10)
+    result = solver.run(evals)
+    assert result.n_evals == len(result.history) == int(solver.n_evals.sum()) <= evals
+
+
+def test_no_budget_quotas_grow_by_eta(problem):
+    solver = CapRacingSolver(_Offsets(problem), seed=0, solver_factory=_random, min_evals=6)
+    result = solver.run(None, callbacks=[EarlyStoppingCallback(max_evals=200)])
+    assert result.n_evals == 200
+    # round 0: 6 each, round 1: 12 each for the two survivors, then cap 2 alone
+    assert solver.n_evals[1] == 6 and solver.n_evals[0] == 6 + 12
+    assert solver.n_evals[2] == 200 - 6 - 18
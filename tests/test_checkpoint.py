@@ -0,0 +1,71 @@
+"""
+A run interrupted after a checkpoint and resumed from it continues exactly
+as the uninterrupted run (same points, same values, same order).
+"""
+import numpy as np
+import pytest
+
+from solvers.callback import CheckpointCallback, EarlyStoppingCallback
+from solvers.grid_search import GridSearchSolver
+from solvers.mixed_discrete import CapRacingSolver
+from solvers.multi_obj import NSGA2Solver
+from solvers.random_search import RandomSearchSolver
+from solvers.single_obj import BayesianSolver, CMASolver, DifferentialEvolutionSolver
+
+# name -> (solver, evals, max_evals of the interrupted run). Random search and
+# BO draw their points per batch, so they are stopped on a batch boundary; the
+# others are stopped mid generation / mid batch.
+SOLVERS = {
+    "cma": (lambda p: CMASolver(p, seed=3), 300, 153),
+    "de": (lambda p: DifferentialEvolutionSolver(p, seed=3, popsize=12, tol=0.0), 300, 153),
+    "race": (lambda p: CapRacingSolver(p, seed=3), 300, 153),
+    "bayesian": (lambda p: BayesianSolver(p, seed=3, batch_size=4, n_candidates=300), 40, 24),
+    "grid": (lambda p: GridSearchSolver(p, n_points=5, batch_size=32), 300, 153),
+    "random": (lambda p: RandomSearchSolver(p, seed=3, batch_size=7), 300, 154),
+    "nsga2": (lambda p: NSGA2Solver(p, objectives=["TSF", "thickness"], maximize=[True, False], popsize=16, seed=3), 300, 153),
+}
+
+
+class _Crash(Exception):
+    pass
+
+
+@pytest.mark.parametrize("name", list(SOLVERS))
+@pytest.mark.parametrize("stop", ["max_evals", "crash"])
+def test_resume_continues_bit_for_bit(problem, tmp_path, name, stop):
+    make, evals, stop_at = SOLVERS[name]
+    reference = make(problem).run(evals)
+
+    interrupted = make(problem)
+    if stop == "max_evals":
+        interrupted.run(evals, checkpoint=CheckpointCallback(tmp_path), callbacks=[EarlyStoppingCallback(max_evals=stop_at)])
+    else:
+        # hard stop after a checkpoint: rows evaluated after it are dropped and redone
+        class Crash(CheckpointCallback):
+            def on_step(self, solver, history, n_evals):
+                super().on_step(solver, history, n_evals)
+                if n_evals >= evals // 2:
+                    raise _Crash
+
+        with pytest.raises(_Crash):
+            interrupted.run(evals, checkpoint=Crash(tmp_path, every=2))
+
+    resumed = make(problem).run(evals, checkpoint=CheckpointCallback(tmp_path))
+    assert resumed.n_evals == reference.n_evals
+    np.testing.assert_array_equal(resumed.history.theta, reference.history.theta)
+    np.testing.assert_array_equal(resumed.history.y, reference.history.y)
+
+
+def test_bayesian_checkpoint_leaves_the_factor_out(problem, tmp_path):
+    import pickle
+
+    solver = BayesianSolver(problem, seed=3, batch_size=4, n_candidates=300)
+    solver.run(40, checkpoint=CheckpointCallback(tmp_path))
+    with open(tmp_path / CheckpointCallback.STATE, "rb") as f:
+        state = f.read()
+    # the factor is (40, 40) floats, the state stays well below that
+    assert solver._L.shape == (40, 40)
+    assert len(state) < solver._L.nbytes
+
+    restored = pickle.loads(pickle.dumps(solver))
+    np.testing.assert_array_equal(restored._L, solver._L)
@@ -0,0 +1,93 @@
+"""
+DifferentialEvolutionSolver: convergence stopping, dithering, max_time and
+identical runs on every evaluator backend.
+"""
+import time
+
+import numpy as np
+import pytest
+
+from solvers.evaluator import make_evaluator
+from solvers.single_obj import DifferentialEvolutionSolver
+
+
+class _Slow:
+    """ the wrapped problem's evaluate_batch plus a fixed delay per batch """
+    name = "slow"
+
+    def __init__(self, problem, delay):
+        self.problem, self.delay = problem, delay
+        self.search_space = problem.search_space
+
+    def evaluate_batch(self, thetas):
+        time.sleep(self.delay)
+        return self.problem.evaluate_batch(thetas)
+
+
+def test_tol_stops_at_the_first_converged_generation(problem):
+    solver = DifferentialEvolutionSolver(problem, seed=0, popsize=10, tol=0.05)
+    spreads = []
+    update = solver._update
+
+    def recording_update(pop, thetas, values):
+        update(pop, thetas, values)
+        spreads.append(np.std(solver._cost) / abs(np.mean(solver._cost)))
+    solver._update = recording_update
+
+    result = solver.run(10_000)
+    assert solver.converged
+    assert result.n_evals == 10 * solver.generation < 10_000
+    assert spreads[-1] <= 0.05 and all(s > 0.05 for s in spreads[:-1])
+
+
+def test_atol_and_disabled_convergence(problem):
+    # any spread is within atol=1: one generation
+    solver = DifferentialEvolutionSolver(problem, seed=0, popsize=10, tol=0.0, atol=1.0)
+    assert solver.run(1000).n_evals == 10 and solver.converged
+    # tol=atol=0: the whole budget is used
+    solver = DifferentialEvolutionSolver(problem, seed=0, popsize=10, tol=0.0, atol=0.0)
+    assert solver.run(300).n_evals == 300 and not solver.converged
+
+
+@pytest.mark.parametrize("mutation", [(0.5, 1.0), 0.8])
+def test_dithering_draws_F_per_generation(problem, mutation):
+    solver = DifferentialEvolutionSolver(problem, seed=0, popsize=10, tol=0.0, mutation=mutation)
+    used = []
+    mutants = solver._mutants
+
+    def recording_mutants(F):
+        used.append(F)
+        return mutants(F)
+    solver._mutants = recording_mutants
+
+    solver.run(200)
+    assert len(used) == 19                      # every generation after the first
+    if isinstance(mutation, tuple):
+        assert len(set(used)) == len(used)
+        assert all(0.5 <= F < 1.0 for F in used)
+    else:
+        assert set(used) == {0.8}
+
+
+def test_max_time_stops_between_generations(problem):
+    solver = DifferentialEvolutionSolver(_Slow(problem, 0.05), seed=0, popsize=10, tol=0.0, max_time=0.3)
+    t0 = time.monotonic()
+    result = solver.run(100_000)
+    elapsed = time.monotonic() - t0
+    assert result.n_evals % 10 == 0 and 10 <= result.n_evals <= 80
+    # the budget is checked before each generation, so one more may be started
+    assert elapsed < 0.3 + 0.05 + 0.1
+
+
+def test_same_result_on_every_backend(problem):
+    def run(evaluator=None):
+        return DifferentialEvolutionSolver(problem, seed=4, popsize=12, tol=0.0).run(240, evaluator=evaluator)
+
+    reference = run()
+    for backend in ("serial", "thread", "process"):
+        kwargs = {} if backend == "serial" else {"n_workers": 3}
+        with make_evaluator(problem, backend, **kwargs) as evaluator:
+            result = run(evaluator)
+        np.testing.assert_array_equal(result.history.theta, reference.history.theta)
+        np.testing.assert_array_equal(result.history.y, reference.history.y)
+        assert result.x_best == reference.x_best and result.y_best == reference.y_best
@@ -0,0 +1,87 @@
+"""
+EarlyStoppingCallback: every stopping rule, with the evaluations it spent.
+"""
+import time
+
+import numpy as np
+import pytest
+
+from solvers.callback import EarlyStoppingCallback
+from solvers.random_search import RandomSearchSolver
+
+
+class _Scripted:
+    """ problem stub returning values from a function of the evaluation index """
+    name = "scripted"
+
+    def __init__(self, problem, value=lambda i: float(i), delay=0.0):
+        self.search_space = problem.search_space
+        self.value, self.delay = value, delay
+        self.n = 0
+
+    def evaluate_batch(self, thetas):
+        time.sleep(self.delay)
+        values = np.array([self.value(self.n + i) for i in range(len(thetas))])
+        self.n += len(thetas)
+        return values
+
+
+def _run(problem, stopper, batch_size=4, evals=1000):
+    return RandomSearchSolver(problem, batch_size=batch_size, seed=0).run(evals, callbacks=[stopper])
+
+
+def test_max_evals_trims_the_last_batch(problem):
+    scripted = _Scripted(problem)
+    result = _run(scripted, EarlyStoppingCallback(max_evals=30), batch_size=7)
+    # batches of 7, 7, 7, 7 and a last one of 2
+    assert result.n_evals == len(result.history) == scripted.n == 30
+    assert result.meta["stopped_by"] == "max_evals (30)"
+
+
+def test_evals_and_max_evals_take_the_smaller(problem):
+    scripted = _Scripted(problem)
+    result = _run(scripted, EarlyStoppingCallback(max_evals=30), batch_size=7, evals=25)
+    assert result.n_evals == scripted.n == 25
+    assert "stopped_by" not in result.meta
+
+
+def test_target(problem):
+    # values 0, 1, 2, ...: 10 is reached in the third batch of 4
+    scripted = _Scripted(problem)
+    result = _run(scripted, EarlyStoppingCallback(target=10.0))
+    assert result.n_evals == scripted.n == 12
+    assert result.y_best == 11.0 and result.meta["stopped_by"] == "target (10)"
+
+
+def test_target_when_minimizing(problem):
+    scripted = _Scripted(problem, value=lambda i: 100.0 - i)
+    solver = RandomSearchSolver(scripted, maximize=False, batch_size=4, seed=0)
+    result = solver.run(1000, callbacks=[EarlyStoppingCallback(target=90.0)])
+    assert result.n_evals == 12
+
+
+def test_patience(problem):
+    # improves by 1 per eval up to 20, then only by less than rtol * |best|
+    scripted = _Scripted(problem, value=lambda i: float(min(i, 20)) + 1e-6 * i)
+    result = _run(scripted, EarlyStoppingCallback(patience=10, rtol=1e-3))
+    # last real improvement in the batch ending at eval 24, stopped 10+ evals later
+    assert result.n_evals == scripted.n == 36
+    assert result.meta["stopped_by"] == "no improvement in 12 evals"
+
+
+def test_max_time(problem):
+    scripted = _Scripted(problem, delay=0.02)
+    t0 = time.monotonic()
+    result = _run(scripted, EarlyStoppingCallback(max_time=0.3))
+    elapsed = time.monotonic() - t0
+    # about 0.3 s / 0.02 s = 15 batches of 4, fewer on a slow machine, never a batch past the budget
+    assert 4 <= result.n_evals == scripted.n <= 60
+    assert elapsed < 0.3 + 0.1
+    assert result.meta["stopped_by"] == "max_time (0.3 s)"
+
+
+def test_invalid_arguments():
+    with pytest.raises(ValueError):
+        EarlyStoppingCallback(max_time=0)
+    with pytest.raises(ValueError):
+        EarlyStoppingCallback(patience=0)
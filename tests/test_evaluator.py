@@ -0,0 +1,50 @@
+"""
+Evaluation backends: same values as the problem, process pool warmup.
+"""
+import os
+
+import numpy as np
+import pytest
+
+from solvers.evaluator import ProcessPoolEvaluator, make_evaluator
+from solvers.store import StoredProblem
+
+
+class _Warm:
+    """ problem wrapper that records the pid of every process that warms it up """
+    def __init__(self, problem, log):
+        self.problem, self.log = problem, str(log)
+
+    def __getattr__(self, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return getattr(self.problem, name)
+
+    def warmup(self):
+        with open(self.log, "a") as f:
+            f.write(f"{os.getpid()}\n")
+
+
+@pytest.mark.parametrize("backend", ["serial", "thread", "process"])
+def test_backends_match_evaluate_batch(problem, backend):
+    thetas = problem.search_space.sample(37, np.random.default_rng(0))
+    kwargs = {} if backend == "serial" else {"n_workers": 3}
+    with make_evaluator(problem, backend, **kwargs) as evaluator:
+        np.testing.assert_array_equal(evaluator(thetas), problem.evaluate_batch(thetas))
+
+
+@pytest.mark.parametrize("mp_context", ["fork", "spawn"])
+def test_warmup_initializes_every_worker_without_evaluating(problem, tmp_path, mp_context):
+    log = tmp_path / "warm.log"
+    with ProcessPoolEvaluator(_Warm(problem, log), n_workers=3, mp_context=mp_context):
+        pids = log.read_text().split()
+    assert len(pids) == 3 and len(set(pids)) == 3
+
+
+def test_warmup_does_not_write_to_the_store(problem, tmp_path):
+    stored = StoredProblem(problem, tmp_path / "evals.sqlite")
+    thetas = problem.search_space.sample(30, np.random.default_rng(0))
+    with ProcessPoolEvaluator(stored, n_workers=2) as evaluator:
+        assert len(stored.store) == 0
+        evaluator(thetas)
+    assert len(stored.store) == 30
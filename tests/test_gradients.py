@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+from physics.reflectometry import parratt_amplitude
+from physics.stack import LayerStack
+
+
+def _stack(n_layers: int, seed: int = 0) -> LayerStack:
+    rng = np.random.default_rng(seed)
+    rho = rng.uniform(-1e-6, 8e-6, n_layers)
+    rho[0] = 0.0
+    sigma = rng.uniform(1.0, 6.0, n_layers)
+    sigma[n_layers // 2] = 0.0        # one sharp interface
+    return LayerStack(rho, rng.uniform(10.0, 200.0, n_layers), sigma)
+
+
+@pytest.mark.parametrize("n_q", [200, 3000])   # 3000 goes through the Q blocks
+def test_parratt_gradient_matches_central_differences(n_q):
+    Q = np.linspace(0.005, 0.25, n_q)
+    stack = _stack(6)
+    _, grads = parratt_amplitude(Q, stack, return_grad=True)
+
+    for field, grad, h in (("rho", grads[0], 1e-12), ("thickness", grads[1], 1e-4), ("sigma", grads[2], 1e-5)):
+        for j in range(len(stack)):
+            plus, minus = (LayerStack(stack.rho.copy(), stack.thickness.copy(), stack.sigma.copy()) for _ in range(2))
+            getattr(plus, field)[j] += h
+            getattr(minus, field)[j] -= h
+            if field == "sigma" and stack.sigma[j] == 0.0:
+                getattr(minus, field)[j] += h     # one sided at sigma = 0 (Nevot-Croce is even in sigma)
+                fd = (parratt_amplitude(Q, plus) - parratt_amplitude(Q, minus)) / h
+            else:
+                fd = (parratt_amplitude(Q, plus) - parratt_amplitude(Q, minus)) / (2 * h)
+            scale = np.max(np.abs(fd)) + 1e-12 * np.max(np.abs(grad))
+            assert np.max(np.abs(grad[j] - fd)) <= 1e-5 * scale + 1e-9, (field, j)
+
+
+@pytest.mark.parametrize("cap", ["Al2O3", "SiO2", "Au"])
+@pytest.mark.parametrize("design", [(0.3, 120.0, 25.0), (0.8, 40.0, 60.0)])
+def test_evaluate_gradient_matches_central_differences(problem, cap, design):
+    x = dict(zip(("x_coti", "d_mrl", "d_cap"), design), cap=cap)
+    value, grad = problem.evaluate_gradient(**x)
+    assert value == pytest.approx(problem.evaluate_objective(**x), rel=1e-9)
+
+    for i, (name, h) in enumerate((("x_coti", 1e-6), ("d_mrl", 1e-4), ("d_cap", 1e-4))):
+        plus, minus = dict(x), dict(x)
+        plus[name] += h
+        minus[name] -= h
+        fd = (problem.evaluate_objective(**plus) - problem.evaluate_objective(**minus)) / (2 * h)
+        assert grad[i] == pytest.approx(fd, rel=1e-5, abs=1e-9), name
@@ -0,0 +1,40 @@
+import itertools
+
+import numpy as np
+import pytest
+
+from solvers.grid_search import GridSearchSolver
+
+
+def test_lazy_points_match_the_full_grid(problem):
+    grid = GridSearchSolver(problem, n_points=4, resolution={"x_coti": 3}, log_axes=["d_mrl"])
+    full = np.array(list(itertools.product(*grid.axes)))
+    assert grid.size == len(full)
+    np.testing.assert_array_equal(grid.points(np.arange(grid.size)), full)
+
+
+@pytest.mark.parametrize("k", [1, 3, 7, 100])
+def test_shards_cover_every_point_exactly_once(problem, k):
+    grid = GridSearchSolver(problem, n_points=4)
+    shards = [GridSearchSolver(problem, n_points=4).shard(i, k) for i in range(k)]
+    assert sum(len(s) for s in shards) == grid.size
+
+    points = [np.concatenate(list(s.iter_batches(5))) for s in shards if len(s)]
+    points = np.concatenate(points)
+    assert len(points) == grid.size
+    # every grid point once: same multiset as the unsharded grid
+    order = np.lexsort(points.T[::-1])
+    np.testing.assert_array_equal(points[order], grid.points(np.arange(grid.size)))
+
+
+def test_shard_runs_are_disjoint_and_complete(problem):
+    grid = GridSearchSolver(problem, n_points=3, batch_size=8)
+    runs = [GridSearchSolver(problem, n_points=3, batch_size=8).shard(i, 4).run(10**6) for i in range(4)]
+    assert sum(r.n_evals for r in runs) == grid.size
+    thetas = np.concatenate([r.history.theta for r in runs])
+    assert len(np.unique(thetas, axis=0)) == grid.size
+
+
+def test_shard_index_out_of_range(problem):
+    with pytest.raises(ValueError):
+        GridSearchSolver(problem).shard(3, 3)
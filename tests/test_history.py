@@ -0,0 +1,95 @@
+"""
+RunHistory / RunResults: save-load, streamed files (also cut off mid-row)
+and the search space spec round trip.
+"""
+import numpy as np
+import pytest
+
+from solvers.base import RunResults
+from solvers.history import RunHistory, space_from_spec, space_spec
+from solvers.search_space import CategoricalParam, ContinuousParam, IntegerParam, SearchSpace
+
+
+def _space():
+    layers = IntegerParam("n_layers")
+    layers.lo, layers.hi = 1, 6
+    return SearchSpace([
+        ContinuousParam("x_coti", 0.0, 1.0),
+        layers,
+        CategoricalParam("cap", ["Al2O3", "SiO2", "Au"]),
+    ])
+
+
+def _rows(space, n, m=1, seed=0):
+    rng = np.random.default_rng(seed)
+    return space.sample(n, rng), rng.normal(size=(n, m)) if m > 1 else rng.normal(size=n)
+
+
+def test_space_spec_round_trip():
+    space = _space()
+    again = space_from_spec(space_spec(space))
+    assert [type(p) for p in again.params] == [type(p) for p in space.params]
+    assert space_spec(again) == space_spec(space)
+    thetas = space.sample(50, np.random.default_rng(0))
+    assert again.unpack_batch(thetas) == space.unpack_batch(thetas)
+
+
+@pytest.mark.parametrize("m", [1, 2])
+def test_save_load_round_trip(tmp_path, m):
+    space = _space()
+    history = RunHistory(space, capacity=4)     # grows a few times
+    for seed in range(5):
+        history.append(*_rows(space, 7, m, seed))
+    result = RunResults(x_best=history[3]["x"], y_best=1.5, history=history, n_evals=35, meta={"seed": 3})
+    result.save(tmp_path / "run.npz")
+
+    loaded = RunResults.load(tmp_path / "run.npz")
+    np.testing.assert_array_equal(loaded.history.theta, history.theta)
+    np.testing.assert_array_equal(loaded.history.y, history.y)
+    assert [e["x"] for e in loaded.history] == [e["x"] for e in history]
+    assert (loaded.x_best, loaded.y_best, loaded.n_evals, loaded.meta) == (history[3]["x"], 1.5, 35, {"seed": 3})
+
+
+@pytest.mark.parametrize("m", [1, 2])
+def test_stream_round_trip_and_cut_off_row(tmp_path, m):
+    space = _space()
+    path = str(tmp_path / "history.bin")
+    history = RunHistory(space, path=path)
+    for seed in range(3):
+        history.append(*_rows(space, 5, m, seed))
+    history.close()
+
+    loaded = RunHistory.load_stream(path)
+    np.testing.assert_array_equal(loaded.theta, history.theta)
+    np.testing.assert_array_equal(loaded.y, history.y)
+    assert space_spec(loaded.space) == space_spec(space)
+
+    # a crash in the middle of writing a row: the partial row is dropped
+    with open(path, "ab") as f:
+        f.write(np.arange(2, dtype=np.float64).tobytes())
+    cut = RunHistory.load_stream(path)
+    assert len(cut) == 15
+    np.testing.assert_array_equal(cut.theta, history.theta)
+
+
+def test_resume_stream_drops_rows_after_the_checkpoint(tmp_path):
+    space = _space()
+    path = str(tmp_path / "history.bin")
+    history = RunHistory(space, path=path)
+    history.append(*_rows(space, 10, seed=0))
+    history.close()
+    with open(path, "ab") as f:                 # and half a row
+        f.write(np.zeros(2).tobytes())
+
+    resumed = RunHistory.resume_stream(space, path, 6)
+    assert len(resumed) == 6
+    extra = _rows(space, 3, seed=1)
+    resumed.append(*extra)
+    resumed.close()
+
+    loaded = RunHistory.load_stream(path)
+    np.testing.assert_array_equal(loaded.theta, np.concatenate([history.theta[:6], extra[0]]))
+    np.testing.assert_array_equal(loaded.y, np.concatenate([history.y[:6], extra[1]]))
+
+    with pytest.raises(ValueError):
+        RunHistory.resume_stream(space, path, 100)
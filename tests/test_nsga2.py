@@ -0,0 +1,73 @@
+"""
+NSGA-II: sorting helpers against brute force, runs through evaluators.
+"""
+import numpy as np
+import pytest
+
+from solvers.evaluator import make_evaluator
+from solvers.multi_obj import NSGA2Solver, crowding_distance, non_dominated_sort
+
+
+def _brute_force_rank(F):
+    """ repeatedly strip the points no remaining point dominates """
+    rank = np.full(len(F), -1)
+    left = set(range(len(F)))
+    k = 0
+    while left:
+        front = [i for i in left if not any(
+            np.all(F[j] <= F[i]) and np.any(F[j] < F[i]) for j in left if j != i
+        )]
+        rank[front] = k
+        left -= set(front)
+        k += 1
+    return rank
+
+
+def _brute_force_crowding(F, rank):
+    dist = np.zeros(len(F))
+    for k in np.unique(rank):
+        idx = np.flatnonzero(rank == k)
+        for j in range(F.shape[1]):
+            # stable sort, as lexsort breaks ties by position
+            order = idx[np.argsort(F[idx, j], kind="stable")]
+            f = F[order, j]
+            dist[order[0]] = dist[order[-1]] = np.inf
+            span = f[-1] - f[0]
+            for a in range(1, len(order) - 1):
+                if span > 0:
+                    dist[order[a]] += (f[a + 1] - f[a - 1]) / span
+    return dist
+
+
+@pytest.mark.parametrize("seed", range(50))
+def test_sort_and_crowding_match_brute_force(seed):
+    rng = np.random.default_rng(seed)
+    n, m = rng.integers(1, 40), rng.integers(1, 4)
+    # few distinct values so ties and duplicates occur
+    F = rng.integers(0, 6, (n, m)).astype(float) if seed % 2 else rng.normal(size=(n, m))
+    rank = non_dominated_sort(F)
+    np.testing.assert_array_equal(rank, _brute_force_rank(F))
+    np.testing.assert_array_equal(crowding_distance(F, rank), _brute_force_crowding(F, rank))
+
+
+@pytest.mark.parametrize("backend", ["serial", "thread", "process"])
+def test_run_through_evaluator_keeps_every_objective(problem, backend):
+    def make():
+        return NSGA2Solver(problem, objectives=("TSF", "MCF"), popsize=8, seed=1)
+
+    reference = make().run(24)
+    with make_evaluator(problem, backend, **({} if backend == "serial" else {"n_workers": 2})) as evaluator:
+        result = make().run(24, evaluator=evaluator)
+
+    front, values = result.x_best, result.y_best
+    assert values.ndim == 2 and values.shape == (len(front), 2)
+    assert result.history.y.shape == (24, 2)
+    np.testing.assert_array_equal(result.history.y, reference.history.y)
+    np.testing.assert_array_equal(values, reference.y_best)
+
+
+def test_wrong_number_of_objectives_raises(problem):
+    solver = NSGA2Solver(problem, objectives=("TSF", "MCF"), popsize=8, seed=1)
+    solver.objective_fn = lambda thetas: np.zeros(len(thetas))
+    with pytest.raises(ValueError, match="2 objective values"):
+        solver.run(8)
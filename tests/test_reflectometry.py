@@ -0,0 +1,36 @@
+import numpy as np
+
+from physics.reflectometry import pad_stacks, parratt_amplitude, parratt_amplitude_batch
+from physics.stack import LayerStack
+
+
+def _stacks(depths, seed=0):
+    rng = np.random.default_rng(seed)
+    stacks = []
+    for n in depths:
+        rho = rng.uniform(-1e-6, 8e-6, n)
+        rho[0] = 0.0
+        sigma = rng.uniform(0.0, 6.0, n)
+        sigma[rng.integers(n)] = 0.0
+        stacks.append(LayerStack(rho, rng.uniform(5.0, 300.0, n), sigma))
+    return stacks
+
+
+def test_batch_matches_per_stack():
+    Q = np.linspace(0.003, 0.3, 400)
+    stacks = _stacks([5] * 8)
+    rho = np.stack([s.rho for s in stacks])
+    thickness = np.stack([s.thickness for s in stacks])
+    sigma = np.stack([s.sigma for s in stacks])
+
+    batch = parratt_amplitude_batch(Q, rho, thickness, sigma)
+    for Gamma, stack in zip(batch, stacks):
+        np.testing.assert_allclose(Gamma, parratt_amplitude(Q, stack), rtol=1e-12, atol=1e-15)
+
+
+def test_padded_stacks_of_different_depth():
+    Q = np.linspace(0.003, 0.3, 400)
+    stacks = _stacks([2, 3, 6, 9], seed=1)
+    batch = parratt_amplitude_batch(Q, *pad_stacks(stacks))
+    for Gamma, stack in zip(batch, stacks):
+        np.testing.assert_allclose(Gamma, parratt_amplitude(Q, stack), rtol=1e-12, atol=1e-15)
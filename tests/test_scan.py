@@ -0,0 +1,54 @@
+"""
+Base1 scan: chunked grid evaluation against evaluate_batch / evaluate_multi,
+memmap outputs.
+"""
+import itertools
+import json
+
+import numpy as np
+
+AXES = {
+    "d_mrl": np.linspace(10.0, 300.0, 7),
+    "cap": ["Au", "Al2O3", "SiO2"],
+    "d_cap": np.linspace(0.0, 100.0, 5),
+}
+FIXED = {"x_coti": 0.7}
+
+
+def _grid_thetas(problem):
+    space = problem.search_space
+    points = [dict(FIXED, **dict(zip(AXES, values))) for values in itertools.product(*AXES.values())]
+    return space.pack_batch(points)
+
+
+def test_chunked_scan_matches_evaluate_batch(problem):
+    shape = (7, 3, 5)
+    thetas = _grid_thetas(problem)
+    # 105 points in chunks of 8: the last chunk is partial
+    maps = problem.scan(AXES, FIXED, objectives=("TSF", "MCF"), per_soi=True, chunk_size=8)
+
+    assert maps["TSF"].shape == shape
+    np.testing.assert_allclose(maps["TSF"].ravel(), problem.evaluate_batch(thetas), rtol=1e-12, atol=0)
+    np.testing.assert_allclose(maps["MCF"].ravel(), problem.evaluate_multi(thetas, ["MCF"])[:, 0], rtol=1e-12, atol=0)
+
+    per_soi = problem.evaluate_multi(thetas, [f"MCF:{soi.name}" for soi in problem.soi_list])
+    assert maps["MCF:soi"].shape == shape + (len(problem.soi_list),)
+    np.testing.assert_allclose(maps["MCF:soi"].reshape(-1, len(problem.soi_list)), per_soi, rtol=1e-12, atol=0)
+
+    # the chunk size does not change the values
+    whole = problem.scan(AXES, FIXED, objectives=("TSF",))
+    np.testing.assert_allclose(whole["TSF"], maps["TSF"], rtol=1e-12, atol=0)
+
+
+def test_out_dir_writes_memmaps(problem, tmp_path):
+    maps = problem.scan(AXES, FIXED, objectives=("TSF",), per_soi=True, out_dir=tmp_path, chunk_size=16)
+    assert isinstance(maps["TSF"], np.memmap) and maps["TSF"].shape == (7, 3, 5)
+    assert isinstance(maps["SFM_up:soi"], np.memmap) and maps["SFM_up:soi"].shape == (7, 3, 5, 2)
+
+    np.testing.assert_array_equal(np.load(tmp_path / "TSF.npy"), maps["TSF"])
+    np.testing.assert_array_equal(np.load(tmp_path / "SFM_up_soi.npy"), maps["SFM_up:soi"])
+    info = json.loads((tmp_path / "scan.json").read_text())
+    assert info["axes"]["cap"] == AXES["cap"] and info["fixed"] == FIXED
+    assert info["maps"]["TSF"] == "TSF.npy"
+    np.testing.assert_allclose(np.load(tmp_path / "TSF.npy").ravel(), problem.evaluate_batch(_grid_thetas(problem)),
+                               rtol=1e-12, atol=0)
@@ -0,0 +1,68 @@
+"""
+The vectorized (n, d) SearchSpace operations agree with the per-point ones.
+"""
+import numpy as np
+import pytest
+
+from solvers.search_space import CategoricalParam, ContinuousParam, IntegerParam, SearchSpace
+
+
+def _space():
+    layers = IntegerParam("n_layers")
+    layers.lo, layers.hi = 1, 6
+    return SearchSpace([
+        ContinuousParam("x_coti", 0.0, 1.0),
+        layers,
+        CategoricalParam("cap", ["Al2O3", "SiO2", "Au"]),
+        ContinuousParam("d_mrl", 10.0, 300.0),
+        CategoricalParam("flag", [True, False]),
+    ])
+
+
+def _wide(space, n, seed):
+    """ points around and outside the relaxed box, with exact .5 ties mixed in """
+    rng = np.random.default_rng(seed)
+    lo, hi = space.relaxed_bounds()
+    thetas = lo + (hi - lo) * rng.uniform(-0.3, 1.3, (n, len(space)))
+    ties = rng.random((n, len(space))) < 0.2
+    return np.where(ties, np.floor(thetas) + 0.5, thetas)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_clip_batch_matches_clip(seed):
+    space = _space()
+    thetas = _wide(space, 200, seed)
+    expected = np.array([space.clip(theta) for theta in thetas])
+    np.testing.assert_array_equal(space.clip_batch(thetas), expected)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_unpack_batch_and_columns_match_unpack(seed):
+    space = _space()
+    thetas = _wide(space, 200, seed)
+    expected = [space.unpack(theta) for theta in thetas]
+
+    batch = space.unpack_batch(thetas)
+    assert batch == expected
+    for got, want in zip(batch, expected):
+        assert [type(v) for v in got.values()] == [type(v) for v in want.values()]
+
+    columns = space.unpack_columns(thetas)
+    for name in space.names:
+        assert list(columns[name]) == [x[name] for x in expected]
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_pack_batch_matches_pack(seed):
+    space = _space()
+    points = space.unpack_batch(space.sample(100, np.random.default_rng(seed)))
+    expected = np.array([space.pack(x) for x in points])
+    np.testing.assert_array_equal(space.pack_batch(points), expected)
+    np.testing.assert_array_equal(space.pack_batch(space.unpack_columns(expected)), expected)
+
+
+def test_sample_is_feasible_and_reproducible():
+    space = _space()
+    thetas = space.sample(500, np.random.default_rng(0))
+    np.testing.assert_array_equal(space.clip_batch(thetas), thetas)
+    np.testing.assert_array_equal(space.sample(500, np.random.default_rng(0)), thetas)
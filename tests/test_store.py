@@ -0,0 +1,69 @@
+"""
+EvaluationStore / StoredProblem: round trip, reuse across runs keyed by
+the problem fingerprint, reruns served from the store.
+"""
+import numpy as np
+
+from data.materials_loader import load_base1_materials
+from problems.base1 import Base1OptimizationProblem, Bounds, SOISpec
+from solvers.random_search import RandomSearchSolver
+from solvers.store import EvaluationStore, StoredProblem
+
+
+def _problem(soi_thickness=50.0):
+    materials = load_base1_materials("data.json")
+    sois = [SOISpec("a", 2.0, soi_thickness, 3.0), SOISpec("b", 4.0, 30.0, 3.0)]
+    return Base1OptimizationProblem(
+        materials, sois, np.linspace(0.01, 0.2, 200), Bounds(0.0, 1.0), Bounds(10.0, 300.0), Bounds(0.0, 100.0),
+    )
+
+
+def test_round_trip(tmp_path):
+    path = tmp_path / "evals.sqlite"
+    store = EvaluationStore(path, "p1")
+    keys = [(0.1, 2.0, 3.0, 0), (0.1 + 1e-15, 2.0, 3.0, 0), (0.5, 1.0, 0.0, 2)]
+    store.put_many(zip(keys, [1.5, 2.5, -0.25]))
+    store.put_many([(keys[0], 99.0)])               # already stored, kept
+    store.close()
+
+    reopened = EvaluationStore(path, "p1")
+    found = reopened.get_many(keys + [(0.2, 2.0, 3.0, 0)])
+    assert found == {EvaluationStore.encode_key(k): v for k, v in zip(keys, [1.5, 2.5, -0.25])}
+    assert len(reopened) == 3
+    # other problem keys and objectives are separate
+    assert EvaluationStore(path, "p2").get_many(keys) == {}
+    assert reopened.get_many(keys, objective="MCF") == {}
+
+
+def test_reused_for_the_same_fingerprint_only(tmp_path):
+    path = tmp_path / "evals.sqlite"
+    thetas = _problem().search_space.sample(16, np.random.default_rng(0))
+
+    first = StoredProblem(_problem(), path)
+    values = first.evaluate_batch(thetas)
+    assert (first.hits, first.misses) == (0, 16)
+
+    # same definition, new objects: everything comes from the store
+    again = StoredProblem(_problem(), path)
+    np.testing.assert_array_equal(again.evaluate_batch(thetas), values)
+    assert (again.hits, again.misses) == (16, 0)
+
+    # a changed SOI changes the fingerprint, nothing is reused
+    changed = StoredProblem(_problem(soi_thickness=60.0), path)
+    assert changed.store.problem_key != again.store.problem_key
+    changed_values = changed.evaluate_batch(thetas)
+    assert (changed.hits, changed.misses) == (0, 16)
+    np.testing.assert_array_equal(changed_values, _problem(soi_thickness=60.0).evaluate_batch(thetas))
+
+
+def test_rerun_is_served_from_the_store(tmp_path):
+    path = tmp_path / "evals.sqlite"
+    first = StoredProblem(_problem(), path)
+    result = RandomSearchSolver(first, seed=1, batch_size=16).run(64)
+    assert first.misses == 64 and len(first.store) == 64
+
+    rerun = StoredProblem(_problem(), path)
+    again = RandomSearchSolver(rerun, seed=1, batch_size=16).run(64)
+    assert (rerun.hits, rerun.misses) == (64, 0)
+    np.testing.assert_array_equal(again.history.y, result.history.y)
+    assert len(rerun.store) == 64